@@ -1,8 +1,18 @@
 import os
 import requests
-from bs4 import BeautifulSoup
 from time import sleep
 
+from pipeline.ckan import CkanError, find_series_packages
+from pipeline.crawler import (
+    FileLink, MonthCrawler, MonthResult, advance_watermark, load_watermark, months_from,
+    save_watermark,
+)
+from pipeline.downloads import DownloadError, download_file
+from pipeline.html_pages import get_parser
+from pipeline.manifest import DownloadManifest
+from pipeline.ratelimit import backoff_delay
+from pipeline.session import configure_session, get_session
+
 # ===========================
 # CONFIG
 # ===========================
@@ -11,9 +21,45 @@ END_YEAR = 2025  # inclusive
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (compatible; DataEDA-Scraper/0.1; +https://example.com)"
-}
+BASE_URL = "https://www.data.gov.uk"
+
+USER_AGENT = "Mozilla/5.0 (compatible; DataEDA-Scraper/0.1; +https://example.com)"
+
+# Per-host request pacing (pipeline/ratelimit.py): starts at "rate" req/s,
+# halves on 429/5xx/resets (honouring Retry-After) and ramps back up to
+# "max_rate" while the server is healthy. None disables pacing and retries.
+RATE_LIMIT = {"rate": 20.0, "max_rate": 100.0}
+
+# Record of every downloaded file (size, SHA-256, ETag, Last-Modified).
+# Files already in it are revalidated with a conditional GET, or not
+# requested at all when SKIP_UNCHANGED is True.
+MANIFEST_PATH = os.path.join(SCRIPT_DIR, "raw_data", "find_a_tender", "_manifest.sqlite")
+SKIP_UNCHANGED = False
+
+# Crawl all (year, month) pairs concurrently (pipeline/crawler.py), with at
+# most PER_HOST_LIMIT requests in flight per host. False = one at a time.
+CONCURRENT_CRAWL = True
+PER_HOST_LIMIT = 4
+
+# How datasets and file URLs are found. "api" lists the whole series with a
+# few CKAN package_search calls (pipeline/ckan.py); "html" scrapes the
+# search page and dataset page of every month. "api" falls back to "html"
+# when the API fails or finds nothing.
+DISCOVERY = "api"
+CKAN_API_URL = "https://data.gov.uk/api/action"
+CKAN_QUERY = 'title:"UK Public Procurement Notices"'
+CKAN_FILTER = "organization:crown-commercial-service"
+
+# Incremental mode: only revisit months at or after the saved watermark
+# (the latest month whose files all downloaded), going back LOOKBACK_MONTHS
+# more for late corrections. Without a watermark (first run) everything
+# from START_YEAR is crawled.
+INCREMENTAL = True
+LOOKBACK_MONTHS = 2
+
+# HTML backend for the search / dataset pages (pipeline/html_pages.py):
+# "lxml" (fastest), "strainer" or "bs4" (full BeautifulSoup tree).
+HTML_PARSER = "lxml"
 
 # Month number -> English month name used in search/title
 MONTH_NAMES = {
@@ -53,7 +99,7 @@ def build_search_url(year: int, month: int) -> str:
     month_name = MONTH_NAMES[month]
     query = f"Find+a+Tender+{month_name}+{year}"
     return (
-        "https://www.data.gov.uk/search"
+        f"{BASE_URL}/search"
         f"?q={query}"
         "&filters%5Bpublisher%5D=Crown+Commercial+Service"
         "&filters%5Btopic%5D="
@@ -71,12 +117,12 @@ def fetch_page(url: str, max_retries: int = 3) -> str:
     """Fetch a page with basic retry + longer read timeout."""
     for attempt in range(1, max_retries + 1):
         try:
-            resp = requests.get(url, headers=HEADERS, timeout=(5, 60))
+            resp = get_session().get(url, timeout=(5, 60))
             resp.raise_for_status()
             return resp.text
         except requests.exceptions.ReadTimeout:
             print(f"[Attempt {attempt}] Read timeout for {url}, retrying...")
-            sleep(2)
+            sleep(backoff_delay(attempt))
         except requests.exceptions.RequestException as e:
             print(f"Request failed for {url}: {e}")
             break
@@ -85,17 +131,13 @@ def fetch_page(url: str, max_retries: int = 3) -> str:
 
 def find_dataset_links(html: str, target_text: str):
     """Return dataset links whose title exactly matches the month/year we want."""
-    soup = BeautifulSoup(html, "html.parser")
     results = []
 
-    for a in soup.select("a.govuk-link"):
-        text = a.get_text(strip=True)
-        href = (a.get("href") or "").strip()
-
+    for text, href in get_parser(HTML_PARSER).links(html):
         # Exact match: "UK Public Procurement Notices - January 2021"
         if text == target_text:
             if href.startswith("/"):
-                href = "https://www.data.gov.uk" + href
+                href = BASE_URL + href
 
             results.append(
                 {
@@ -115,75 +157,146 @@ def sanitize_filename(name: str) -> str:
     return name.strip()
 
 
-def parse_and_download_files(dataset_url: str, download_dir: str):
-    """
-    Visit the dataset page, find all 'UK Public Procurement Notices ...' ZIP links,
-    and download them into download_dir.
-    """
-    print(f"\n  Fetching dataset page: {dataset_url}")
-    html = fetch_page(dataset_url)
-    soup = BeautifulSoup(html, "html.parser")
-
-    os.makedirs(download_dir, exist_ok=True)
+def is_wanted_file(link_text: str, format_text: str) -> bool:
+    # We only want ZIP files for UK Public Procurement Notices
+    return "UK Public Procurement Notices" in link_text and "ZIP" in format_text.upper()
 
-    # Each file is in a <tr> with <td>s, first <td> has <a>, second <td> has format
-    rows = soup.select("tbody.govuk-table__body tr.govuk-table__row")
 
-    downloaded = 0
+def make_file_link(link_text: str, file_url: str, download_dir: str, size=None) -> FileLink:
+    # Build a local filename from the link text:
+    # take only the part before the first comma
+    clean_name = link_text.split(",")[0].strip()
+    # remove any leading "Download" prefix
+    if clean_name.lower().startswith("download"):
+        clean_name = clean_name[8:].strip()
 
-    for tr in rows:
-        tds = tr.find_all("td")
-        if len(tds) < 2:
-            continue
+    filename = sanitize_filename(clean_name) + ".zip"
+    filepath = os.path.join(download_dir, filename)
 
-        link_td = tds[0]
-        format_td = tds[1]
+    return FileLink(clean_name, file_url, filepath, size)
 
-        format_text = format_td.get_text(strip=True)
-        link = link_td.find("a", class_="govuk-link")
 
-        if not link:
-            continue
+def find_file_links(html: str, download_dir: str):
+    """
+    Return a FileLink (name, URL, local path) for every 'UK Public Procurement Notices ...' ZIP
+    link on a dataset page. download_dir is created.
+    """
+    os.makedirs(download_dir, exist_ok=True)
 
-        link_text = link.get_text(strip=True)
-        href = (link.get("href") or "").strip()
+    links = []
 
-        # We only want ZIP files for UK Public Procurement Notices
-        if "UK Public Procurement Notices" not in link_text:
-            continue
-        if "ZIP" not in format_text.upper():
+    # Each file is in a <tr> with <td>s, first <td> has <a>, second <td> has format
+    for link_text, href, format_text in get_parser(HTML_PARSER).file_rows(html):
+        if not is_wanted_file(link_text, format_text):
             continue
 
         # Some hrefs are absolute (S3), some might be relative
         if href.startswith("/"):
-            file_url = "https://www.data.gov.uk" + href
+            file_url = BASE_URL + href
         else:
             file_url = href
 
-        # Build a local filename from the link text:
-        # take only the part before the first comma
-        clean_name = link_text.split(",")[0].strip()
-        # remove any leading "Download" prefix
-        if clean_name.lower().startswith("download"):
-            clean_name = clean_name[8:].strip()
+        links.append(make_file_link(link_text, file_url, download_dir))
+
+    return links
+
 
-        filename = sanitize_filename(clean_name) + ".zip"
-        filepath = os.path.join(download_dir, filename)
+def download_link(link: FileLink, manifest=None):
+    """Download one file from a dataset page (resumable, revalidated via the manifest)."""
+    return download_file(link.url, link.path, timeout=(5, 300),
+                         manifest=manifest, skip_unchanged=SKIP_UNCHANGED)
 
-        print(f"    Downloading: {clean_name}")
-        print(f"      URL:  {file_url}")
-        print(f"      ->   {filepath}")
+
+def download_links(links, manifest=None, source: str = ""):
+    """Download FileLinks one at a time; returns (downloaded, unchanged, failed)."""
+    downloaded = 0
+    unchanged = 0
+    failed = 0
+
+    for link in links:
+        print(f"    Downloading: {link.name}")
+        print(f"      URL:  {link.url}")
+        print(f"      ->   {link.path}")
 
         try:
-            resp = requests.get(file_url, headers=HEADERS, timeout=(5, 300))
-            resp.raise_for_status()
-            with open(filepath, "wb") as f:
-                f.write(resp.content)
-            downloaded += 1
-        except requests.exceptions.RequestException as e:
-            print(f"      !!! Failed to download {file_url}: {e}")
+            result = download_link(link, manifest)
+            if result.status == "downloaded":
+                downloaded += 1
+            else:
+                unchanged += 1
+                print(f"      Unchanged ({result.status}), kept existing file")
+        except (requests.exceptions.RequestException, DownloadError, OSError) as e:
+            print(f"      !!! Failed to download {link.url}: {e}")
+            failed += 1
 
-    print(f"  Downloaded {downloaded} file(s) from dataset: {dataset_url}")
+    print(f"  Downloaded {downloaded} file(s), {unchanged} unchanged, from dataset: {source}")
+    return downloaded, unchanged, failed
+
+
+def parse_and_download_files(dataset_url: str, download_dir: str, manifest=None):
+    """
+    Visit the dataset page, find all 'UK Public Procurement Notices ...' ZIP links,
+    and download them into download_dir, one at a time.
+    """
+    print(f"\n  Fetching dataset page: {dataset_url}")
+    html = fetch_page(dataset_url)
+
+    return download_links(find_file_links(html, download_dir), manifest, source=dataset_url)
+
+
+def file_links_from_resources(resources, download_dir: str):
+    """FileLinks for the wanted resources of a CKAN package, named as on the dataset page."""
+    os.makedirs(download_dir, exist_ok=True)
+    links = []
+    for res in resources:
+        name = (res.get("name") or "").strip()
+        url = (res.get("url") or "").strip()
+        if not url or not is_wanted_file(name, res.get("format") or ""):
+            continue
+        if url.startswith("/"):
+            url = BASE_URL + url
+        links.append(make_file_link(name, url, download_dir, size=res.get("size")))
+    return links
+
+
+def discover_months_api(jobs):
+    """
+    Find every month's datasets and files through the CKAN API.
+    Returns {(year, month): [{"title", "url", "links"}]}; months with no
+    dataset are left out.
+    """
+    titles = {build_target_text(year, month): (year, month) for year, month in jobs}
+    found = find_series_packages(CKAN_API_URL, CKAN_QUERY, titles, fq=CKAN_FILTER)
+
+    month_files = {}
+    for (year, month), packages in found.items():
+        download_dir = build_download_dir(year, month)
+        month_files[(year, month)] = [
+            {
+                "title": package["title"].strip(),
+                "url": f"{BASE_URL}/dataset/{package.get('name', '')}",
+                "links": file_links_from_resources(resources, download_dir),
+            }
+            for package, resources in packages
+        ]
+    return month_files
+
+
+def discover_month_files(jobs):
+    """
+    discover_months_api, or None (= scrape the HTML pages) when the API
+    fails or finds no dataset.
+    """
+    try:
+        month_files = discover_months_api(jobs)
+    except (requests.exceptions.RequestException, CkanError) as e:
+        print(f"CKAN API discovery failed ({e}); falling back to HTML pages")
+        return None
+    if not month_files:
+        print("CKAN API found no datasets; falling back to HTML pages")
+        return None
+    print(f"CKAN API: datasets found for {len(month_files)} month(s)")
+    return month_files
 
 
 def print_progress(current: int, total: int, year: int, month: int):
@@ -200,23 +313,19 @@ def print_progress(current: int, total: int, year: int, month: int):
     )
 
 
-# ===========================
-# MAIN LOOP
-# ===========================
-
-if __name__ == "__main__":
-    years = list(range(START_YEAR, END_YEAR + 1))
-    months = list(range(1, 13))
-    total_jobs = len(years) * len(months)
-    job_idx = 0
-
-    print(f"Total (year, month) combinations to try: {total_jobs}")
+def crawl_sequential(jobs, manifest=None, month_files=None):
+    """
+    Crawl (year, month) pairs one at a time, from month_files (CKAN API)
+    or the HTML pages; returns a MonthResult per month.
+    """
+    results = []
 
-    for year in years:
-        for month in months:
-            job_idx += 1
-            print_progress(job_idx, total_jobs, year, month)
+    for job_idx, (year, month) in enumerate(jobs, start=1):
+        print_progress(job_idx, len(jobs), year, month)
 
+        if month_files is not None:
+            datasets = month_files.get((year, month), [])
+        else:
             target_text = build_target_text(year, month)
             search_url = build_search_url(year, month)
             download_dir = build_download_dir(year, month)
@@ -224,17 +333,79 @@ if __name__ == "__main__":
             try:
                 search_html = fetch_page(search_url)
             except RuntimeError as e:
+                # If search page fails, just skip this (year, month)
                 print(f"\n  Skipping {year}-{month:02d}: search fetch failed ({e})")
+                results.append(MonthResult(year, month, 0, 0, 0, 0, f"search fetch failed ({e})"))
                 continue
 
             datasets = find_dataset_links(search_html, target_text)
 
-            if not datasets:
-                # No dataset published for that month/year
+        if not datasets:
+            # No dataset published for that month/year
+            results.append(MonthResult(year, month, 0, 0, 0, 0, None))
+            continue
+
+        totals = [0, 0, 0]
+        errors = []
+        for ds in datasets:
+            print(f"\n\nProcessing {ds['title']} -> {ds['url']}")
+            try:
+                if month_files is not None:
+                    counts = download_links(ds["links"], manifest, source=ds["url"])
+                else:
+                    counts = parse_and_download_files(ds["url"], download_dir, manifest=manifest)
+            except RuntimeError as e:
+                print(f"  !!! Dataset page failed: {e}")
+                errors.append(f"{ds['url']}: {e}")
                 continue
+            totals = [t + c for t, c in zip(totals, counts)]
+        results.append(MonthResult(year, month, len(datasets), *totals, "; ".join(errors) or None))
 
-            for ds in datasets:
-                print(f"\n\nProcessing {ds['title']} -> {ds['url']}")
-                parse_and_download_files(ds["url"], download_dir)
+    return results
 
+
+# ===========================
+# MAIN LOOP
+# ===========================
+
+if __name__ == "__main__":
+    years = list(range(START_YEAR, END_YEAR + 1))
+    months = list(range(1, 13))
+    jobs = [(year, month) for year in years for month in months]
+
+    configure_session(pool_size=PER_HOST_LIMIT, user_agent=USER_AGENT, rate_limit=RATE_LIMIT)
+    manifest = DownloadManifest(MANIFEST_PATH)
+
+    watermark = load_watermark(manifest) if INCREMENTAL else None
+    if watermark is not None:
+        jobs = months_from(jobs, watermark, LOOKBACK_MONTHS)
+        print(f"Incremental crawl from watermark {watermark[0]}-{watermark[1]:02d} "
+              f"(look-back {LOOKBACK_MONTHS} month(s))")
+
+    print(f"Total (year, month) combinations to try: {len(jobs)}")
+
+    # None = discover month by month from the HTML pages
+    month_files = discover_month_files(jobs) if DISCOVERY == "api" else None
+
+    if CONCURRENT_CRAWL:
+        crawler = MonthCrawler(
+            fetch_page=fetch_page,
+            download=lambda link: download_link(link, manifest),
+            build_search_url=build_search_url,
+            build_target_text=build_target_text,
+            build_download_dir=build_download_dir,
+            find_dataset_links=find_dataset_links,
+            find_file_links=find_file_links,
+            per_host=PER_HOST_LIMIT,
+        )
+        results = crawler.run(jobs, month_files=month_files)
+    else:
+        results = crawl_sequential(jobs, manifest, month_files)
+
+    if INCREMENTAL:
+        new_watermark = advance_watermark(results, watermark)
+        save_watermark(manifest, new_watermark)
+        print(f"\nWatermark: {new_watermark[0]}-{new_watermark[1]:02d}" if new_watermark else "\nNo watermark yet")
+
+    manifest.close()
     print("\n\nDone.")
@@ -1,9 +1,23 @@
 import os
 import re
+import json
+import threading
 import requests
 import pandas as pd
 from time import sleep
-from datetime import date
+from collections import deque
+from datetime import date, timedelta
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline.build_state import BuildState, schema_version
+from pipeline.journal import DayJournal
+from pipeline.ocds_cache import ResponseCache
+from pipeline.ocds_fields import CONTRACTS_FINDER_CONTEXTS, CONTRACTS_FINDER_FIELDS, MAPPING_VERSION, FieldExtractor
+from pipeline.ratelimit import backoff_delay
+from pipeline.session import configure_session, get_session
+from pipeline.uri_index import UriIndex, content_hash
+from pipeline.writers import DayWriter, build_schema, get_writers
 
 # Important clarification: Here I left a lot of duplicated/unimportant fields because at the time of writing this
 # I wasn't sure what could be used for analysis, so I tried to make it as comprehensive as possible
@@ -16,29 +30,220 @@ START_MONTH = 1
 END_YEAR = 2025
 END_MONTH = 11
 
+# Number of JSON detail requests in flight at once (1 = sequential)
+FETCH_WORKERS = 8
+
 # Folder where this script lives
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Input folder: raw_data/contracts_finder/{YEAR}/{MM}
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (compatible; ContractFinder-EDA/0.1; +https://example.com)"
-}
+USER_AGENT = "Mozilla/5.0 (compatible; ContractFinder-EDA/0.1; +https://example.com)"
+
+# Per-host request pacing (pipeline/ratelimit.py): starts at "rate" req/s,
+# halves on 429/5xx/resets (honouring Retry-After) and ramps back up to
+# "max_rate" while the server is healthy. None disables pacing and retries.
+RATE_LIMIT = {"rate": 20.0, "max_rate": 100.0}
+
+# On-disk cache of fetched OCDS JSON, so re-runs read from disk instead of the network
+USE_CACHE = True
+CACHE_PATH = os.path.join(SCRIPT_DIR, "cache", "contracts_finder_ocds.sqlite")
+CACHE_MAX_BYTES = 20 * 1024 ** 3   # compressed size budget; least recently used evicted first
+CACHE_OFFLINE = False              # True = only serve from cache, never hit the network
+CACHE_REVALIDATE = False           # True = send If-None-Match / If-Modified-Since on cache hits
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# Cross-day de-duplication of notice URIs (pipeline/uri_index.py):
+#   "off"     fetch and extract every row, as before
+#   "skip"    URIs already extracted on an earlier day are not fetched again
+#   "refetch" fetch and extract every row, but keep the index up to date
+#   "refresh" fetch again, but only write a full row when the document changed
+DEDUP_POLICY = "skip"
+URI_INDEX_PATH = os.path.join(SCRIPT_DIR, "cache", "contracts_finder_uris.sqlite")
+
+_uri_index = None
+
+# Ingestion mode:
+#   "csv"    one OCDS request per URI listed in the scraped daily CSVs (1a)
+#   "search" page through the OCDS search API by published date instead,
+#            BULK_PAGE_SIZE releases per request; no CSVs needed
+INGEST_MODE = "csv"
+OCDS_SEARCH_URL = "https://www.contractsfinder.service.gov.uk/Published/Notices/OCDS/Search"
+BULK_PAGE_SIZE = 100
+# uri recorded for each search-mode release: the notice's own OCDS URL, as listed in
+# the daily CSVs, so both modes share one URI index. The notice id is the release's
+# ocid without OCID_PREFIX. Search pages always bypass the response cache, so
+# re-running a recent day sees newly published releases.
+OCDS_NOTICE_URL = "https://www.contractsfinder.service.gov.uk/Published/Notice/OCDS/{notice_id}"
+OCID_PREFIX = "ocds-b5fd17-"
+
+# Checkpointing (pipeline/journal.py): every finished row of the day in progress is
+# appended to a journal in JOURNAL_DIR, and the day's output is compacted from it.
+#   RESUME = True   an interrupted day restarts after its last journaled row
+#   RESUME = False  an existing journal is discarded and the day is redone
+RESUME = True
+JOURNAL_DIR = os.path.join(SCRIPT_DIR, "cache", "journal")
+
+# Make-style skipping (pipeline/build_state.py): a day is only extracted again when its
+# CSV, EXTRACTOR_VERSION, the field mapping / output schema or DEDUP_POLICY changed
+# since its output files were written. Bump EXTRACTOR_VERSION whenever a change to
+# this script alters its output.
+SKIP_UP_TO_DATE = True
+EXTRACTOR_VERSION = "1"
+BUILD_STATE_PATH = os.path.join(SCRIPT_DIR, "cache", "build_state.sqlite")
+
+_build_state = None
+
+# Output: "parquet" (default, partitioned by year/month) and/or "xlsx" (legacy per-day Excel)
+OUTPUT_FORMATS = ["parquet"]
+OUTPUT_BASE_DIR = os.path.join(SCRIPT_DIR, "extracted_data")
+DATASET = "contracts_finder"
+WRITE_BATCH_ROWS = 5000  # rows kept in memory before a batch is flushed to the output files
+
+
+# ===========================
+# OUTPUT SCHEMA
+# ===========================
+OUTPUT_COLUMNS = [
+    "csv_file", "row_index", "status", "uri", "publishedDate", "ocid", "release_id",
+    "release_title", "release_date", "release_language", "release_tag", "release_tags_all",
+    "initiationType", "planning_milestone_ids", "planning_milestone_titles",
+    "planning_milestone_types", "planning_milestone_dueDates", "planning_document_ids",
+    "planning_document_types", "planning_document_descriptions", "planning_document_urls",
+    "planning_document_datePublished", "planning_document_formats",
+    "planning_document_languages", "publisher_name", "publisher_scheme", "publisher_uid",
+    "publisher_uri", "version", "extensions", "license", "publicationPolicy", "tender_id",
+    "tender_title", "tender_description", "tender_status", "mainProcurementCategory",
+    "value_amount", "value_currency", "minValue_amount", "minValue_currency", "cpv_scheme",
+    "cpv_id", "cpv_description", "additional_cpv_ids", "additional_cpv_descriptions",
+    "tender_document_ids", "tender_document_types", "tender_document_descriptions",
+    "tender_document_urls", "tender_document_datePublished", "tender_document_dateModified",
+    "tender_document_formats", "tender_document_languages", "tender_item_ids",
+    "tender_delivery_postalCodes_all", "tender_delivery_regions_all",
+    "tender_delivery_countryNames_all", "delivery_postalCode", "delivery_region",
+    "delivery_country", "tender_datePublished", "tender_endDate", "contract_startDate",
+    "contract_endDate", "procurementMethod", "procurementMethodDetails", "suitability_sme",
+    "suitability_vcse", "buyer_id", "buyer_name", "buyer_legalName", "buyer_identifier_scheme",
+    "buyer_identifier_id", "buyer_streetAddress", "buyer_locality", "buyer_postalCode",
+    "buyer_countryName", "buyer_contact_name", "buyer_contact_email",
+    "buyer_contact_telephone", "buyer_details_url", "buyer_roles", "supplier_party_ids",
+    "supplier_party_names", "supplier_legalNames", "supplier_identifier_schemes",
+    "supplier_identifier_ids", "supplier_streetAddresses", "supplier_localities",
+    "supplier_postalCodes", "supplier_countryNames", "supplier_scales", "supplier_vcse_flags",
+    "supplier_details_urls", "supplier_roles", "tender_notice_url",
+    "tender_notice_description", "award_id", "award_status", "award_date",
+    "award_datePublished", "award_value_amount", "award_value_currency",
+    "award_contract_startDate", "award_contract_endDate", "award_suppliers_ids",
+    "award_suppliers_names", "award_notice_url", "award_notice_description",
+    "award_notice_datePublished", "award_notice_format", "award_notice_language",
+    "award_document_ids", "award_document_types", "award_document_descriptions",
+    "award_document_urls", "award_document_datePublished", "award_document_dateModified",
+    "award_document_formats", "award_document_languages",
+]
+
+OUTPUT_SCHEMA = build_schema(
+    OUTPUT_COLUMNS,
+    {
+        "row_index": "int64",
+        "value_amount": "float64",
+        "minValue_amount": "float64",
+        "award_value_amount": "float64",
+        "suitability_sme": "bool",
+        "suitability_vcse": "bool",
+    },
+)
 
 
 # ===========================
 # HELPERS
 # ===========================
 
-def fetch_json(url: str, max_retries: int = 3):
-    """Fetch JSON from a URL with basic retry logic."""
+def get_cache():
+    """Return the shared response cache (opened lazily), or None if disabled."""
+    global _cache
+    if not USE_CACHE:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(CACHE_PATH, max_bytes=CACHE_MAX_BYTES, offline=CACHE_OFFLINE)
+    return _cache
+
+
+def get_uri_index():
+    """Return the cross-day URI index (opened lazily), or None if DEDUP_POLICY is "off"."""
+    global _uri_index
+    if DEDUP_POLICY == "off":
+        return None
+    if DEDUP_POLICY not in ("skip", "refetch", "refresh"):
+        raise ValueError(f"Unknown DEDUP_POLICY {DEDUP_POLICY!r}")
+    if _uri_index is None:
+        _uri_index = UriIndex(URI_INDEX_PATH)
+    return _uri_index
+
+
+def get_build_state():
+    """Return the output build state (opened lazily)."""
+    global _build_state
+    if _build_state is None:
+        _build_state = BuildState(BUILD_STATE_PATH)
+    return _build_state
+
+
+def build_versions():
+    """(code version, mapping version) that the daily outputs depend on."""
+    return (f"{EXTRACTOR_VERSION}/{DEDUP_POLICY}",
+            f"{MAPPING_VERSION}/{schema_version(OUTPUT_SCHEMA)}")
+
+
+def fetch_json(url: str, max_retries: int = 3, use_cache: bool = True, revalidate: bool = False):
+    """
+    Fetch JSON from a URL with basic retry logic, going through the response
+    cache unless use_cache is False. revalidate forces a conditional request
+    on a cache hit (as CACHE_REVALIDATE does for every hit).
+    """
+    cache = get_cache() if use_cache else None
+    cached = cache.get(url) if cache is not None else None
+
+    if cached is not None and (cache.offline or not (CACHE_REVALIDATE or revalidate)):
+        try:
+            return json.loads(cached.body)
+        except ValueError as e:
+            print(f"      Cached JSON invalid for {url}: {e}")
+            cached = None
+            if cache.offline:
+                return None
+
+    if cache is not None and cache.offline:
+        print(f"      Offline mode: {url} not in cache")
+        return None
+
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
     for attempt in range(1, max_retries + 1):
         try:
-            resp = requests.get(url, headers=HEADERS, timeout=(5, 30))
+            resp = get_session().get(url, headers=headers, timeout=(5, 30))
+            if resp.status_code == 304 and cached is not None:
+                cache.touch(url)
+                return json.loads(cached.body)
             resp.raise_for_status()
-            return resp.json()
+            data = resp.json()
+            if cache is not None:
+                cache.put(
+                    url,
+                    resp.content,
+                    etag=resp.headers.get("ETag"),
+                    last_modified=resp.headers.get("Last-Modified"),
+                )
+            return data
         except requests.exceptions.ReadTimeout:
             print(f"      [Attempt {attempt}] Timeout for {url}, retrying...")
-            sleep(2)
+            sleep(backoff_delay(attempt))
         except requests.exceptions.RequestException as e:
             print(f"      Request failed for {url}: {e}")
             break
@@ -48,6 +253,31 @@ def fetch_json(url: str, max_retries: int = 3):
     return None
 
 
+def iter_json(uris, max_workers: int = FETCH_WORKERS, revalidate=frozenset()):
+    """
+    Fetch JSON for each URI with a bounded thread pool, yielding (uri, data)
+    in input order; data is None for failed fetches. URIs in revalidate are
+    checked with the server even when cached. At most a few requests per
+    worker run ahead of the consumer, so a day's documents are never all
+    held in memory at once.
+    """
+    if max_workers <= 1 or len(uris) <= 1:
+        for uri in uris:
+            yield uri, fetch_json(uri, revalidate=uri in revalidate)
+        return
+    ahead = max_workers * 4
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = deque()
+        for uri in uris:
+            pending.append((uri, pool.submit(fetch_json, uri, revalidate=uri in revalidate)))
+            if len(pending) >= ahead:
+                done_uri, future = pending.popleft()
+                yield done_uri, future.result()
+        while pending:
+            done_uri, future = pending.popleft()
+            yield done_uri, future.result()
+
+
 def get_csv_files(input_dir: str):
     """List all CSV files in the target folder."""
     if not os.path.exists(input_dir):
@@ -72,84 +302,6 @@ def extract_date_from_filename(filename: str):
     return year, month, day
 
 
-def first_or_none(seq):
-    """Return first element of sequence or None."""
-    if not seq:
-        return None
-    return seq[0]
-
-
-def find_buyer_party(release: dict):
-    """Match buyer.id to party.id and return that party dict (or None)."""
-    buyer = release.get("buyer") or {}
-    buyer_id = buyer.get("id")
-    if not buyer_id:
-        return None
-    for p in release.get("parties", []) or []:
-        if p.get("id") == buyer_id:
-            return p
-    return None
-
-
-def find_supplier_parties(release: dict):
-    """Return list of parties whose roles include 'supplier'."""
-    suppliers = []
-    for p in release.get("parties", []) or []:
-        roles = p.get("roles") or []
-        if "supplier" in roles:
-            suppliers.append(p)
-    return suppliers
-
-
-def find_tender_notice_doc(tender: dict):
-    """Return first document of type 'tenderNotice' (or None)."""
-    for doc in tender.get("documents", []) or []:
-        if doc.get("documentType") == "tenderNotice":
-            return doc
-    return None
-
-
-def find_award_notice_doc(award: dict):
-    """Return first document of type 'awardNotice' (or None)."""
-    for doc in award.get("documents", []) or []:
-        if doc.get("documentType") == "awardNotice":
-            return doc
-    return None
-
-
-def extract_delivery_location(tender: dict):
-    """
-    Extract basic delivery location fields from items[0].deliveryAddresses.
-    We try to get postalCode, region, countryName from any of the addresses.
-    """
-    delivery_postal = None
-    delivery_region = None
-    delivery_country = None
-
-    items = tender.get("items") or []
-    if not items:
-        return delivery_postal, delivery_region, delivery_country
-
-    addresses = items[0].get("deliveryAddresses") or []
-    for addr in addresses:
-        if not isinstance(addr, dict):
-            continue
-        if delivery_postal is None and addr.get("postalCode"):
-            delivery_postal = addr.get("postalCode")
-        if delivery_region is None and addr.get("region"):
-            delivery_region = addr.get("region")
-        if delivery_country is None and addr.get("countryName"):
-            delivery_country = addr.get("countryName")
-
-    return delivery_postal, delivery_region, delivery_country
-
-
-def pipe_join(values):
-    """Join a list of values with '|' or return None if list is empty."""
-    cleaned = [str(v) for v in values if v is not None and str(v) != ""]
-    return "|".join(cleaned) if cleaned else None
-
-
 def month_sequence(start_year: int, start_month: int, end_year: int, end_month: int):
     """Yield (year, month) tuples inclusive from start to end."""
     current = date(start_year, start_month, 1)
@@ -161,7 +313,25 @@ def month_sequence(start_year: int, start_month: int, end_year: int, end_month:
         current = date(year, month, 1)
 
 
-def process_month(year: int, month: int):
+# Built once; see pipeline/ocds_fields.py for the column mapping.
+FIELD_EXTRACTOR = FieldExtractor(CONTRACTS_FINDER_FIELDS, CONTRACTS_FINDER_CONTEXTS,
+                                 leading=("csv_file", "row_index", "status"))
+
+
+def build_record(data: dict, csv_file: str, row_index: int, uri: str) -> dict:
+    """Flatten one OCDS release package (first release, first award) into an output row."""
+    record = FIELD_EXTRACTOR.extract(data)
+    record["csv_file"] = csv_file
+    record["row_index"] = row_index
+    record["status"] = "ok"
+    record["uri"] = record["uri"] or uri
+    return record
+
+
+def process_month(year: int, month: int, fetch_workers: int = FETCH_WORKERS,
+                  output_formats=None):
+    writers = get_writers(output_formats or OUTPUT_FORMATS, OUTPUT_BASE_DIR)
+
     print("=" * 40)
     print(f"Processing Year: {year}, Month: {month:02d}")
 
@@ -193,20 +363,17 @@ def process_month(year: int, month: int):
             continue
 
         yyyy, mm_str, dd = date_info
-        # Per-day tag
-        day_tag = f"{yyyy}_{mm_str}_{dd}"
-
-        # Output folder: extracted_data/
-        output_dir = os.path.join(SCRIPT_DIR, "extracted_data", "contracts_finder")
-        os.makedirs(output_dir, exist_ok=True)
-
-        output_path = os.path.join(
-            output_dir, f"contracts_finder_{day_tag}.xlsx"
-        )
 
         print(f"  Date detected: {yyyy}-{mm_str}-{dd}")
-        print(f"  Output folder: {output_dir}")
-        print(f"  Output file:   {output_path}")
+        outputs = [writer.output_path(DATASET, yyyy, mm_str, dd) for writer in writers]
+        for output in outputs:
+            print(f"  Output file:   {output}")
+
+        build_state = get_build_state()
+        input_hash = build_state.input_hash(csv_path)
+        if SKIP_UP_TO_DATE and build_state.is_current(outputs, input_hash, *build_versions()):
+            print("  Up to date (same CSV, code and mapping), skipping.\n")
+            continue
 
         # Read CSV
         try:
@@ -222,444 +389,258 @@ def process_month(year: int, month: int):
         first_col = df.iloc[:, 0].dropna()
         print(f"  Found {len(first_col)} URIs in first column (including potential duplicates).")
 
-        records = []
-        seen_uris = set()  # optional per-day de-duplication
-
-        for idx, uri in first_col.items():
-            uri = str(uri).strip()
-            if not uri:
-                continue
-
-            if uri in seen_uris:
-                records.append({
-                    "csv_file": base_name,
-                    "row_index": idx,
-                    "uri": uri,
-                    "publishedDate": None,
-                    "status": "duplicate_uri_skipped_fetch",
-                })
-                continue
-
-            seen_uris.add(uri)
-
-            print(f"    Fetching JSON for row {idx}: {uri}")
-            data = fetch_json(uri)
-            if data is None:
-                records.append({
-                    "csv_file": base_name,
-                    "row_index": idx,
-                    "uri": uri,
-                    "publishedDate": None,
-                    "status": "fetch_failed_or_invalid_json",
-                })
-                continue
-
-            # -------- Top-level --------
-            top_uri = data.get("uri")
-            published_date = data.get("publishedDate")
-
-            publisher = data.get("publisher") or {}
-            publisher_name = publisher.get("name")
-            publisher_scheme = publisher.get("scheme")
-            publisher_uid = publisher.get("uid")
-            publisher_uri = publisher.get("uri")
-
-            version = data.get("version")
-            extensions = data.get("extensions") or []
-            extensions_joined = pipe_join(extensions)
-
-            # NEW: license and publicationPolicy
-            top_license = data.get("license")
-            publication_policy = data.get("publicationPolicy")
-
-            releases = data.get("releases") or []
-            release = first_or_none(releases) or {}
-
-            # -------- Release-level --------
-            ocid = release.get("ocid")
-            release_title = release.get("title")
-            release_id = release.get("id")
-            release_date = release.get("date")
-            release_language = release.get("language")
-
-            tags = release.get("tag") or []
-            release_tag = first_or_none(tags)
-            release_tags_all = pipe_join(tags)
-            initiation_type = release.get("initiationType")
-
-            planning = release.get("planning") or {}
-            planning_milestones = planning.get("milestones") or []
-            planning_milestone_ids = pipe_join([m.get("id") for m in planning_milestones])
-            planning_milestone_titles = pipe_join([m.get("title") for m in planning_milestones])
-            planning_milestone_types = pipe_join([m.get("type") for m in planning_milestones])
-            planning_milestone_due_dates = pipe_join([m.get("dueDate") for m in planning_milestones])
-
-            planning_documents = planning.get("documents") or []
-            planning_document_ids = pipe_join([d.get("id") for d in planning_documents])
-            planning_document_types = pipe_join([d.get("documentType") for d in planning_documents])
-            planning_document_descriptions = pipe_join([d.get("description") for d in planning_documents])
-            planning_document_urls = pipe_join([d.get("url") for d in planning_documents])
-            planning_document_dates_published = pipe_join([d.get("datePublished") for d in planning_documents])
-            planning_document_formats = pipe_join([d.get("format") for d in planning_documents])
-            planning_document_languages = pipe_join([d.get("language") for d in planning_documents])
-
-            # -------- Tender --------
-            tender = release.get("tender") or {}
-            tender_id = tender.get("id")
-            tender_title = tender.get("title")
-            tender_description = tender.get("description")
-            tender_status = tender.get("status")
-            main_procurement_category = tender.get("mainProcurementCategory")
-
-            tender_documents = tender.get("documents") or []
-            tender_document_ids = pipe_join([d.get("id") for d in tender_documents])
-            tender_document_types = pipe_join([d.get("documentType") for d in tender_documents])
-            tender_document_descriptions = pipe_join([d.get("description") for d in tender_documents])
-            tender_document_urls = pipe_join([d.get("url") for d in tender_documents])
-            tender_document_dates_published = pipe_join([d.get("datePublished") for d in tender_documents])
-            tender_document_dates_modified = pipe_join([d.get("dateModified") for d in tender_documents])
-            tender_document_formats = pipe_join([d.get("format") for d in tender_documents])
-            tender_document_languages = pipe_join([d.get("language") for d in tender_documents])
-
-            classification = tender.get("classification") or {}
-            cpv_scheme = classification.get("scheme")  # NEW field
-            cpv_id = classification.get("id")
-            cpv_description = classification.get("description")
-
-            # additionalClassifications → pipe-joined
-            add_class = tender.get("additionalClassifications") or []
-            additional_cpv_ids = pipe_join(
-                [c.get("id") for c in add_class]
-            )
-            additional_cpv_descriptions = pipe_join(
-                [c.get("description") for c in add_class]
-            )
-
-            # -------- Value --------
-            value = tender.get("value") or {}
-            value_amount = value.get("amount")
-            value_currency = value.get("currency")
-
-            min_value = tender.get("minValue") or {}
-            min_value_amount = min_value.get("amount")
-            min_value_currency = min_value.get("currency")
-
-            # -------- Items + geography --------
-            items = tender.get("items") or []
-            tender_item_ids = pipe_join([item.get("id") for item in items])
-
-            def append_unique(target_list, value):
-                if value is None or value == "":
-                    return
-                if value not in target_list:
-                    target_list.append(value)
-
-            tender_delivery_postal_codes = []
-            tender_delivery_regions = []
-            tender_delivery_countries = []
-            for item in items:
-                addresses = item.get("deliveryAddresses") or []
-                for addr in addresses:
-                    if not isinstance(addr, dict):
-                        continue
-                    append_unique(tender_delivery_postal_codes, addr.get("postalCode"))
-                    append_unique(tender_delivery_regions, addr.get("region"))
-                    append_unique(tender_delivery_countries, addr.get("countryName"))
-
-            tender_delivery_postal_codes_joined = pipe_join(tender_delivery_postal_codes)
-            tender_delivery_regions_joined = pipe_join(tender_delivery_regions)
-            tender_delivery_countries_joined = pipe_join(tender_delivery_countries)
-
-            delivery_postal, delivery_region, delivery_country = extract_delivery_location(tender)
-
-            # -------- Time structure --------
-            tender_date_published = tender.get("datePublished")
-
-            tender_period = tender.get("tenderPeriod") or {}
-            tender_end_date = tender_period.get("endDate")
-
-            contract_period = tender.get("contractPeriod") or {}
-            contract_start_date = contract_period.get("startDate")
-            contract_end_date = contract_period.get("endDate")
-
-            # -------- Method / SME flags --------
-            procurement_method = tender.get("procurementMethod")
-            procurement_method_details = tender.get("procurementMethodDetails")
-            suitability = tender.get("suitability") or {}
-            suitability_sme = suitability.get("sme")
-            suitability_vcse = suitability.get("vcse")
-
-            # -------- Buyer + party details --------
-            buyer = release.get("buyer") or {}
-            buyer_id = buyer.get("id")
-            buyer_name = buyer.get("name")
-
-            buyer_party = find_buyer_party(release) or {}
-            buyer_identifier = buyer_party.get("identifier") or {}
-            buyer_address = buyer_party.get("address") or {}
-            buyer_contact = buyer_party.get("contactPoint") or {}
-            buyer_details = buyer_party.get("details") or {}
-            buyer_roles = buyer_party.get("roles") or []
-
-            buyer_legal_name = buyer_identifier.get("legalName")
-            buyer_identifier_scheme = buyer_identifier.get("scheme")
-            buyer_identifier_id = buyer_identifier.get("id")
-
-            buyer_street_address = buyer_address.get("streetAddress")
-            buyer_locality = buyer_address.get("locality")
-            buyer_postal_code = buyer_address.get("postalCode")
-            buyer_country_name = buyer_address.get("countryName")
-
-            buyer_contact_name = buyer_contact.get("name")
-            buyer_contact_email = buyer_contact.get("email")
-            buyer_contact_telephone = buyer_contact.get("telephone")
-            buyer_details_url = buyer_details.get("url")
-
-            buyer_roles_joined = pipe_join(buyer_roles)
-
-            # -------- Supplier party details (from parties.roles == 'supplier') --------
-            supplier_parties = find_supplier_parties(release)
-
-            supplier_party_ids = pipe_join([p.get("id") for p in supplier_parties])
-            supplier_party_names = pipe_join([p.get("name") for p in supplier_parties])
-
-            supplier_identifiers = [p.get("identifier") or {} for p in supplier_parties]
-            supplier_legal_names = pipe_join([i.get("legalName") for i in supplier_identifiers])
-            supplier_identifier_schemes = pipe_join([i.get("scheme") for i in supplier_identifiers])
-            supplier_identifier_ids = pipe_join([i.get("id") for i in supplier_identifiers])
-
-            supplier_addresses = [p.get("address") or {} for p in supplier_parties]
-            supplier_street_addresses = pipe_join([a.get("streetAddress") for a in supplier_addresses])
-            supplier_localities = pipe_join([a.get("locality") for a in supplier_addresses])
-            supplier_postal_codes = pipe_join([a.get("postalCode") for a in supplier_addresses])
-            supplier_country_names = pipe_join([a.get("countryName") for a in supplier_addresses])
-
-            supplier_details = [p.get("details") or {} for p in supplier_parties]
-            supplier_scales = pipe_join([d.get("scale") for d in supplier_details])
-            supplier_vcse_flags = pipe_join([d.get("vcse") for d in supplier_details])
-            supplier_details_urls = pipe_join([d.get("url") for d in supplier_details])
-
-            supplier_roles_lists = [p.get("roles") or [] for p in supplier_parties]
-            # Flatten roles then de-duplicate
-            supplier_roles_flat = []
-            for roles in supplier_roles_lists:
-                for r in roles or []:
-                    if r not in supplier_roles_flat:
-                        supplier_roles_flat.append(r)
-            supplier_roles_joined = pipe_join(supplier_roles_flat)
-
-            # -------- Tender notice document --------
-            tender_notice_doc = find_tender_notice_doc(tender) or {}
-            tender_notice_url = tender_notice_doc.get("url")
-            tender_notice_description = tender_notice_doc.get("description")
-
-            # -------- Awards (take first award if present) --------
-            awards = release.get("awards") or []
-            award = first_or_none(awards) or {}
-
-            award_id = award.get("id")
-            award_status = award.get("status")
-            award_date = award.get("date")
-            award_date_published = award.get("datePublished")
-
-            award_value = award.get("value") or {}
-            award_value_amount = award_value.get("amount")
-            award_value_currency = award_value.get("currency")
-
-            award_contract_period = award.get("contractPeriod") or {}
-            award_contract_start_date = award_contract_period.get("startDate")
-            award_contract_end_date = award_contract_period.get("endDate")
-
-            award_suppliers = award.get("suppliers") or []
-            award_suppliers_ids = pipe_join([s.get("id") for s in award_suppliers])
-            award_suppliers_names = pipe_join([s.get("name") for s in award_suppliers])
-
-            award_notice_doc = find_award_notice_doc(award) or {}
-            award_notice_url = award_notice_doc.get("url")
-            award_notice_description = award_notice_doc.get("description")
-            award_notice_date_published = award_notice_doc.get("datePublished")
-            award_notice_format = award_notice_doc.get("format")
-            award_notice_language = award_notice_doc.get("language")
-
-            award_documents = award.get("documents") or []
-            award_document_ids = pipe_join([d.get("id") for d in award_documents])
-            award_document_types = pipe_join([d.get("documentType") for d in award_documents])
-            award_document_descriptions = pipe_join([d.get("description") for d in award_documents])
-            award_document_urls = pipe_join([d.get("url") for d in award_documents])
-            award_document_dates_published = pipe_join([d.get("datePublished") for d in award_documents])
-            award_document_formats = pipe_join([d.get("format") for d in award_documents])
-            award_document_languages = pipe_join([d.get("language") for d in award_documents])
-            award_document_dates_modified = pipe_join([d.get("dateModified") for d in award_documents])
-
-            record = {
-                # bookkeeping
-                "csv_file": base_name,
-                "row_index": idx,
-                "status": "ok",
-
-                # identification
-                "uri": top_uri or uri,
-                "publishedDate": published_date,
-                "ocid": ocid,
-                "release_id": release_id,
-                "release_title": release_title,
-                "release_date": release_date,
-                "release_language": release_language,
-                "release_tag": release_tag,
-                "release_tags_all": release_tags_all,
-                "initiationType": initiation_type,
-
-                # planning
-                "planning_milestone_ids": planning_milestone_ids,
-                "planning_milestone_titles": planning_milestone_titles,
-                "planning_milestone_types": planning_milestone_types,
-                "planning_milestone_dueDates": planning_milestone_due_dates,
-                "planning_document_ids": planning_document_ids,
-                "planning_document_types": planning_document_types,
-                "planning_document_descriptions": planning_document_descriptions,
-                "planning_document_urls": planning_document_urls,
-                "planning_document_datePublished": planning_document_dates_published,
-                "planning_document_formats": planning_document_formats,
-                "planning_document_languages": planning_document_languages,
-
-                # publisher / meta
-                "publisher_name": publisher_name,
-                "publisher_scheme": publisher_scheme,
-                "publisher_uid": publisher_uid,
-                "publisher_uri": publisher_uri,
-                "version": version,
-                "extensions": extensions_joined,
-                "license": top_license,
-                "publicationPolicy": publication_policy,
-
-                # tender basics
-                "tender_id": tender_id,
-                "tender_title": tender_title,
-                "tender_description": tender_description,
-                "tender_status": tender_status,
-                "mainProcurementCategory": main_procurement_category,
-
-                # value
-                "value_amount": value_amount,
-                "value_currency": value_currency,
-                "minValue_amount": min_value_amount,
-                "minValue_currency": min_value_currency,
-
-                # CPV
-                "cpv_scheme": cpv_scheme,
-                "cpv_id": cpv_id,
-                "cpv_description": cpv_description,
-                "additional_cpv_ids": additional_cpv_ids,
-                "additional_cpv_descriptions": additional_cpv_descriptions,
-                "tender_document_ids": tender_document_ids,
-                "tender_document_types": tender_document_types,
-                "tender_document_descriptions": tender_document_descriptions,
-                "tender_document_urls": tender_document_urls,
-                "tender_document_datePublished": tender_document_dates_published,
-                "tender_document_dateModified": tender_document_dates_modified,
-                "tender_document_formats": tender_document_formats,
-                "tender_document_languages": tender_document_languages,
-
-                # geography
-                "tender_item_ids": tender_item_ids,
-                "tender_delivery_postalCodes_all": tender_delivery_postal_codes_joined,
-                "tender_delivery_regions_all": tender_delivery_regions_joined,
-                "tender_delivery_countryNames_all": tender_delivery_countries_joined,
-                "delivery_postalCode": delivery_postal,
-                "delivery_region": delivery_region,
-                "delivery_country": delivery_country,
-
-                # timing
-                "tender_datePublished": tender_date_published,
-                "tender_endDate": tender_end_date,
-                "contract_startDate": contract_start_date,
-                "contract_endDate": contract_end_date,
-
-                # method / SME flags
-                "procurementMethod": procurement_method,
-                "procurementMethodDetails": procurement_method_details,
-                "suitability_sme": suitability_sme,
-                "suitability_vcse": suitability_vcse,
-
-                # buyer
-                "buyer_id": buyer_id,
-                "buyer_name": buyer_name,
-                "buyer_legalName": buyer_legal_name,
-                "buyer_identifier_scheme": buyer_identifier_scheme,
-                "buyer_identifier_id": buyer_identifier_id,
-                "buyer_streetAddress": buyer_street_address,
-                "buyer_locality": buyer_locality,
-                "buyer_postalCode": buyer_postal_code,
-                "buyer_countryName": buyer_country_name,
-                "buyer_contact_name": buyer_contact_name,
-                "buyer_contact_email": buyer_contact_email,
-                "buyer_contact_telephone": buyer_contact_telephone,
-                "buyer_details_url": buyer_details_url,
-                "buyer_roles": buyer_roles_joined,
-
-                # supplier parties (from parties.roles == 'supplier')
-                "supplier_party_ids": supplier_party_ids,
-                "supplier_party_names": supplier_party_names,
-                "supplier_legalNames": supplier_legal_names,
-                "supplier_identifier_schemes": supplier_identifier_schemes,
-                "supplier_identifier_ids": supplier_identifier_ids,
-                "supplier_streetAddresses": supplier_street_addresses,
-                "supplier_localities": supplier_localities,
-                "supplier_postalCodes": supplier_postal_codes,
-                "supplier_countryNames": supplier_country_names,
-                "supplier_scales": supplier_scales,
-                "supplier_vcse_flags": supplier_vcse_flags,
-                "supplier_details_urls": supplier_details_urls,
-                "supplier_roles": supplier_roles_joined,
-
-                # links
-                "tender_notice_url": tender_notice_url,
-                "tender_notice_description": tender_notice_description,
-
-                # award-level fields (first award only)
-                "award_id": award_id,
-                "award_status": award_status,
-                "award_date": award_date,
-                "award_datePublished": award_date_published,
-                "award_value_amount": award_value_amount,
-                "award_value_currency": award_value_currency,
-                "award_contract_startDate": award_contract_start_date,
-                "award_contract_endDate": award_contract_end_date,
-                "award_suppliers_ids": award_suppliers_ids,
-                "award_suppliers_names": award_suppliers_names,
-                "award_notice_url": award_notice_url,
-                "award_notice_description": award_notice_description,
-                "award_notice_datePublished": award_notice_date_published,
-                "award_notice_format": award_notice_format,
-                "award_notice_language": award_notice_language,
-                "award_document_ids": award_document_ids,
-                "award_document_types": award_document_types,
-                "award_document_descriptions": award_document_descriptions,
-                "award_document_urls": award_document_urls,
-                "award_document_datePublished": award_document_dates_published,
-                "award_document_dateModified": award_document_dates_modified,
-                "award_document_formats": award_document_formats,
-                "award_document_languages": award_document_languages,
+        # Fetch every distinct URI up front (concurrently); rows are then
+        # assembled below in their original row_index order.
+        unique_uris = list(dict.fromkeys(
+            u for u in (str(v).strip() for v in first_col) if u
+        ))
+
+        # URIs already extracted on an earlier day (cross-day de-duplication)
+        day = f"{yyyy}-{mm_str}-{dd}"
+        uri_index = get_uri_index()
+        seen_before = {}
+        if uri_index is not None:
+            seen_before = {
+                u: e for u, e in uri_index.lookup(unique_uris).items() if e.first_day < day
             }
+            print(f"  {len(seen_before)} URI(s) already extracted on an earlier day ({DEDUP_POLICY}).")
+        # Rows an interrupted earlier run already finished (and their URIs)
+        journal = DayJournal(os.path.join(JOURNAL_DIR, f"{DATASET}_{yyyy}_{mm_str}_{dd}.jsonl"))
+        done = journal.open(resume=RESUME, header={"input_hash": input_hash, "versions": build_versions()})
+        if journal.discarded:
+            print("  Journal was written for another CSV or extractor version; starting the day over.")
+        if done.rows:
+            print(f"  Resuming: {len(done.rows)} row(s) already journaled.")
+
+        to_fetch = [u for u in unique_uris if u not in done.uris]
+        if DEDUP_POLICY == "skip":
+            to_fetch = [u for u in to_fetch if u not in seen_before]
+        # "refetch" / "refresh" exist to pick up documents that changed upstream, so
+        # URIs seen before are revalidated rather than served from the cached first fetch.
+        revalidate = set(seen_before) if DEDUP_POLICY in ("refetch", "refresh") else set()
+
+        print(f"  Fetching JSON for {len(to_fetch)} unique URI(s) with {fetch_workers} worker(s)...")
+        # Consumed in to_fetch order: each URI is needed at its first row only.
+        fetched = iter_json(to_fetch, fetch_workers, revalidate)
+
+        seen_uris = set(done.uris)  # optional per-day de-duplication
+        hashes = dict(done.hashes)  # uri -> content hash, recorded in the index once the day is written
+
+        try:
+            for idx, uri in first_col.items():
+                uri = str(uri).strip()
+                if not uri or idx in done.rows:
+                    continue
+
+                if uri in seen_uris:
+                    journal.append({
+                        "csv_file": base_name,
+                        "row_index": idx,
+                        "uri": uri,
+                        "publishedDate": None,
+                        "status": "duplicate_uri_skipped_fetch",
+                    }, uri)
+                    continue
+
+                seen_uris.add(uri)
+
+                if uri in seen_before and DEDUP_POLICY == "skip":
+                    journal.append({
+                        "csv_file": base_name,
+                        "row_index": idx,
+                        "uri": uri,
+                        "publishedDate": None,
+                        "status": "duplicate_uri_seen_before",
+                    }, uri)
+                    continue
+
+                _, data = next(fetched)
+                if data is None:
+                    journal.append({
+                        "csv_file": base_name,
+                        "row_index": idx,
+                        "uri": uri,
+                        "publishedDate": None,
+                        "status": "fetch_failed_or_invalid_json",
+                    }, uri)
+                    continue
+
+                if uri_index is not None:
+                    hashes[uri] = content_hash(data)
+                    if (DEDUP_POLICY == "refresh" and uri in seen_before
+                            and seen_before[uri].content_hash == hashes[uri]):
+                        journal.append({
+                            "csv_file": base_name,
+                            "row_index": idx,
+                            "uri": uri,
+                            "publishedDate": data.get("publishedDate"),
+                            "status": "duplicate_uri_unchanged",
+                        }, uri, hashes[uri])
+                        continue
 
-            records.append(record)
+                journal.append(build_record(data, base_name, idx, uri), uri, hashes.get(uri))
+        finally:
+            journal.close()
 
-        if not records:
+        # Compact the journal into the day's output files.
+        with DayWriter(writers, DATASET, yyyy, mm_str, dd, OUTPUT_SCHEMA, WRITE_BATCH_ROWS) as out:
+            for record in journal.records():
+                out.append(record)
+            results = out.close()
+
+        if not out.rows:
             print("  No records extracted for this day. Nothing to write.\n")
+            journal.remove()
             continue
 
-        out_df = pd.DataFrame(records)
+        written = []
+        for path, err in results:
+            if err is None:
+                written.append(path)
+                print(f"  Wrote {out.rows} rows to {path}")
+            else:
+                print(f"  Failed to write {path} for {base_name}: {err}")
+        build_state.record(written, input_hash, *build_versions())
+
+        # Only index URIs whose rows actually reached an output file; a day
+        # whose files could not be written keeps its journal for the next run.
+        if written:
+            if uri_index is not None and hashes:
+                uri_index.record(day, hashes)
+            journal.remove()
+        print()
+
+    print("Done with this month.\n")
+
+
+def iter_search_releases(published_from: str, published_to: str, page_size: int = None):
+    """
+    Yield (page_url, package, release) for every release the OCDS search API
+    returns for the published-date window, following the packages'
+    links.next. Raises RuntimeError if a page cannot be fetched.
+    """
+    url = f"{OCDS_SEARCH_URL}?" + urlencode({
+        "publishedFrom": published_from,
+        "publishedTo": published_to,
+        "limit": page_size or BULK_PAGE_SIZE,
+    })
+    seen_pages = set()
+    while url and url not in seen_pages:
+        seen_pages.add(url)
+        # Listings change as notices are published; never serve them (or their cursors) from the cache.
+        package = fetch_json(url, use_cache=False)
+        if package is None:
+            raise RuntimeError(f"search page failed: {url}")
+        for release in package.get("releases") or []:
+            yield url, package, release
+        url = (package.get("links") or {}).get("next")
+
+
+def search_release_uri(release: dict, page_url: str, position: int) -> str:
+    """
+    uri for one search-mode release: its notice URL (OCDS_NOTICE_URL), the
+    same URI CSV mode records. Falls back to the page URL and the release's
+    position when the ocid is missing or not a Contracts Finder one.
+    """
+    ocid = release.get("ocid")
+    if isinstance(ocid, str) and ocid.startswith(OCID_PREFIX) and len(ocid) > len(OCID_PREFIX):
+        return OCDS_NOTICE_URL.format(notice_id=ocid[len(OCID_PREFIX):])
+    return f"{page_url}#{position}"
+
+
+def process_month_search(year: int, month: int, output_formats=None):
+    """
+    Bulk counterpart of process_month: one output file per day, built from
+    the search API. Written days are recorded in the build state against the
+    input "ocds_search", so a later CSV-mode run does not take them for its own.
+    DEDUP_POLICY applies as in CSV mode, against the same URI index.
+    """
+    writers = get_writers(output_formats or OUTPUT_FORMATS, OUTPUT_BASE_DIR)
+    build_state = get_build_state()
+    uri_index = get_uri_index()
+
+    print("=" * 40)
+    print(f"Processing Year: {year}, Month: {month:02d} (OCDS search API)")
+
+    day = date(year, month, 1)
+    while day.month == month:
+        yyyy, mm_str, dd = f"{day.year:04d}", f"{day.month:02d}", f"{day.day:02d}"
+        next_day = day + timedelta(days=1)
+        print(f"Day {yyyy}-{mm_str}-{dd}")
 
+        pages = set()
+        hashes = {}
         try:
-            out_df.to_excel(output_path, index=False)
-            print(f"  Wrote {len(out_df)} rows to {output_path}\n")
-        except Exception as e:
-            print(f"  Failed to write Excel for {base_name}: {e}\n")
+            with DayWriter(writers, DATASET, yyyy, mm_str, dd, OUTPUT_SCHEMA, WRITE_BATCH_ROWS) as out:
+                for page_url, package, release in iter_search_releases(
+                    f"{day.isoformat()}T00:00:00", f"{next_day.isoformat()}T00:00:00"
+                ):
+                    pages.add(page_url)
+                    uri = search_release_uri(release, page_url, out.rows)
+                    # Same shape as a single-notice response, so build_record applies unchanged.
+                    data = {k: v for k, v in package.items() if k not in ("releases", "links")}
+                    data["uri"] = uri
+                    data["releases"] = [release]
+                    if uri_index is None:
+                        out.append(build_record(data, "ocds_search", out.rows, uri))
+                        continue
+
+                    seen = uri_index.lookup([uri]).get(uri)
+                    seen_before = seen is not None and seen.first_day < day.isoformat()
+                    status = None
+                    if seen_before and DEDUP_POLICY == "skip":
+                        status = "duplicate_uri_seen_before"
+                    else:
+                        # The release alone: the page around it (publishedDate, uri) changes per request.
+                        hashes[uri] = content_hash(release)
+                        if (DEDUP_POLICY == "refresh" and seen_before
+                                and seen.content_hash == hashes[uri]):
+                            status = "duplicate_uri_unchanged"
+                    if status is None:
+                        out.append(build_record(data, "ocds_search", out.rows, uri))
+                    else:
+                        out.append({
+                            "csv_file": "ocds_search",
+                            "row_index": out.rows,
+                            "uri": uri,
+                            # the same stub rows as CSV mode writes
+                            "publishedDate": (data.get("publishedDate")
+                                              if status == "duplicate_uri_unchanged" else None),
+                            "status": status,
+                        })
+                results = out.close()
+        except RuntimeError as e:
+            # Never write a partial day (the DayWriter discards it); the next run retries it.
+            print(f"  {e}; skipping this day.\n")
+            day = next_day
+            continue
+
+        print(f"  {out.rows} release(s)" + (f" from {len(pages)} page(s)" if pages else ""))
+        written = []
+        for path, err in results:
+            if err is None:
+                written.append(path)
+                print(f"  Wrote {out.rows} rows to {path}")
+            else:
+                print(f"  Failed to write {path}: {err}")
+        build_state.record(written, "ocds_search", *build_versions())
+        if written and uri_index is not None and hashes:
+            uri_index.record(day.isoformat(), hashes)
+        day = next_day
 
     print("Done with this month.\n")
 
 
 if __name__ == "__main__":
-    for yr, mo in month_sequence(START_YEAR, START_MONTH, END_YEAR, END_MONTH):
-        process_month(yr, mo)
+    configure_session(pool_size=FETCH_WORKERS, user_agent=USER_AGENT, rate_limit=RATE_LIMIT)
+    try:
+        for yr, mo in month_sequence(START_YEAR, START_MONTH, END_YEAR, END_MONTH):
+            if INGEST_MODE == "search":
+                process_month_search(yr, mo)
+            else:
+                process_month(yr, mo)
+    finally:
+        # Writes the cache's pending LRU access times.
+        if _cache is not None:
+            _cache.close()
     print("All requested months processed.\n")
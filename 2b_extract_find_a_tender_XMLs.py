@@ -1,9 +1,102 @@
+import os
+import re
+import argparse
 import zipfile
 from pathlib import Path
 import pandas as pd
 import xml.etree.ElementTree as ET
 import calendar
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import date, timedelta
+from functools import lru_cache
+
+from pipeline.build_state import BuildState, schema_version
+from pipeline.parse_cache import ParseCache, member_key
+from pipeline.writers import build_schema, get_writers, write_day
+
+# Output: "parquet" (default, partitioned by year/month) and/or "xlsx" (legacy per-day Excel)
+OUTPUT_FORMATS = ["parquet"]
+DATASET = "find_a_tender"
+
+# Every parsed field is kept as text
+OUTPUT_SCHEMA = build_schema([
+    "schema_type", "form_type", "td_document_type_code", "notice_type_group", "doc_id",
+    "edition", "no_doc_ojs", "notice_url", "date_pub", "ds_date_dispatch", "award_date",
+    "iso_country", "ti_country", "ti_town", "ca_country_code", "ca_town", "ca_postcode",
+    "ca_nuts_code", "perf_nuts_code", "ca_ce_nuts_code", "ca_name", "ca_email", "ca_url",
+    "original_cpv_code", "cpv_main_code", "additional_cpv_codes", "ti_text", "obj_title",
+    "short_descr", "type_contract_ctype", "val_total", "val_total_currency",
+    "est_total_val", "est_total_val_currency", "proc_total_val",
+    "proc_total_val_currency", "aw_val_total", "aw_val_currency", "nb_tenders",
+    "nc_contract_nature_code", "pr_proc_code", "ac_award_crit_code",
+    "ma_main_activities_code", "rp_regulation_code", "contractor_names", "parse_error",
+    "source_xml_file", "source_zip",
+])
+
+# Members parsed per task when a day's ZIP is split across processes (--member-workers)
+MEMBER_CHUNK = 200
+
+# Members larger than this (uncompressed) are parsed from the ZIP stream rather than read whole
+STREAM_MEMBER_BYTES = 1 << 20
+
+# Keep only notices whose notice_type_group is in this set, e.g. {"CONTRACT_AWARD", "UK7_AWARD"};
+# None keeps everything (--notice-types). TED members are sniffed from at most SNIFF_BYTES
+# and skipped before the full parse when their TD_DOCUMENT_TYPE rules them out.
+NOTICE_TYPES = None
+SNIFF_BYTES = 64 * 1024
+
+# Make-style skipping (pipeline/build_state.py): a day is only extracted again when its
+# ZIP, EXTRACTOR_VERSION or OUTPUT_SCHEMA changed since its output files were written
+# (--force rebuilds anyway). Bump EXTRACTOR_VERSION whenever a parser change alters the output.
+EXTRACTOR_VERSION = "2"
+BUILD_STATE_PATH = Path(__file__).resolve().parent / "cache" / "build_state.sqlite"
+
+# Parsed records cached per ZIP member (pipeline/parse_cache.py), keyed by member name,
+# CRC-32 and size, so re-published ZIPs and re-runs only parse changed members.
+# Entries built by another EXTRACTOR_VERSION are ignored.
+USE_PARSE_CACHE = True
+PARSE_CACHE_PATH = Path(__file__).resolve().parent / "cache" / "find_a_tender_parse_cache.sqlite"
+
+_build_state = None
+_parse_cache = None
+_parse_cache_pid = None  # process that opened _parse_cache
+
+
+def build_code_version(notice_types) -> str:
+    """EXTRACTOR_VERSION, plus the notice-type filter when one is set (filtered outputs differ)."""
+    if not notice_types:
+        return EXTRACTOR_VERSION
+    return f"{EXTRACTOR_VERSION}/{','.join(sorted(notice_types))}"
+
+
+def output_dataset(notice_types) -> str:
+    """DATASET, or for a notice-type filtered run its own dataset name, so the full daily files are left alone."""
+    if not notice_types:
+        return DATASET
+    return f"{DATASET}_{'-'.join(sorted(notice_types)).lower()}"
+
+
+def get_build_state():
+    """Return the output build state (opened lazily, once per process)."""
+    global _build_state
+    if _build_state is None:
+        _build_state = BuildState(str(BUILD_STATE_PATH))
+    return _build_state
+
+
+def get_parse_cache():
+    """Return the member parse cache (opened lazily, once per process), or None if disabled."""
+    global _parse_cache, _parse_cache_pid
+    if not USE_PARSE_CACHE:
+        return None
+    # A member worker forked after the parent opened the cache inherits its SQLite
+    # connection, which must not be used across fork(): open a fresh one (the
+    # inherited one is left alone, it still belongs to the parent).
+    if _parse_cache is None or _parse_cache_pid != os.getpid():
+        _parse_cache = ParseCache(str(PARSE_CACHE_PATH), EXTRACTOR_VERSION)
+        _parse_cache_pid = os.getpid()
+    return _parse_cache
 
 
 def _text(el):
@@ -23,6 +116,10 @@ def _ordinal(n: int) -> str:
     return f"{n}{suffix}"
 
 
+# Every notice_type_group the parsers emit (TED codes above, UK 2023 forms below)
+NOTICE_TYPE_GROUPS = {"PIN", "CONTRACT_NOTICE", "CONTRACT_AWARD", "MODIFICATION", "UK7_AWARD", "PLANNING", "OTHER"}
+
+
 def _map_notice_type_group(td_code, form=None):
     if td_code is None:
         return "OTHER"
@@ -40,6 +137,163 @@ def _map_notice_type_group(td_code, form=None):
 
 # -------- TED / UK R2.0.9 PARSER (classic F01–F21) -------- #
 
+_NS_NUTS = {
+    "n2016": "http://enotice.service.gov.uk/resource/schema/ted/2016/nuts",
+    "n2021": "http://enotice.service.gov.uk/resource/schema/ted/2021/nuts",
+}
+
+
+def _or_element(first, second):
+    # Mirrors `first or second` on Elements: an Element is falsy when it has
+    # no children, so a childless first match falls through to second.
+    return first if first is not None and len(first) else second
+
+
+# The elements a TED record needs, as relative paths looked up under each
+# anchor element; the first anchor (in document order) that yields a match
+# wins, exactly like root.find(".//ANCHOR/path").
+_TED_FIRST_PATHS = {
+    "REF_OJS": [("date_pub", "ted:DATE_PUB")],
+    "NOTICE_DATA": [
+        ("iso_country", "ted:ISO_COUNTRY"),
+        ("notice_url", "ted:URI_LIST/ted:URI_DOC[@LG='EN']"),
+        ("no_doc_ojs", "ted:NO_DOC_OJS"),
+        ("original_cpv", "ted:ORIGINAL_CPV"),
+        ("ca_ce_nuts_2021", "n2021:CA_CE_NUTS"),
+        ("ca_ce_nuts_2016", "n2016:CA_CE_NUTS"),
+        ("est_total", "ted:VALUES/ted:VALUE[@TYPE='ESTIMATED_TOTAL']"),
+        ("proc_total", "ted:VALUES/ted:VALUE[@TYPE='PROCUREMENT_TOTAL']"),
+    ],
+    "CODIF_DATA": [
+        ("ds_date_dispatch", "ted:DS_DATE_DISPATCH"),
+        ("td_document_type", "ted:TD_DOCUMENT_TYPE"),
+        ("nc_contract_nature", "ted:NC_CONTRACT_NATURE"),
+        ("pr_proc", "ted:PR_PROC"),
+        ("ac_award_crit", "ted:AC_AWARD_CRIT"),
+        ("ma_main_activities", "ted:MA_MAIN_ACTIVITIES"),
+        ("rp_regulation", "ted:RP_REGULATION"),
+    ],
+    "TRANSLATION_SECTION": [("ti_doc", "ted:ML_TITLES/ted:ML_TI_DOC[@LG='EN']")],
+    "CONTRACTING_BODY": [("ca_addr", "ted:ADDRESS_CONTRACTING_BODY")],
+    "OBJECT_CONTRACT": [
+        ("cpv_main", "ted:CPV_MAIN/ted:CPV_CODE"),
+        ("obj_title", "ted:TITLE/ted:P"),
+        ("short_descr_contract", "ted:SHORT_DESCR/ted:P"),
+        ("type_contract", "ted:TYPE_CONTRACT"),
+        ("val_total", "ted:VAL_TOTAL"),
+    ],
+    "OBJECT_DESCR": [("short_descr_lot", "ted:SHORT_DESCR/ted:P")],
+    "AWARD_CONTRACT": [
+        ("aw_conclusion", "ted:AWARDED_CONTRACT/ted:DATE_CONCLUSION_CONTRACT"),
+        ("aw_val_total", "ted:AWARDED_CONTRACT/ted:VALUES/ted:VAL_TOTAL"),
+        ("nb_tenders", "ted:AWARDED_CONTRACT/ted:TENDERS/ted:NB_TENDERS_RECEIVED"),
+    ],
+}
+
+# Same idea for the multi-valued fields, collected from every anchor. A field
+# with several paths lists all matches of its first path, then of the next
+# (root.findall(".//NOTICE_DATA/n2021:...") + root.findall(".//NOTICE_DATA/n2016:...")).
+_TED_ALL_PATHS = {
+    "NOTICE_DATA": [
+        ("perf_nuts", "n2021:PERFORMANCE_NUTS"),
+        ("perf_nuts", "n2016:PERFORMANCE_NUTS"),
+    ],
+    "OBJECT_DESCR": [("cpv_additional", "ted:CPV_ADDITIONAL/ted:CPV_CODE")],
+    "AWARD_CONTRACT": [("contractors", "ted:AWARDED_CONTRACT/ted:CONTRACTORS/ted:CONTRACTOR")],
+}
+# (field, path) of every multi-valued path, in the order their matches are concatenated
+_TED_ALL_SLOTS = [(name, path) for pairs in _TED_ALL_PATHS.values() for name, path in pairs]
+
+
+_STEP_RE = re.compile(r"^(\w+):(\w+)(?:\[@(\w+)='([^']*)'\])?$")
+
+
+def _compile_steps(path: str, ns: dict) -> tuple:
+    """"ted:A/ted:B[@X='y']" -> (("{ns}A", None, None), ("{ns}B", "X", "y"))."""
+    steps = []
+    for part in path.split("/"):
+        prefix, local, attr, value = _STEP_RE.match(part).groups()
+        steps.append((f"{{{ns[prefix]}}}{local}", attr, value))
+    return tuple(steps)
+
+
+@lru_cache(maxsize=8)
+def _ted_anchor_rules(main_ns: str) -> dict:
+    """
+    {"{ns}NOTICE_DATA": (first_rules, all_rules), ...} where first rules
+    are (field name, compiled relative path) and all rules (index into
+    _TED_ALL_SLOTS, compiled relative path) for that anchor.
+    """
+    ns = dict(_NS_NUTS, ted=main_ns)
+    rules = {f"{{{main_ns}}}FORM_SECTION": ((), ())}
+    for local in set(_TED_FIRST_PATHS) | set(_TED_ALL_PATHS):
+        rules[f"{{{main_ns}}}{local}"] = (
+            tuple((name, _compile_steps(path, ns)) for name, path in _TED_FIRST_PATHS.get(local, ())),
+            tuple((_TED_ALL_SLOTS.index((name, path)), _compile_steps(path, ns))
+                  for name, path in _TED_ALL_PATHS.get(local, ())),
+        )
+    return rules
+
+
+def _match_steps(el: ET.Element, steps: tuple) -> list:
+    """Elements under el matching a compiled relative path, in ElementPath order."""
+    tag, attr, value = steps[0]
+    matches = el.findall(tag)
+    if attr is not None:
+        matches = [m for m in matches if m.get(attr) == value]
+    if len(steps) == 1:
+        return matches
+    out = []
+    for m in matches:
+        out.extend(_match_steps(m, steps[1:]))
+    return out
+
+
+def _first_match(el: ET.Element, steps: tuple):
+    if len(steps) == 1 and steps[0][1] is None:
+        return el.find(steps[0][0])
+    matches = _match_steps(el, steps)
+    return matches[0] if matches else None
+
+
+def _locate_ted_elements(root: ET.Element, ns: dict) -> dict:
+    """
+    Locate every element the TED record needs, with the result of one
+    root.find(".//ANCHOR/path") per field (root.findall for the lists), but
+    in a single visit of the tree: each anchor element (NOTICE_DATA,
+    OBJECT_CONTRACT, ...) is recognised on the way past and only its own
+    children are searched.
+    """
+    anchor_rules = _ted_anchor_rules(ns["ted"])
+    form_section_tag = f"{{{ns['ted']}}}FORM_SECTION"
+
+    found = {"form_section": None}
+    for pairs in _TED_FIRST_PATHS.values():
+        for name, _path in pairs:
+            found[name] = None
+    slots = [[] for _slot in _TED_ALL_SLOTS]
+
+    elements = root.iter()
+    next(elements)  # ".//" never matches the root element itself
+    for el in elements:
+        rules = anchor_rules.get(el.tag)
+        if rules is None:
+            continue
+        if el.tag == form_section_tag:
+            if found["form_section"] is None:
+                found["form_section"] = el
+            continue
+        first_rules, all_rules = rules
+        for name, steps in first_rules:
+            if found[name] is None:
+                found[name] = _first_match(el, steps)
+        for slot, steps in all_rules:
+            slots[slot].extend(_match_steps(el, steps))
+    for (name, _path), matches in zip(_TED_ALL_SLOTS, slots):
+        found.setdefault(name, []).extend(matches)
+    return found
+
+
 def parse_ted_style_xml(root: ET.Element) -> dict:
     # dynamic namespace
     if "}" in root.tag:
@@ -50,31 +304,42 @@ def parse_ted_style_xml(root: ET.Element) -> dict:
     ns = {}
     if main_ns:
         ns["ted"] = main_ns
-    ns["n2016"] = "http://enotice.service.gov.uk/resource/schema/ted/2016/nuts"
-    ns["n2021"] = "http://enotice.service.gov.uk/resource/schema/ted/2021/nuts"
+    ns.update(_NS_NUTS)
+
+    # Without a namespace the "ted:" prefix is unbound; raise the error
+    # ElementPath always gave for such notices (it ends up in parse_error).
+    if not main_ns:
+        raise SyntaxError("prefix 'ted' not found in prefix map")
+    found = _locate_ted_elements(root, ns)
+
+    # Only namespaced notices get this far, so child lookups can use Clark
+    # names ("{ns}TAG"), which ElementTree resolves without ElementPath.
+    ted = f"{{{main_ns}}}"
+    n2021 = f"{{{_NS_NUTS['n2021']}}}"
+    n2016 = f"{{{_NS_NUTS['n2016']}}}"
 
     # IDs / basic meta
     doc_id = root.attrib.get("DOC_ID")
     edition = root.attrib.get("EDITION")
 
-    date_pub = _text(root.find(".//ted:REF_OJS/ted:DATE_PUB", ns))
-    ds_date_dispatch = _text(root.find(".//ted:CODIF_DATA/ted:DS_DATE_DISPATCH", ns))
+    date_pub = _text(found["date_pub"])
+    ds_date_dispatch = _text(found["ds_date_dispatch"])
 
-    iso_country_el = root.find(".//ted:NOTICE_DATA/ted:ISO_COUNTRY", ns)
+    iso_country_el = found["iso_country"]
     iso_country = iso_country_el.attrib.get("VALUE") if iso_country_el is not None else None
 
-    notice_url = _text(root.find(".//ted:NOTICE_DATA/ted:URI_LIST/ted:URI_DOC[@LG='EN']", ns))
-    no_doc_ojs = _text(root.find(".//ted:NOTICE_DATA/ted:NO_DOC_OJS", ns))
+    notice_url = _text(found["notice_url"])
+    no_doc_ojs = _text(found["no_doc_ojs"])
 
     # CPV
-    original_cpv_el = root.find(".//ted:NOTICE_DATA/ted:ORIGINAL_CPV", ns)
+    original_cpv_el = found["original_cpv"]
     original_cpv_code = original_cpv_el.attrib.get("CODE") if original_cpv_el is not None else None
 
-    cpv_main_el = root.find(".//ted:OBJECT_CONTRACT/ted:CPV_MAIN/ted:CPV_CODE", ns)
+    cpv_main_el = found["cpv_main"]
     cpv_main_code = cpv_main_el.attrib.get("CODE") if cpv_main_el is not None else None
 
     add_cpvs = []
-    for cpv_add in root.findall(".//ted:OBJECT_DESCR/ted:CPV_ADDITIONAL/ted:CPV_CODE", ns):
+    for cpv_add in found["cpv_additional"]:
         code = cpv_add.attrib.get("CODE")
         if code:
             add_cpvs.append(code)
@@ -82,106 +347,96 @@ def parse_ted_style_xml(root: ET.Element) -> dict:
 
     # NUTS
     perf_codes = []
-    for el in root.findall(".//ted:NOTICE_DATA/n2021:PERFORMANCE_NUTS", ns) + \
-               root.findall(".//ted:NOTICE_DATA/n2016:PERFORMANCE_NUTS", ns):
+    for el in found["perf_nuts"]:
         code = el.attrib.get("CODE")
         if code:
             perf_codes.append(code)
     perf_nuts_code = _join_unique(perf_codes)
 
-    ca_ce_nuts_el = (root.find(".//ted:NOTICE_DATA/n2021:CA_CE_NUTS", ns)
-                     or root.find(".//ted:NOTICE_DATA/n2016:CA_CE_NUTS", ns))
+    ca_ce_nuts_el = _or_element(found["ca_ce_nuts_2021"], found["ca_ce_nuts_2016"])
     ca_ce_nuts_code = ca_ce_nuts_el.attrib.get("CODE") if ca_ce_nuts_el is not None else None
 
     # Translation / title
-    ti_doc = root.find(".//ted:TRANSLATION_SECTION/ted:ML_TITLES/ted:ML_TI_DOC[@LG='EN']", ns)
-    ti_country = _text(ti_doc.find("ted:TI_CY", ns)) if ti_doc is not None else None
-    ti_town = _text(ti_doc.find("ted:TI_TOWN", ns)) if ti_doc is not None else None
-    ti_text_p = ti_doc.find("ted:TI_TEXT/ted:P", ns) if ti_doc is not None else None
+    ti_doc = found["ti_doc"]
+    ti_country = _text(ti_doc.find(ted + "TI_CY")) if ti_doc is not None else None
+    ti_town = _text(ti_doc.find(ted + "TI_TOWN")) if ti_doc is not None else None
+    ti_text_p = ti_doc.find(f"{ted}TI_TEXT/{ted}P") if ti_doc is not None else None
     ti_text = _text(ti_text_p)
 
     # Contracting authority
-    ca_addr = root.find(".//ted:CONTRACTING_BODY/ted:ADDRESS_CONTRACTING_BODY", ns)
-    ca_name = _text(ca_addr.find("ted:OFFICIALNAME", ns)) if ca_addr is not None else None
-    ca_town = _text(ca_addr.find("ted:TOWN", ns)) if ca_addr is not None else None
-    ca_postcode = _text(ca_addr.find("ted:POSTAL_CODE", ns)) if ca_addr is not None else None
-    ca_email = _text(ca_addr.find("ted:E_MAIL", ns)) if ca_addr is not None else None
-    ca_url = _text(ca_addr.find("ted:URL_GENERAL", ns)) if ca_addr is not None else None
-    ca_country_el = ca_addr.find("ted:COUNTRY", ns) if ca_addr is not None else None
+    ca_addr = found["ca_addr"]
+    ca_name = _text(ca_addr.find(ted + "OFFICIALNAME")) if ca_addr is not None else None
+    ca_town = _text(ca_addr.find(ted + "TOWN")) if ca_addr is not None else None
+    ca_postcode = _text(ca_addr.find(ted + "POSTAL_CODE")) if ca_addr is not None else None
+    ca_email = _text(ca_addr.find(ted + "E_MAIL")) if ca_addr is not None else None
+    ca_url = _text(ca_addr.find(ted + "URL_GENERAL")) if ca_addr is not None else None
+    ca_country_el = ca_addr.find(ted + "COUNTRY") if ca_addr is not None else None
     ca_country_code = ca_country_el.attrib.get("VALUE") if ca_country_el is not None else None
 
-    ca_nuts_el = (ca_addr.find("n2021:NUTS", ns) if ca_addr is not None else None) \
-                 or (ca_addr.find("n2016:NUTS", ns) if ca_addr is not None else None)
+    ca_nuts_el = _or_element(
+        ca_addr.find(n2021 + "NUTS") if ca_addr is not None else None,
+        ca_addr.find(n2016 + "NUTS") if ca_addr is not None else None,
+    )
     ca_nuts_code = ca_nuts_el.attrib.get("CODE") if ca_nuts_el is not None else None
 
     # Object / description
-    obj_title_p = root.find(".//ted:OBJECT_CONTRACT/ted:TITLE/ted:P", ns)
-    obj_title = _text(obj_title_p)
+    obj_title = _text(found["obj_title"])
 
-    short_descr_el = root.find(".//ted:OBJECT_CONTRACT/ted:SHORT_DESCR/ted:P", ns)
+    short_descr_el = found["short_descr_contract"]
     if short_descr_el is None:
-        short_descr_el = root.find(".//ted:OBJECT_DESCR/ted:SHORT_DESCR/ted:P", ns)
+        short_descr_el = found["short_descr_lot"]
     short_descr = _text(short_descr_el)
 
-    type_contract_el = root.find(".//ted:OBJECT_CONTRACT/ted:TYPE_CONTRACT", ns)
+    type_contract_el = found["type_contract"]
     type_contract_ctype = type_contract_el.attrib.get("CTYPE") if type_contract_el is not None else None
 
     # Values (notice-level)
-    val_total_el = root.find(".//ted:OBJECT_CONTRACT/ted:VAL_TOTAL", ns)
+    val_total_el = found["val_total"]
     val_total = _text(val_total_el)
     val_total_currency = val_total_el.attrib.get("CURRENCY") if val_total_el is not None else None
 
-    est_total_el = root.find(".//ted:NOTICE_DATA/ted:VALUES/ted:VALUE[@TYPE='ESTIMATED_TOTAL']", ns)
+    est_total_el = found["est_total"]
     est_total_val = _text(est_total_el)
     est_total_val_currency = est_total_el.attrib.get("CURRENCY") if est_total_el is not None else None
 
-    proc_total_el = root.find(".//ted:NOTICE_DATA/ted:VALUES/ted:VALUE[@TYPE='PROCUREMENT_TOTAL']", ns)
+    proc_total_el = found["proc_total"]
     proc_total_val = _text(proc_total_el)
     proc_total_val_currency = proc_total_el.attrib.get("CURRENCY") if proc_total_el is not None else None
 
     # Award section (if present)
-    aw_conclusion_el = root.find(".//ted:AWARD_CONTRACT/ted:AWARDED_CONTRACT/ted:DATE_CONCLUSION_CONTRACT", ns)
-    award_date = _text(aw_conclusion_el)
+    award_date = _text(found["aw_conclusion"])
 
-    aw_val_total_el = root.find(".//ted:AWARD_CONTRACT/ted:AWARDED_CONTRACT/ted:VALUES/ted:VAL_TOTAL", ns)
+    aw_val_total_el = found["aw_val_total"]
     aw_val_total = _text(aw_val_total_el)
     aw_val_currency = aw_val_total_el.attrib.get("CURRENCY") if aw_val_total_el is not None else None
 
-    nb_tenders_el = root.find(".//ted:AWARD_CONTRACT/ted:AWARDED_CONTRACT/ted:TENDERS/ted:NB_TENDERS_RECEIVED", ns)
-    nb_tenders = _text(nb_tenders_el)
+    nb_tenders = _text(found["nb_tenders"])
 
     # Contractors (winning suppliers) – flattened
     contractor_names = []
-    for contr in root.findall(".//ted:AWARD_CONTRACT/ted:AWARDED_CONTRACT/ted:CONTRACTORS/ted:CONTRACTOR", ns):
-        addr = contr.find("ted:ADDRESS_CONTRACTOR", ns)
-        name = _text(addr.find("ted:OFFICIALNAME", ns)) if addr is not None else None
+    for contr in found["contractors"]:
+        addr = contr.find(ted + "ADDRESS_CONTRACTOR")
+        name = _text(addr.find(ted + "OFFICIALNAME")) if addr is not None else None
         if name:
             contractor_names.append(name)
     contractor_names_str = _join_unique(contractor_names)
 
     # CODIF_DATA
-    td_doc_type_el = root.find(".//ted:CODIF_DATA/ted:TD_DOCUMENT_TYPE", ns)
-    td_document_type_code = td_doc_type_el.attrib.get("CODE") if td_doc_type_el is not None else None
-
-    nc_contract_nature_el = root.find(".//ted:CODIF_DATA/ted:NC_CONTRACT_NATURE", ns)
-    nc_contract_nature_code = nc_contract_nature_el.attrib.get("CODE") if nc_contract_nature_el is not None else None
-
-    pr_proc_el = root.find(".//ted:CODIF_DATA/ted:PR_PROC", ns)
-    pr_proc_code = pr_proc_el.attrib.get("CODE") if pr_proc_el is not None else None
-
-    ac_award_crit_el = root.find(".//ted:CODIF_DATA/ted:AC_AWARD_CRIT", ns)
-    ac_award_crit_code = ac_award_crit_el.attrib.get("CODE") if ac_award_crit_el is not None else None
+    def _code(key):
+        el = found[key]
+        return el.attrib.get("CODE") if el is not None else None
 
-    ma_main_activities_el = root.find(".//ted:CODIF_DATA/ted:MA_MAIN_ACTIVITIES", ns)
-    ma_main_activities_code = ma_main_activities_el.attrib.get("CODE") if ma_main_activities_el is not None else None
-
-    rp_regulation_el = root.find(".//ted:CODIF_DATA/ted:RP_REGULATION", ns)
-    rp_regulation_code = rp_regulation_el.attrib.get("CODE") if rp_regulation_el is not None else None
+    td_document_type_code = _code("td_document_type")
+    nc_contract_nature_code = _code("nc_contract_nature")
+    pr_proc_code = _code("pr_proc")
+    ac_award_crit_code = _code("ac_award_crit")
+    ma_main_activities_code = _code("ma_main_activities")
+    rp_regulation_code = _code("rp_regulation")
 
     # form type
     form_type = None
     if main_ns:
-        form_section = root.find(".//ted:FORM_SECTION", ns)
+        form_section = found["form_section"]
         if form_section is not None:
             for child in list(form_section):
                 if "FORM" in child.attrib:
@@ -251,14 +506,14 @@ def parse_ted_style_xml(root: ET.Element) -> dict:
 
 # -------- UK2 / UK6 / UK7 (OCDS-style) PARSER -------- #
 
-def parse_ukx_xml(root: ET.Element, form_tag: str) -> dict:
+def parse_ukx_xml(root: ET.Element, form_tag: str, form_el: ET.Element = None) -> dict:
     notice_data = root.find("NOTICE_DATA")
     no_doc_ext = _text(notice_data.find("NO_DOC_EXT")) if notice_data is not None else None
     doc_id = _text(notice_data.find("DOC_ID")) if notice_data is not None else None
     notice_url = _text(notice_data.find("URI_DOC")) if notice_data is not None else None
     date_pub = _text(notice_data.find("PUBLISHED")) if notice_data is not None else None
 
-    ukx = root.find(f".//{form_tag}")
+    ukx = form_el if form_el is not None else root.find(f".//{form_tag}")
     if ukx is None:
         return {
             "schema_type": form_tag,
@@ -431,16 +686,58 @@ def parse_ukx_xml(root: ET.Element, form_tag: str) -> dict:
 
 # -------- DISPATCH -------- #
 
-def parse_find_a_tender_xml(xml_content: str) -> dict:
-    root = ET.fromstring(xml_content)
-
-    # UK2 / UK4 / UK6 / UK7
+# UK form tag -> parser(root, form_tag, form_el). When a notice carries more
+# than one of these tags, the earliest entry wins. New UK forms only need an
+# entry here; detection cost does not grow with the number of forms.
+UK_FORM_PARSERS = {
+    tag: parse_ukx_xml
     for tag in ["UK16_2023", "UK15_2023", "UK14_2023", "UK13_2023", "UK12_2023",
                 "UK11_2023", "UK10_2023",
                 "UK9_2023", "UK8_2023", "UK7_2023", "UK6_2023", "UK5_2023",
-                "UK4_2023", "UK3_2023", "UK2_2023", "UK1_2023", "UK1_2022"]:
-        if root.find(f".//{tag}") is not None:
-            return parse_ukx_xml(root, tag)
+                "UK4_2023", "UK3_2023", "UK2_2023", "UK1_2023", "UK1_2022"]
+}
+
+
+def _pick_uk_form(candidates):
+    """Highest-priority (tag, element) among candidate elements, or (None, None)."""
+    hits = {}
+    for el in candidates:
+        if el.tag in UK_FORM_PARSERS and el.tag not in hits:
+            hits[el.tag] = el
+    for tag in UK_FORM_PARSERS:
+        if tag in hits:
+            return tag, hits[tag]
+    return None, None
+
+
+def identify_uk_form(root: ET.Element):
+    """
+    Return (form_tag, form_element) for a UK 2023-style notice, or (None, None).
+
+    The form element sits just below the root (directly or inside FORM_SECTION),
+    so only the first two levels are inspected. TED notices (namespaced root)
+    stop there; any other unrecognised layout gets one full-tree pass.
+    """
+    shallow = [grandchild for child in root for grandchild in [child, *child]]
+    tag, el = _pick_uk_form(shallow)
+    if tag is not None or root.tag.startswith("{"):
+        return tag, el
+
+    elements = root.iter()
+    next(elements)  # the root itself never counted as a form element
+    return _pick_uk_form(elements)
+
+
+def parse_find_a_tender_xml(xml_content) -> dict:
+    """xml_content: the document as str or bytes."""
+    return parse_find_a_tender_root(ET.fromstring(xml_content))
+
+
+def parse_find_a_tender_root(root) -> dict:
+    # UK1–UK16 (2023 regime)
+    form_tag, form_el = identify_uk_form(root)
+    if form_tag is not None:
+        return UK_FORM_PARSERS[form_tag](root, form_tag, form_el)
 
     # otherwise TED
     return parse_ted_style_xml(root)
@@ -448,7 +745,145 @@ def parse_find_a_tender_xml(xml_content: str) -> dict:
 
 # -------- DAY PROCESSOR -------- #
 
-def process_find_a_tender_day(year, month, day):
+_XML_DECL_ENCODING = re.compile(rb"""^(?:\xef\xbb\xbf)?\s*<\?xml[^>]*?encoding\s*=\s*["']([A-Za-z0-9._-]+)["']""")
+
+
+def _decode_xml(xml_bytes: bytes) -> str:
+    """
+    Text of a member expat could not read as bytes: its declared encoding
+    (when Python knows it), else UTF-8, else latin-1.
+    """
+    m = _XML_DECL_ENCODING.match(xml_bytes[:200])
+    encodings = [m.group(1).decode("ascii")] if m else []
+    for encoding in encodings + ["utf-8"]:
+        try:
+            return xml_bytes.decode(encoding)
+        except (LookupError, UnicodeDecodeError):
+            pass
+    return xml_bytes.decode("latin-1", errors="replace")
+
+
+def _member_root(z: zipfile.ZipFile, name: str):
+    """
+    Root element of one member, parsed from its raw bytes so expat applies
+    the XML encoding declaration itself; members over STREAM_MEMBER_BYTES
+    are fed to the parser from the ZIP stream instead of read whole. Members
+    expat rejects (no or a wrong declaration, or an encoding it lacks, e.g.
+    multi-byte ones) are parsed again from _decode_xml text.
+    """
+    try:
+        if z.getinfo(name).file_size > STREAM_MEMBER_BYTES:
+            with z.open(name) as f:
+                return ET.parse(f).getroot()
+        return ET.fromstring(z.read(name))
+    except (ET.ParseError, LookupError, ValueError):
+        return ET.fromstring(_decode_xml(z.read(name)))
+
+
+def _parse_record(z: zipfile.ZipFile, name: str) -> dict:
+    """Parsed record of one XML member, or its parse_error (what the parse cache stores)."""
+    try:
+        record = parse_find_a_tender_root(_member_root(z, name))
+        record["parse_error"] = None
+    except Exception as e:
+        record = {"doc_id": None, "parse_error": str(e)}
+    return record
+
+
+def _parse_member(z: zipfile.ZipFile, name: str, zip_name: str) -> dict:
+    """One output row for one XML member of a day's ZIP."""
+    return dict(_parse_record(z, name), source_xml_file=name, source_zip=zip_name)
+
+
+def sniff_notice_type_group(z: zipfile.ZipFile, name: str):
+    """
+    notice_type_group of a TED member, read incrementally from the start of
+    its stream and stopping at the first CODIF_DATA/TD_DOCUMENT_TYPE, or
+    None when that is not settled within SNIFF_BYTES. UK 2023 forms (no
+    root namespace) and unreadable members also give None: their group
+    needs the full parse.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    stack = []
+    codif_tag = td_tag = None
+    try:
+        with z.open(name) as f:
+            read = 0
+            while read < SNIFF_BYTES:
+                chunk = f.read(8192)
+                read += len(chunk)
+                if chunk:
+                    parser.feed(chunk)
+                else:
+                    parser.close()
+                for event, el in parser.read_events():
+                    if event == "end":
+                        if el.tag == td_tag and len(stack) > 2 and stack[-2] == codif_tag:
+                            return _map_notice_type_group(el.attrib.get("CODE"))
+                        stack.pop()
+                        continue
+                    if not stack:
+                        if not el.tag.startswith("{"):
+                            return None
+                        ns = el.tag[:el.tag.find("}") + 1]
+                        codif_tag, td_tag = ns + "CODIF_DATA", ns + "TD_DOCUMENT_TYPE"
+                    elif el.tag in UK_FORM_PARSERS:
+                        return None
+                    stack.append(el.tag)
+                if not chunk:
+                    return _map_notice_type_group(None)  # whole notice read, no TD_DOCUMENT_TYPE
+    except (ET.ParseError, LookupError, ValueError):
+        return None
+    return None
+
+
+def _parse_member_chunk(zip_path: str, names, notice_types=None) -> tuple:
+    """
+    (rows, cache hits) for a run of members, rows in member order (runs in a
+    member worker process). Members found in the parse cache are not read;
+    the others are parsed and added to it, unless they failed to parse (a
+    failure may be transient, so it is retried next run). With notice_types, only notices
+    of those groups are kept (and rows that failed to parse, so errors stay
+    visible).
+    """
+    zip_name = os.path.basename(zip_path)
+    cache = get_parse_cache()
+    rows = []
+    parsed = {}
+    with zipfile.ZipFile(zip_path, "r") as z:
+        keys = {name: member_key(z.getinfo(name)) for name in names}
+        cached = cache.get_many(keys.values()) if cache is not None else {}
+        for name in names:
+            record = cached.get(keys[name])
+            if record is None:
+                if notice_types:
+                    group = sniff_notice_type_group(z, name)
+                    if group is not None and group not in notice_types:
+                        continue
+                record = parsed[keys[name]] = _parse_record(z, name)
+            if notice_types and record["parse_error"] is None and record.get("notice_type_group") not in notice_types:
+                continue
+            rows.append(dict(record, source_xml_file=name, source_zip=zip_name))
+    parsed = {key: record for key, record in parsed.items() if record["parse_error"] is None}
+    if cache is not None and parsed:
+        cache.put_many(parsed)
+    return rows, len(cached)
+
+
+def process_find_a_tender_day(year, month, day, output_formats=None, skip_up_to_date=True,
+                              member_workers: int = 1, notice_types=None):
+    """
+    Extract one day's ZIP. Returns a status string:
+    "ok", "up_to_date", "no_zip", "no_xml" or "write_failed".
+
+    With member_workers > 1, ZIPs with more than MEMBER_CHUNK XML members
+    are parsed by a process pool, MEMBER_CHUNK members per task; rows keep
+    the ZIP's member order either way. notice_types (default NOTICE_TYPES)
+    keeps only those notice_type_groups and writes them to their own
+    dataset (output_dataset); a day with none left is still written, with
+    no rows. Members already in the parse cache are not
+    parsed again.
+    """
     script_dir = Path(__file__).resolve().parent
     day_int = int(day)
     month_int = int(month)
@@ -459,51 +894,161 @@ def process_find_a_tender_day(year, month, day):
 
     zip_path = script_dir / "raw_data" / "find_a_tender" / str(year) / f"{month_int:02d}" / zip_name
 
-    output_dir = script_dir / "extracted_data" / "find_a_tender"
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    out_file = output_dir / f"find_a_tender_{year}_{month_int:02d}_{day_int:02d}.xlsx"
+    writers = get_writers(output_formats or OUTPUT_FORMATS, str(script_dir / "extracted_data"))
 
     if not zip_path.exists():
         print(f"ZIP not found: {zip_path}")
-        return
+        return "no_zip"
+
+    notice_types = frozenset(notice_types or NOTICE_TYPES or ())
+    dataset = output_dataset(notice_types)
+    outputs = [w.output_path(dataset, year, month_int, day_int) for w in writers]
+    build_state = get_build_state()
+    input_hash = build_state.input_hash(str(zip_path))
+    code_version = build_code_version(notice_types)
+    mapping_version = schema_version(OUTPUT_SCHEMA)
+    if skip_up_to_date and build_state.is_current(outputs, input_hash, code_version, mapping_version):
+        return "up_to_date"
 
-    rows = []
     with zipfile.ZipFile(zip_path, "r") as z:
-        for name in z.namelist():
-            if not name.lower().endswith(".xml"):
-                continue
-            with z.open(name) as f:
-                xml_bytes = f.read()
-
-            try:
-                xml_str = xml_bytes.decode("utf-8")
-            except UnicodeDecodeError:
-                xml_str = xml_bytes.decode("latin-1", errors="replace")
-
-            try:
-                record = parse_find_a_tender_xml(xml_str)
-                record["parse_error"] = None
-            except Exception as e:
-                record = {"doc_id": None, "parse_error": str(e)}
-            record["source_xml_file"] = name
-            record["source_zip"] = zip_path.name
-            rows.append(record)
-
-    if not rows:
+        names = [name for name in z.namelist() if name.lower().endswith(".xml")]
+
+    if member_workers > 1 and len(names) > MEMBER_CHUNK:
+        chunks = [names[i:i + MEMBER_CHUNK] for i in range(0, len(names), MEMBER_CHUNK)]
+        with ProcessPoolExecutor(max_workers=min(member_workers, len(chunks))) as pool:
+            # map() yields in submission order, so rows stay in member order.
+            results = list(pool.map(_parse_member_chunk, [str(zip_path)] * len(chunks), chunks,
+                                    [notice_types] * len(chunks)))
+    else:
+        results = [_parse_member_chunk(str(zip_path), names, notice_types)]
+    rows = [row for chunk_rows, _hits in results for row in chunk_rows]
+    cache_hits = sum(hits for _rows, hits in results)
+
+    if not names:
         print(f"No XML files found in {zip_path}")
-        return
+        return "no_xml"
+    if cache_hits:
+        print(f"{cache_hits} of {len(names)} members served from the parse cache")
+    if notice_types:
+        print(f"Kept {len(rows)} of {len(names)} notices ({', '.join(sorted(notice_types))})")
 
     df = pd.DataFrame(rows)
-    df.to_excel(out_file, index=False)
-    print(f"Saved {len(df)} notices to {out_file}")
+    status = "ok"
+    written = []
+    for out_file, err in write_day(df, writers, dataset, year, month_int, day_int, OUTPUT_SCHEMA):
+        if err is None:
+            written.append(out_file)
+            print(f"Saved {len(df)} notices to {out_file}")
+        else:
+            print(f"Failed to write {out_file}: {err}")
+            status = "write_failed"
+    build_state.record(written, input_hash, code_version, mapping_version)
+    return status
+
+
+# -------- DAY RANGE RUNNER -------- #
+
+def _process_day_isolated(day: date, output_formats=None, skip_up_to_date=True, member_workers=1,
+                          notice_types=None):
+    """Run one day, turning any exception into an "error" status (pool-safe)."""
+    try:
+        status = process_find_a_tender_day(day.year, day.month, day.day, output_formats,
+                                           skip_up_to_date, member_workers, notice_types)
+        return day, status, None
+    except Exception as e:
+        return day, "error", f"{type(e).__name__}: {e}"
+
+
+def member_worker_budget(workers: int, member_workers: int, cpus: int = None) -> int:
+    """
+    Member processes per day such that workers * member_workers stays
+    within the CPU count; member_workers = 0 takes every core left over.
+    """
+    cpus = cpus or os.cpu_count() or 1
+    share = max(cpus // max(workers, 1), 1)
+    return share if member_workers <= 0 else min(member_workers, share)
+
+
+def process_day_range(start_date: date, end_date: date, workers: int = 1, output_formats=None,
+                      skip_up_to_date: bool = True, member_workers: int = 1, notice_types=None) -> Counter:
+    """
+    Extract every day from start_date to end_date (inclusive).
+
+    Days are independent (one ZIP in, one file per format out), so with
+    workers > 1 they run in a process pool; a failing day is reported and
+    does not stop the others. Days whose outputs are up to date are
+    skipped unless skip_up_to_date is False. member_workers > 1 also
+    splits each big day's ZIP across processes; it is capped so that
+    workers * member_workers does not exceed the CPU count. notice_types
+    keeps only those notice_type_groups (see NOTICE_TYPES).
+    Returns a Counter of day statuses.
+    """
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    requested = member_workers
+    member_workers = member_worker_budget(workers, member_workers)
+    if requested > 1 and member_workers < requested:
+        print(f"Using {member_workers} member worker(s) per day ({workers} day worker(s), "
+              f"{os.cpu_count()} CPU(s))")
+    statuses = Counter()
+    errors = []
+
+    def record(result, done):
+        day, status, err = result
+        statuses[status] += 1
+        if err is not None:
+            errors.append((day, err))
+        print(f"[{done}/{len(days)}] {day.isoformat()} {status}" + (f": {err}" if err else ""))
+
+    if workers <= 1:
+        for done, day in enumerate(days, start=1):
+            record(_process_day_isolated(day, output_formats, skip_up_to_date, member_workers, notice_types),
+                   done)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_process_day_isolated, day, output_formats, skip_up_to_date, member_workers,
+                                   notice_types)
+                       for day in days]
+            for done, fut in enumerate(as_completed(futures), start=1):
+                record(fut.result(), done)
+
+    print("\n" + "=" * 40)
+    print(f"Processed {len(days)} day(s) from {start_date} to {end_date} with {workers} worker(s)"
+          + (f" x {member_workers} member worker(s)" if member_workers > 1 else ""))
+    for status in ("ok", "up_to_date", "no_zip", "no_xml", "write_failed", "error"):
+        if statuses[status]:
+            print(f"  {status:<13} {statuses[status]}")
+    for day, err in sorted(errors):
+        print(f"  ! {day.isoformat()}: {err}")
+    return statuses
+
+
+def _notice_types_arg(value: str) -> set:
+    types = {t.strip().upper() for t in value.split(",") if t.strip()}
+    unknown = types - NOTICE_TYPE_GROUPS
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown notice type(s) {', '.join(sorted(unknown))}; choose from {', '.join(sorted(NOTICE_TYPE_GROUPS))}")
+    return types
 
 
 if __name__ == "__main__":
-    start_date = date(2021, 1, 1)
-    end_date = date(2025, 10, 31)
-    current = start_date
-
-    while current <= end_date:
-        process_find_a_tender_day(current.year, current.month, current.day)
-        current += timedelta(days=1)
+    parser = argparse.ArgumentParser(description="Extract Find a Tender daily ZIPs.")
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2021, 1, 1),
+                        help="first day, YYYY-MM-DD (default 2021-01-01)")
+    parser.add_argument("--end", type=date.fromisoformat, default=date(2025, 10, 31),
+                        help="last day, inclusive (default 2025-10-31)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="parallel day processes (default 1; 0 = one per CPU core)")
+    parser.add_argument("--member-workers", type=int, default=1,
+                        help="processes parsing one day's ZIP members (default 1; 0 = the cores "
+                             "left per day worker); capped so workers x member workers <= CPUs")
+    parser.add_argument("--notice-types", type=_notice_types_arg,
+                        help="comma-separated notice_type_group values to keep, e.g. "
+                             "CONTRACT_AWARD,UK7_AWARD (default: NOTICE_TYPES, i.e. all)")
+    parser.add_argument("--force", action="store_true",
+                        help="re-extract days whose outputs are already up to date")
+    args = parser.parse_args()
+
+    process_day_range(args.start, args.end, workers=args.workers or os.cpu_count() or 1,
+                      skip_up_to_date=not args.force, member_workers=args.member_workers,
+                      notice_types=args.notice_types)
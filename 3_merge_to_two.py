@@ -1,11 +1,11 @@
 import os
-import glob
-import pandas as pd
 from tqdm import tqdm
 
+from pipeline.writers import find_day_files, read_day_file
+
 def merge_dataset(dataset_name: str) -> None:
     """
-    Stream-merge all daily Excel files for a given dataset
+    Stream-merge all daily files (Parquet partitions or legacy Excel) for a given dataset
     (i.e. 'find_a_tender', 'contracts_finder')
     into a single CSV in the 'merged_data' folder,
     without keeping all data in RAM at once.
@@ -14,7 +14,7 @@ def merge_dataset(dataset_name: str) -> None:
     script_dir = os.path.dirname(os.path.abspath(__file__))
 
     # 2. Input + output paths
-    input_dir = os.path.join(script_dir, "extracted_data", dataset_name)
+    input_dir = os.path.join(script_dir, "extracted_data")
     output_dir = os.path.join(script_dir, "merged_data")
     output_file = os.path.join(output_dir, f"{dataset_name}_merged.csv")
 
@@ -26,12 +26,11 @@ def merge_dataset(dataset_name: str) -> None:
         print(f"\nExisting output found for {dataset_name}, removing: {output_file}")
         os.remove(output_file)
 
-    # 3. All matching Excel files
-    pattern = os.path.join(input_dir, f"{dataset_name}_????_??_??.xlsx")
-    files = sorted(glob.glob(pattern))
+    # 3. All daily files (Parquet preferred over .xlsx for the same day)
+    files = find_day_files(input_dir, dataset_name)
 
     print(f"\n=== Merging dataset: {dataset_name} ===")
-    print(f"Looking for files matching: {pattern}")
+    print(f"Looking for daily files under: {os.path.join(input_dir, dataset_name)}")
     print(f"Detected {len(files)} files.")
 
     if not files:
@@ -44,7 +43,7 @@ def merge_dataset(dataset_name: str) -> None:
 
     for f in tqdm(files, desc=f"Merging {dataset_name}", unit="file"):
         try:
-            df = pd.read_excel(f)
+            df = read_day_file(f)
             df["source_file"] = os.path.basename(f)
 
             # Append to CSV: write header only on first successful chunk
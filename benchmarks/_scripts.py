@@ -0,0 +1,16 @@
+"""Load the numbered pipeline scripts (not importable by name) as modules."""
+import importlib.util
+import sys
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+if str(REPO_DIR) not in sys.path:
+    sys.path.insert(0, str(REPO_DIR))
+
+
+def load_script(filename: str, module_name: str):
+    spec = importlib.util.spec_from_file_location(module_name, REPO_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
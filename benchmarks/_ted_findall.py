@@ -0,0 +1,48 @@
+"""
+The TED element locator 2b used before the single-pass one: one `.//`
+ElementPath scan per field. Kept for the benchmark and for the test that
+checks both locators find the same elements (tests/test_ted_locator.py).
+"""
+import xml.etree.ElementTree as ET
+
+
+def locate_ted_elements_findall(root: ET.Element, ns: dict) -> dict:
+    """Locate every element the TED record needs, one `.//` scan per field."""
+    return {
+        "date_pub": root.find(".//ted:REF_OJS/ted:DATE_PUB", ns),
+        "ds_date_dispatch": root.find(".//ted:CODIF_DATA/ted:DS_DATE_DISPATCH", ns),
+        "iso_country": root.find(".//ted:NOTICE_DATA/ted:ISO_COUNTRY", ns),
+        "notice_url": root.find(".//ted:NOTICE_DATA/ted:URI_LIST/ted:URI_DOC[@LG='EN']", ns),
+        "no_doc_ojs": root.find(".//ted:NOTICE_DATA/ted:NO_DOC_OJS", ns),
+        "original_cpv": root.find(".//ted:NOTICE_DATA/ted:ORIGINAL_CPV", ns),
+        "cpv_main": root.find(".//ted:OBJECT_CONTRACT/ted:CPV_MAIN/ted:CPV_CODE", ns),
+        "cpv_additional": root.findall(".//ted:OBJECT_DESCR/ted:CPV_ADDITIONAL/ted:CPV_CODE", ns),
+        "perf_nuts": root.findall(".//ted:NOTICE_DATA/n2021:PERFORMANCE_NUTS", ns)
+                     + root.findall(".//ted:NOTICE_DATA/n2016:PERFORMANCE_NUTS", ns),
+        "ca_ce_nuts_2021": root.find(".//ted:NOTICE_DATA/n2021:CA_CE_NUTS", ns),
+        "ca_ce_nuts_2016": root.find(".//ted:NOTICE_DATA/n2016:CA_CE_NUTS", ns),
+        "ti_doc": root.find(".//ted:TRANSLATION_SECTION/ted:ML_TITLES/ted:ML_TI_DOC[@LG='EN']", ns),
+        "ca_addr": root.find(".//ted:CONTRACTING_BODY/ted:ADDRESS_CONTRACTING_BODY", ns),
+        "obj_title": root.find(".//ted:OBJECT_CONTRACT/ted:TITLE/ted:P", ns),
+        "short_descr_contract": root.find(".//ted:OBJECT_CONTRACT/ted:SHORT_DESCR/ted:P", ns),
+        "short_descr_lot": root.find(".//ted:OBJECT_DESCR/ted:SHORT_DESCR/ted:P", ns),
+        "type_contract": root.find(".//ted:OBJECT_CONTRACT/ted:TYPE_CONTRACT", ns),
+        "val_total": root.find(".//ted:OBJECT_CONTRACT/ted:VAL_TOTAL", ns),
+        "est_total": root.find(".//ted:NOTICE_DATA/ted:VALUES/ted:VALUE[@TYPE='ESTIMATED_TOTAL']", ns),
+        "proc_total": root.find(".//ted:NOTICE_DATA/ted:VALUES/ted:VALUE[@TYPE='PROCUREMENT_TOTAL']", ns),
+        "aw_conclusion": root.find(
+            ".//ted:AWARD_CONTRACT/ted:AWARDED_CONTRACT/ted:DATE_CONCLUSION_CONTRACT", ns),
+        "aw_val_total": root.find(
+            ".//ted:AWARD_CONTRACT/ted:AWARDED_CONTRACT/ted:VALUES/ted:VAL_TOTAL", ns),
+        "nb_tenders": root.find(
+            ".//ted:AWARD_CONTRACT/ted:AWARDED_CONTRACT/ted:TENDERS/ted:NB_TENDERS_RECEIVED", ns),
+        "contractors": root.findall(
+            ".//ted:AWARD_CONTRACT/ted:AWARDED_CONTRACT/ted:CONTRACTORS/ted:CONTRACTOR", ns),
+        "td_document_type": root.find(".//ted:CODIF_DATA/ted:TD_DOCUMENT_TYPE", ns),
+        "nc_contract_nature": root.find(".//ted:CODIF_DATA/ted:NC_CONTRACT_NATURE", ns),
+        "pr_proc": root.find(".//ted:CODIF_DATA/ted:PR_PROC", ns),
+        "ac_award_crit": root.find(".//ted:CODIF_DATA/ted:AC_AWARD_CRIT", ns),
+        "ma_main_activities": root.find(".//ted:CODIF_DATA/ted:MA_MAIN_ACTIVITIES", ns),
+        "rp_regulation": root.find(".//ted:CODIF_DATA/ted:RP_REGULATION", ns),
+        "form_section": root.find(".//ted:FORM_SECTION", ns),
+    }
@@ -0,0 +1,122 @@
+"""
+Benchmark the HTML parsers used by the scrapers on search and dataset pages.
+
+    python benchmarks/bench_html_pages.py                        # synthetic GOV.UK-style pages
+    python benchmarks/bench_html_pages.py search.html dataset.html   # saved data.gov.uk pages
+
+Pages whose name contains "search" are timed with links(), all others with
+file_rows(). Every parser is also checked for identical output to "bs4",
+including on non-ASCII pages without a <meta charset>.
+"""
+import argparse
+import time
+from pathlib import Path
+
+import _scripts  # noqa: F401  (puts the repo root on sys.path)
+
+from pipeline.html_pages import PARSERS, get_parser
+
+# Roughly the size and shape of the GOV.UK header / footer chrome.
+_CHROME = "".join(
+    f'<li class="govuk-footer__list-item"><a class="govuk-footer__link" href="/help/{i}">Help {i}</a></li>'
+    for i in range(120)
+)
+
+
+def _page(body: str, charset: bool = True) -> str:
+    meta = '<meta charset="utf-8">' if charset else ""
+    return f"""<!DOCTYPE html><html lang="en"><head>{meta}<title>data.gov.uk</title>
+    <script>window.GOVUK = {{}};</script><link rel="stylesheet" href="/app.css"></head>
+    <body class="govuk-template__body"><header class="govuk-header"><nav><ul>{_CHROME}</ul></nav></header>
+    <main class="govuk-main-wrapper" id="main-content">{body}</main>
+    <footer class="govuk-footer"><ul>{_CHROME}</ul></footer></body></html>"""
+
+
+def synthetic_search_page(n_results: int = 20) -> str:
+    results = "".join(
+        f"""<div class="dgu-results__result"><h2 class="govuk-heading-m">
+        <a class="govuk-link" href="/dataset/{i:04d}-contracts-finder-notices">Contracts Finder Notices {i % 12 + 1:02d} {2014 + i % 12}</a></h2>
+        <dl class="dgu-metadata__box"><dt>Published by:</dt><dd>Crown Commercial Service</dd>
+        <dt>Last updated:</dt><dd>{i % 28 + 1} January 2024</dd></dl>
+        <p>Notices published on Contracts Finder &amp; related data, part {i}.</p></div>"""
+        for i in range(n_results)
+    )
+    return _page(f'<h1 class="govuk-heading-l">Search results</h1><div class="dgu-results">{results}</div>')
+
+
+def synthetic_dataset_page(n_files: int = 31) -> str:
+    rows = "".join(
+        f"""<tr class="govuk-table__row"><td class="govuk-table__cell">
+        <a class="govuk-link" href="https://example.com/cf/{i}.csv">Download Contracts Finder Notices day {i}, CSV, 12.{i} MB</a></td>
+        <td class="govuk-table__cell">CSV</td><td class="govuk-table__cell">{i % 28 + 1} January 2024</td></tr>"""
+        for i in range(n_files)
+    )
+    info = "".join(
+        f'<tr class="govuk-table__row"><th class="govuk-table__header">Field {i}</th><td class="govuk-table__cell">Value {i}</td></tr>'
+        for i in range(15)
+    )
+    return _page(f"""<h1 class="govuk-heading-l">Contracts Finder Notices 01 2024</h1>
+    <p class="govuk-body">Summary of the dataset.</p>
+    <table class="govuk-table"><thead class="govuk-table__head"><tr class="govuk-table__row">
+    <th>Link to the data</th><th>Format</th><th>Date added</th></tr></thead>
+    <tbody class="govuk-table__body">{rows}</tbody></table>
+    <table class="govuk-table dgu-table--additional-info"><tbody>{info}</tbody></table>""")
+
+
+def non_ascii_pages():
+    """Pages with accented names, dashes and £ and no <meta charset> (parity check only)."""
+    link = '<a class="govuk-link" href="/dataset/café">Café – Contracts £10k+ (Gwasanaethau Cymraeg: ŵ, ŷ)</a>'
+    return [
+        ("links", _page(f"<h2>{link}</h2>", charset=False)),
+        ("file_rows", _page(f"""<table><tbody class="govuk-table__body"><tr class="govuk-table__row">
+        <td>{link}</td><td>CSV – 1,2 Mo</td></tr></tbody></table>""", charset=False)),
+    ]
+
+
+def time_parser(parser, pages, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for kind, html in pages:
+            getattr(parser, kind)(html)
+        best = min(best, time.perf_counter() - start)
+    return len(pages) / best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("pages", nargs="*", help="saved HTML pages (default: synthetic pages)")
+    ap.add_argument("--copies", type=int, default=50, help="synthetic pages of each kind")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    if args.pages:
+        corpora = [(
+            "saved pages",
+            [("links" if "search" in Path(p).name.lower() else "file_rows", Path(p).read_text(encoding="utf-8"))
+             for p in args.pages],
+        )]
+    else:
+        corpora = [
+            ("search pages", [("links", synthetic_search_page())] * args.copies),
+            ("dataset pages", [("file_rows", synthetic_dataset_page())] * args.copies),
+        ]
+
+    reference = get_parser("bs4")
+    print(f"{'corpus':<16} {'parser':<9} {'pages/s':>9} {'vs bs4':>7}")
+    for label, pages in corpora:
+        checked = pages if args.pages else pages[:1] + non_ascii_pages()
+        for kind, html in checked:
+            expected = getattr(reference, kind)(html)
+            for name in PARSERS:
+                got = getattr(get_parser(name), kind)(html)
+                assert got == expected, f"{name} disagrees with bs4 on {label}"
+
+        base = time_parser(reference, pages, args.repeat)
+        for name in PARSERS:
+            rate = base if name == "bs4" else time_parser(get_parser(name), pages, args.repeat)
+            print(f"{label:<16} {name:<9} {rate:>9.0f} {rate / base:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
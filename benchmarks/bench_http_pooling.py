@@ -0,0 +1,98 @@
+"""
+Benchmark requests/second against a local HTTPS stand-in, with and without
+connection pooling (plain requests.get vs the shared pipeline session).
+
+    python benchmarks/bench_http_pooling.py [--requests 500] [--workers 1 8]
+
+Needs the openssl command-line tool to create a throwaway self-signed certificate.
+"""
+import argparse
+import http.server
+import multiprocessing
+import os
+import ssl
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import _scripts  # noqa: F401  (puts the repo root on sys.path)
+import requests
+
+from pipeline.session import make_session
+
+BODY = b'{"uri": "https://example.com/notice", "releases": []}' * 20
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(cert: str, key: str, port_queue):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert, key)
+    server.socket = ctx.wrap_socket(server.socket, server_side=True)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def start_https_server(tmp_dir: str):
+    """Start the stand-in in its own process (so it does not share our GIL)."""
+    cert = os.path.join(tmp_dir, "cert.pem")
+    key = os.path.join(tmp_dir, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+         "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    port_queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_serve, args=(cert, key, port_queue), daemon=True)
+    proc.start()
+    return proc, f"https://127.0.0.1:{port_queue.get(timeout=30)}/", cert
+
+
+def run(get, url: str, n: int, workers: int) -> float:
+    start = time.perf_counter()
+    if workers <= 1:
+        for _ in range(n):
+            get(url).raise_for_status()
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for resp in pool.map(lambda _: get(url), range(n)):
+                resp.raise_for_status()
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=500)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 8])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server, url, cert = start_https_server(tmp)
+        print(f"{'workers':>7} {'requests.get/s':>15} {'pooled session/s':>17} {'speed-up':>9}")
+        for workers in args.workers:
+            unpooled = run(lambda u: requests.get(u, verify=cert, timeout=(5, 60)), url, args.requests, workers)
+            session = make_session(pool_size=workers, rate_limit=None)
+            pooled = run(lambda u: session.get(u, verify=cert), url, args.requests, workers)
+            session.close()
+            print(f"{workers:>7} {unpooled:>15.0f} {pooled:>17.0f} {pooled / unpooled:>8.1f}x")
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
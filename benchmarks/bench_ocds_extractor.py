@@ -0,0 +1,158 @@
+"""
+Benchmark the 2a OCDS flattening: the hand-written build_record of the last
+commit before pipeline/ocds_fields.py (read from git history) vs the
+table-driven FieldExtractor that 2a's build_record uses now.
+
+    python benchmarks/bench_ocds_extractor.py                    # synthetic release packages
+    python benchmarks/bench_ocds_extractor.py notices/*.json     # saved Contracts Finder OCDS documents
+    python benchmarks/bench_ocds_extractor.py --baseline <rev>    # another baseline commit
+
+Both implementations are also checked for identical records on every package.
+Rounds alternate between the two, and the median per-round ratio is reported,
+so a noisy machine affects both sides alike.
+"""
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from _scripts import REPO_DIR, load_script
+
+SCRIPT = "2a_extract_contracts_finder.py"
+
+
+def _documents(rng, kind: str, n: int):
+    return [
+        {"id": f"{kind}-{i}", "documentType": kind if i == 0 else "other",
+         "description": f"{kind} document {i}", "url": f"https://example.com/{kind}/{i}",
+         "datePublished": "2021-01-04T10:00:00Z", "dateModified": "2021-01-05T10:00:00Z",
+         "format": "text/html", "language": "en"}
+        for i in range(n)
+    ]
+
+
+def _party(i: int, roles):
+    return {
+        "id": f"GB-PARTY-{i}", "name": f"Party {i}", "roles": roles,
+        "identifier": {"legalName": f"Party {i} Ltd", "scheme": "GB-COH", "id": f"{i:08d}"},
+        "address": {"streetAddress": f"{i} High Street", "locality": "Leeds",
+                    "postalCode": "LS1 1AA", "countryName": "England"},
+        "contactPoint": {"name": "Procurement", "email": "p@example.com", "telephone": "0113"},
+        "details": {"url": f"https://example.com/p/{i}", "scale": "sme", "vcse": False},
+    }
+
+
+def synthetic_package(rng: random.Random, n_suppliers: int) -> dict:
+    """A Contracts Finder-shaped award notice with n_suppliers supplier parties."""
+    parties = [_party(0, ["buyer"])] + [_party(i, ["supplier"]) for i in range(1, n_suppliers + 1)]
+    items = [
+        {"id": str(i), "deliveryAddresses": [{"postalCode": f"LS{i} 1AA", "region": "Yorkshire",
+                                              "countryName": "England"}]}
+        for i in range(rng.randint(1, 3))
+    ]
+    release = {
+        "ocid": "ocds-b5fd17-0001", "id": "rel-1", "title": "Facilities management", "language": "en",
+        "date": "2021-01-04T10:00:00Z", "tag": ["award"], "initiationType": "tender",
+        "planning": {"milestones": [], "documents": []},
+        "tender": {
+            "id": "t-1", "title": "Facilities management", "description": "Cleaning and security " * 20,
+            "status": "complete", "mainProcurementCategory": "services",
+            "value": {"amount": rng.random() * 1e6, "currency": "GBP"},
+            "classification": {"scheme": "CPV", "id": "79710000", "description": "Security services"},
+            "additionalClassifications": [{"id": "90910000", "description": "Cleaning services"}],
+            "documents": _documents(rng, "tenderNotice", rng.randint(1, 4)), "items": items,
+            "datePublished": "2020-11-01T10:00:00Z", "tenderPeriod": {"endDate": "2020-12-01T10:00:00Z"},
+            "contractPeriod": {"startDate": "2021-02-01", "endDate": "2024-01-31"},
+            "procurementMethod": "open", "suitability": {"sme": True, "vcse": False},
+        },
+        "buyer": {"id": "GB-PARTY-0", "name": "Party 0"},
+        "parties": parties,
+        "awards": [{
+            "id": "a-1", "status": "active", "date": "2021-01-01", "datePublished": "2021-01-04",
+            "value": {"amount": rng.random() * 1e6, "currency": "GBP"},
+            "contractPeriod": {"startDate": "2021-02-01", "endDate": "2024-01-31"},
+            "suppliers": [{"id": p["id"], "name": p["name"]} for p in parties[1:]],
+            "documents": _documents(rng, "awardNotice", rng.randint(1, 3)),
+        }],
+    }
+    return {
+        "uri": "https://www.contractsfinder.service.gov.uk/Published/Notice/releases/1.json",
+        "publishedDate": "2021-01-04T10:00:00Z", "version": "1.1", "extensions": [],
+        "publisher": {"name": "Crown Commercial Service", "scheme": "GB-GOR", "uid": "PC390", "uri": ""},
+        "license": "http://www.nationalarchives.gov.uk/doc/open-government-licence/version/3/",
+        "publicationPolicy": "https://www.gov.uk/contracts-finder", "releases": [release],
+    }
+
+
+def baseline_rev() -> str:
+    """The parent of the commit that added pipeline/ocds_fields.py."""
+    added = subprocess.run(
+        ["git", "log", "--diff-filter=A", "--format=%H", "--", "pipeline/ocds_fields.py"],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.split()
+    if not added:
+        raise SystemExit("pipeline/ocds_fields.py not found in git history; pass --baseline")
+    return added[-1] + "^"
+
+
+def load_baseline(rev: str):
+    """2a as of rev, loaded from a temporary copy (its pipeline imports resolve to the working tree)."""
+    source = subprocess.run(["git", "show", f"{rev}:{SCRIPT}"], cwd=REPO_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / SCRIPT
+        path.write_text(source, encoding="utf-8")
+        return load_script(str(path), "extract_contracts_finder_baseline")
+
+
+def time_builder(build, packages) -> float:
+    start = time.perf_counter()
+    for i, data in enumerate(packages):
+        build(data, "bench.csv", i, "")
+    return time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("files", nargs="*", help="saved OCDS release package JSON files (default: synthetic)")
+    ap.add_argument("--packages", type=int, default=2000, help="synthetic packages per supplier count")
+    ap.add_argument("--rounds", type=int, default=15, help="alternating timing rounds per corpus")
+    ap.add_argument("--baseline", help="commit to compare against (default: before ocds_fields.py)")
+    args = ap.parse_args()
+
+    rev = args.baseline or baseline_rev()
+    baseline = load_baseline(rev)
+    extractor = load_script(SCRIPT, "extract_contracts_finder")
+    print(f"baseline: {SCRIPT} at {rev}")
+
+    if args.files:
+        corpora = [("saved packages", [json.loads(Path(p).read_text(encoding="utf-8")) for p in args.files])]
+    else:
+        rng = random.Random(0)
+        corpora = [
+            (f"{n} supplier(s)", [synthetic_package(rng, n) for _ in range(args.packages)])
+            for n in (0, 1, 5, 20)
+        ]
+
+    print(f"{'corpus':<16} {'packages':>9} {'inline/s':>10} {'table/s':>11} {'speed-up':>9}")
+    for label, packages in corpora:
+        for i, data in enumerate(packages):
+            a = baseline.build_record(data, "bench.csv", i, "")
+            b = extractor.build_record(data, "bench.csv", i, "")
+            if a != b:
+                diff = sorted(k for k in a if a[k] != b.get(k))
+                raise SystemExit(f"Output mismatch in {label}, package {i}: {diff}")
+        before, after = [], []
+        for _ in range(args.rounds):
+            before.append(time_builder(baseline.build_record, packages))
+            after.append(time_builder(extractor.build_record, packages))
+        ratio = statistics.median(b / a for b, a in zip(before, after))
+        print(f"{label:<16} {len(packages):>9} {len(packages) / min(before):>10.0f} "
+              f"{len(packages) / min(after):>11.0f} {ratio:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
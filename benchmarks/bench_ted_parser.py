@@ -0,0 +1,128 @@
+"""
+Benchmark the TED parser: one `.//` scan per field (the old locator, in
+_ted_findall.py) vs the single-pass locator 2b uses.
+
+    python benchmarks/bench_ted_parser.py                     # synthetic multi-lot F03 notices
+    python benchmarks/bench_ted_parser.py path/to/day.zip     # TED members of a real FATS ZIP
+
+Both locators are also checked for identical elements and parse_ted_style_xml
+output on every notice.
+"""
+import argparse
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+
+from _scripts import load_script
+from _ted_findall import locate_ted_elements_findall
+
+TED_NS = "http://publications.europa.eu/resource/schema/ted/R2.0.9/publication"
+NUTS_NS = "http://enotice.service.gov.uk/resource/schema/ted/2021/nuts"
+
+
+def synthetic_notice(n_lots: int) -> str:
+    lots = "".join(
+        f"""<OBJECT_DESCR ITEM="{i}"><TITLE><P>Lot {i}</P></TITLE>
+        <CPV_ADDITIONAL><CPV_CODE CODE="{72000000 + i}"/></CPV_ADDITIONAL>
+        <n2021:NUTS CODE="UKI"/><SHORT_DESCR><P>Lot {i} description</P></SHORT_DESCR></OBJECT_DESCR>"""
+        for i in range(n_lots)
+    )
+    awards = "".join(
+        f"""<AWARD_CONTRACT ITEM="{i}"><LOT_NO>{i}</LOT_NO><AWARDED_CONTRACT>
+        <DATE_CONCLUSION_CONTRACT>2021-01-0{i % 9 + 1}</DATE_CONCLUSION_CONTRACT>
+        <TENDERS><NB_TENDERS_RECEIVED>{i % 7}</NB_TENDERS_RECEIVED></TENDERS>
+        <CONTRACTORS><CONTRACTOR><ADDRESS_CONTRACTOR><OFFICIALNAME>Supplier {i}</OFFICIALNAME>
+        <TOWN>Leeds</TOWN></ADDRESS_CONTRACTOR></CONTRACTOR></CONTRACTORS>
+        <VALUES><VAL_TOTAL CURRENCY="GBP">{1000 * i}</VAL_TOTAL></VALUES></AWARDED_CONTRACT></AWARD_CONTRACT>"""
+        for i in range(n_lots)
+    )
+    return f"""<TED_EXPORT xmlns="{TED_NS}" xmlns:n2021="{NUTS_NS}" DOC_ID="000001-2021" EDITION="2021001">
+    <CODED_DATA_SECTION><REF_OJS><DATE_PUB>20210104</DATE_PUB></REF_OJS>
+    <NOTICE_DATA><NO_DOC_OJS>2021/S 001-000001</NO_DOC_OJS><ISO_COUNTRY VALUE="UK"/>
+    <ORIGINAL_CPV CODE="72000000"/><n2021:PERFORMANCE_NUTS CODE="UKI"/></NOTICE_DATA>
+    <CODIF_DATA><DS_DATE_DISPATCH>20201230</DS_DATE_DISPATCH><TD_DOCUMENT_TYPE CODE="7"/></CODIF_DATA>
+    </CODED_DATA_SECTION>
+    <FORM_SECTION><F03_2014 FORM="F03"><CONTRACTING_BODY><ADDRESS_CONTRACTING_BODY>
+    <OFFICIALNAME>Council</OFFICIALNAME><TOWN>London</TOWN><COUNTRY VALUE="UK"/></ADDRESS_CONTRACTING_BODY>
+    </CONTRACTING_BODY><OBJECT_CONTRACT><TITLE><P>Framework</P></TITLE>
+    <CPV_MAIN><CPV_CODE CODE="72000000"/></CPV_MAIN><TYPE_CONTRACT CTYPE="SERVICES"/>
+    {lots}</OBJECT_CONTRACT>{awards}</F03_2014></FORM_SECTION></TED_EXPORT>"""
+
+
+def load_zip_notices(zip_path: str):
+    docs = []
+    with zipfile.ZipFile(zip_path) as z:
+        for name in z.namelist():
+            if name.lower().endswith(".xml"):
+                docs.append(z.read(name))
+    return docs
+
+
+def parse_with(extractor, locate, root) -> dict:
+    """parse_ted_style_xml(root) with locate in place of 2b's own locator."""
+    own = extractor._locate_ted_elements
+    extractor._locate_ted_elements = locate
+    try:
+        return extractor.parse_ted_style_xml(root)
+    finally:
+        extractor._locate_ted_elements = own
+
+
+def time_parser(extractor, roots, locate, repeat: int) -> float:
+    own = extractor._locate_ted_elements
+    extractor._locate_ted_elements = locate
+    best = float("inf")
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for root in roots:
+                extractor.parse_ted_style_xml(root)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        extractor._locate_ted_elements = own
+    return len(roots) / best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("zip", nargs="?", help="FATS day ZIP to benchmark on (default: synthetic notices)")
+    ap.add_argument("--notices", type=int, default=200, help="synthetic notices per lot size")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    extractor = load_script("2b_extract_find_a_tender_XMLs.py", "extract_find_a_tender")
+
+    if args.zip:
+        roots = []
+        for doc in load_zip_notices(args.zip):
+            try:
+                roots.append(ET.fromstring(doc))
+            except ET.ParseError:
+                continue  # 2b records these as parse errors; nothing to locate
+        roots = [r for r in roots if r.tag.startswith("{")]  # TED-style members only
+        corpora = [(Path(args.zip).name, roots)]
+    else:
+        corpora = [
+            (f"{n_lots} lot(s)", [ET.fromstring(synthetic_notice(n_lots))] * args.notices)
+            for n_lots in (1, 10, 50, 200)
+        ]
+
+    print(f"{'corpus':<28} {'notices':>8} {'findall/s':>12} {'single-pass/s':>14} {'speed-up':>9}")
+    single_pass = extractor._locate_ted_elements
+    for label, roots in corpora:
+        for root in roots:
+            ns = dict(extractor._NS_NUTS, ted=root.tag[1:root.tag.index("}")])
+            if locate_ted_elements_findall(root, ns) != single_pass(root, ns):
+                raise SystemExit(f"Located elements differ in {label}")
+            a = parse_with(extractor, locate_ted_elements_findall, root)
+            b = extractor.parse_ted_style_xml(root)
+            if a != b:
+                raise SystemExit(f"Output mismatch in {label}: {a} != {b}")
+        before = time_parser(extractor, roots, locate_ted_elements_findall, args.repeat)
+        after = time_parser(extractor, roots, single_pass, args.repeat)
+        print(f"{label:<28} {len(roots):>8} {before:>12.0f} {after:>14.0f} {after / before:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark reading FATS ZIP members in 2b: decode to str then ET.fromstring
+(the old path) vs parsing the member's raw bytes vs feeding the parser from
+the ZIP stream. 2b reads members whole as bytes and streams those over
+STREAM_MEMBER_BYTES.
+
+    python benchmarks/bench_xml_members.py                     # synthetic F03 notices, a few over 1 MB
+    python benchmarks/bench_xml_members.py path/to/day.zip     # every XML member of a real FATS ZIP
+
+Reports members/second and the traced peak memory of one member's parse
+(largest member, and the mean). The old path and 2b are also checked for identical
+rows on every member.
+"""
+import argparse
+import io
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+
+from _scripts import load_script
+from bench_ted_parser import synthetic_notice
+
+
+def synthetic_zip(n_notices: int) -> io.BytesIO:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for i in range(n_notices):
+            n_lots = 2000 if i % 50 == 0 else 1 + (i * 37) % 200
+            z.writestr(f"notice_{i:06d}.xml", synthetic_notice(n_lots).encode("utf-8"))
+    buf.seek(0)
+    return buf
+
+
+def decoded_root(z: zipfile.ZipFile, name: str):
+    """The pre-streaming path: whole member as bytes, decoded, then parsed as str."""
+    xml_bytes = z.read(name)
+    try:
+        xml_str = xml_bytes.decode("utf-8")
+    except UnicodeDecodeError:
+        xml_str = xml_bytes.decode("latin-1", errors="replace")
+    return ET.fromstring(xml_str)
+
+
+def bytes_root(z: zipfile.ZipFile, name: str):
+    return ET.fromstring(z.read(name))
+
+
+def stream_root(z: zipfile.ZipFile, name: str):
+    with z.open(name) as f:
+        return ET.parse(f).getroot()
+
+
+def time_reader(read_root, z, names, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for name in names:
+            try:
+                read_root(z, name)
+            except ET.ParseError:
+                pass
+        best = min(best, time.perf_counter() - start)
+    return len(names) / best
+
+
+def peak_memory(read_root, z, names):
+    """(largest, mean) traced peak in bytes while parsing one member."""
+    peaks = []
+    tracemalloc.start()
+    for name in names:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        try:
+            root = read_root(z, name)
+        except ET.ParseError:
+            root = None
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        del root
+    tracemalloc.stop()
+    return max(peaks), sum(peaks) / len(peaks)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("zip", nargs="?", help="FATS day ZIP to benchmark on (default: synthetic notices)")
+    ap.add_argument("--notices", type=int, default=300, help="synthetic notices in the ZIP")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    extractor = load_script("2b_extract_find_a_tender_XMLs.py", "extract_find_a_tender")
+
+    source = args.zip or synthetic_zip(args.notices)
+    label = Path(args.zip).name if args.zip else f"synthetic ({args.notices})"
+    with zipfile.ZipFile(source) as z:
+        names = [n for n in z.namelist() if n.lower().endswith(".xml")]
+        size = sum(z.getinfo(n).file_size for n in names)
+
+        for name in names:
+            a = extractor._parse_member(z, name, "bench.zip")
+            try:
+                b = extractor.parse_find_a_tender_root(decoded_root(z, name))
+                b["parse_error"] = None
+            except Exception as e:
+                b = {"doc_id": None, "parse_error": str(e)}
+            b.update(source_xml_file=name, source_zip="bench.zip")
+            if a != b:
+                print(f"Output differs for {name} (declared encoding honoured?)")
+
+        print(f"{label}: {len(names)} XML members, {size / 1e6:.1f} MB uncompressed")
+        print(f"{'path':<16} {'members/s':>10} {'peak max MB':>12} {'peak mean KB':>13}")
+        readers = (("decode + str", decoded_root), ("bytes", bytes_root), ("stream", stream_root),
+                   ("2b _member_root", extractor._member_root))
+        for path, read_root in readers:
+            rate = time_reader(read_root, z, names, args.repeat)
+            largest, mean = peak_memory(read_root, z, names)
+            print(f"{path:<16} {rate:>10.0f} {largest / 1e6:>12.2f} {mean / 1e3:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
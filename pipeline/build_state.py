@@ -0,0 +1,97 @@
+"""
+Make-style up-to-date checks for the extraction stages (2a / 2b).
+
+For every output file the build state records what it was built from:
+the SHA-256 of the input file (the day's CSV or ZIP), the extractor code
+version and the mapping version (column mapping + output schema). A day
+whose outputs all exist and were built from the same three is skipped.
+
+Input hashes are cached by (size, mtime), so checking an unchanged input
+is a stat() rather than a re-read of the file.
+"""
+import hashlib
+import json
+import os
+import time
+
+from pipeline.sqlite_store import SqliteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outputs (
+    output          TEXT PRIMARY KEY,
+    input_hash      TEXT NOT NULL,
+    code_version    TEXT NOT NULL,
+    mapping_version TEXT NOT NULL,
+    built_at        REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS inputs (
+    path     TEXT PRIMARY KEY,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256   TEXT NOT NULL
+);
+"""
+
+
+def schema_version(schema: dict) -> str:
+    """Short fingerprint of an output schema ({column: type}, ordered)."""
+    return hashlib.sha256(json.dumps(list(schema.items())).encode("utf-8")).hexdigest()[:12]
+
+
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class BuildState(SqliteStore):
+    """SQLite-backed record of what each output was built from; safe to share between threads."""
+
+    def __init__(self, path: str):
+        super().__init__(path, _SCHEMA)
+
+    def input_hash(self, path: str) -> str:
+        """SHA-256 of the file at path, re-read only when its size or mtime changed."""
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, sha256 FROM inputs WHERE path = ?", (key,)
+            ).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        digest = _sha256_file(key)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO inputs (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                (key, st.st_size, st.st_mtime_ns, digest),
+            )
+            self._conn.commit()
+        return digest
+
+    def is_current(self, outputs, input_hash: str, code_version: str, mapping_version: str) -> bool:
+        """True when every output exists and was last built from exactly these versions."""
+        outputs = [os.path.abspath(p) for p in outputs]
+        if not outputs or not all(os.path.exists(p) for p in outputs):
+            return False
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT output, input_hash, code_version, mapping_version FROM outputs "
+                f"WHERE output IN ({', '.join('?' * len(outputs))})",
+                outputs,
+            ).fetchall()
+        wanted = (input_hash, code_version, mapping_version)
+        return len(rows) == len(outputs) and all(tuple(r[1:]) == wanted for r in rows)
+
+    def record(self, outputs, input_hash: str, code_version: str, mapping_version: str):
+        """Record that outputs were just built from these versions."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO outputs "
+                "(output, input_hash, code_version, mapping_version, built_at) VALUES (?, ?, ?, ?, ?)",
+                [(os.path.abspath(p), input_hash, code_version, mapping_version, now) for p in outputs],
+            )
+            self._conn.commit()
@@ -0,0 +1,74 @@
+"""
+Dataset discovery through data.gov.uk's CKAN action API (1a / 1b).
+
+Instead of one HTML search page plus one dataset page per month, a whole
+dataset series ("Contracts Finder Notices MM YYYY", "UK Public Procurement
+Notices - Month YYYY", ...) is listed with a few paged package_search
+calls. Each package comes back as JSON with its resources (URL, format,
+size, name); package_show is only used when a search hit arrives without
+its full resource list.
+"""
+from pipeline.session import get_session
+
+CKAN_API_URL = "https://data.gov.uk/api/action"
+PAGE_SIZE = 1000  # CKAN's maximum rows per package_search call
+
+
+class CkanError(Exception):
+    """The API answered, but not with a successful CKAN result."""
+
+
+def ckan_action(api_url: str, action: str, params: dict, timeout=(5, 60)):
+    """Call one CKAN action and return its "result"; raises RequestException / CkanError."""
+    resp = get_session().get(f"{api_url.rstrip('/')}/{action}", params=params, timeout=timeout)
+    resp.raise_for_status()
+    try:
+        body = resp.json()
+    except ValueError as e:
+        raise CkanError(f"{action}: response is not JSON ({e})") from e
+    if not body.get("success"):
+        raise CkanError(f"{action}: {body.get('error')}")
+    return body["result"]
+
+
+def package_search(api_url: str, query: str, fq: str = None, page_size: int = PAGE_SIZE):
+    """Every package matching query (and the optional fq filter), following pagination."""
+    packages = []
+    start = 0
+    while True:
+        params = {"q": query, "rows": page_size, "start": start}
+        if fq:
+            params["fq"] = fq
+        result = ckan_action(api_url, "package_search", params)
+        batch = result.get("results") or []
+        packages.extend(batch)
+        start += len(batch)
+        if not batch or start >= result.get("count", 0):
+            return packages
+
+
+def package_show(api_url: str, package_id: str):
+    return ckan_action(api_url, "package_show", {"id": package_id})
+
+
+def package_resources(api_url: str, package: dict):
+    """A package's resources, fetching the full package when the search hit was truncated."""
+    resources = package.get("resources")
+    if resources is None or len(resources) < package.get("num_resources", 0):
+        resources = package_show(api_url, package.get("id") or package["name"]).get("resources")
+    return resources or []
+
+
+def find_series_packages(api_url: str, query: str, titles: dict, fq: str = None):
+    """
+    Search once for a dataset series and match packages by exact title.
+
+    titles maps the expected title to a key (e.g. (year, month)); returns
+    {key: [(package, resources), ...]} for the titles that were found.
+    """
+    found = {}
+    for package in package_search(api_url, query, fq=fq):
+        key = titles.get((package.get("title") or "").strip())
+        if key is not None:
+            found.setdefault(key, []).append((package, package_resources(api_url, package)))
+    return found
@@ -0,0 +1,204 @@
+"""
+Concurrent crawl engine for the scrapers (1a / 1b).
+
+The scrapers walk (year, month) pairs: search page -> matching dataset
+pages -> files on each dataset page (or, when the CKAN API already listed
+the files, just the downloads). MonthCrawler runs all of those steps as
+asyncio tasks, so searches, dataset pages and downloads for different
+months overlap, while a semaphore per host caps how many requests are in
+flight against any one server (data.gov.uk, S3, Dropbox, ...).
+
+The HTTP work itself stays in the existing blocking helpers (fetch_page,
+pipeline.downloads.download_file, which keeps resume and manifest
+support), run on a thread pool; asyncio only schedules them. Everything
+site-specific (URLs, HTML parsing, where files go) is passed in as
+functions, so the engine can be pointed at a local mock server.
+"""
+import asyncio
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+from pipeline.downloads import DownloadError
+
+PER_HOST_LIMIT = 4
+
+# One file to fetch from a dataset page: display name, URL, local path and
+# the size the catalogue reports (None when unknown; informational only).
+FileLink = namedtuple("FileLink", ["name", "url", "path", "size"], defaults=(None,))
+
+# Outcome of one (year, month): counts of datasets found and files handled.
+MonthResult = namedtuple("MonthResult", ["year", "month", "datasets", "downloaded", "unchanged", "failed", "error"])
+
+
+class HostLimiter:
+    """Per-host asyncio semaphores, created on first use."""
+
+    def __init__(self, per_host: int = PER_HOST_LIMIT):
+        self.per_host = max(per_host, 1)
+        self._sems = {}
+
+    def __call__(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        sem = self._sems.get(host)
+        if sem is None:
+            sem = self._sems[host] = asyncio.Semaphore(self.per_host)
+        return sem
+
+
+class MonthCrawler:
+    """
+    Crawl (year, month) pairs concurrently.
+
+    fetch_page(url) -> html and download(file_link) -> DownloadResult are
+    blocking; the other callables are pure:
+      build_search_url(year, month), build_target_text(year, month),
+      build_download_dir(year, month),
+      find_dataset_links(html, target_text) -> [{"title", "url"}],
+      find_file_links(html, download_dir) -> [FileLink].
+    """
+
+    def __init__(self, *, fetch_page, download, build_search_url, build_target_text,
+                 build_download_dir, find_dataset_links, find_file_links,
+                 per_host: int = PER_HOST_LIMIT, max_threads: int = None):
+        self.fetch_page = fetch_page
+        self.download = download
+        self.build_search_url = build_search_url
+        self.build_target_text = build_target_text
+        self.build_download_dir = build_download_dir
+        self.find_dataset_links = find_dataset_links
+        self.find_file_links = find_file_links
+        self.per_host = per_host
+        # Enough threads for every host to use its full quota at once.
+        self.max_threads = max_threads or per_host * 4
+
+    async def _call(self, url, fn, *args):
+        async with self._limit(url):
+            return await self._loop.run_in_executor(self._executor, fn, *args)
+
+    async def _download(self, link: FileLink):
+        try:
+            result = await self._call(link.url, self.download, link)
+        except (requests.exceptions.RequestException, DownloadError, OSError) as e:
+            print(f"  !!! Failed to download {link.url}: {e}")
+            return "failed"
+        return "downloaded" if result.status == "downloaded" else "unchanged"
+
+    async def _crawl_dataset(self, dataset: dict, download_dir: str):
+        html = await self._call(dataset["url"], self.fetch_page, dataset["url"])
+        return await self._download_all(self.find_file_links(html, download_dir))
+
+    async def _download_all(self, links):
+        return await asyncio.gather(*(self._download(link) for link in links))
+
+    async def _crawl_month(self, year: int, month: int) -> MonthResult:
+        if self._month_files is not None:
+            # Already discovered (CKAN API): only the downloads are left.
+            datasets = self._month_files.get((year, month), [])
+            crawls = (self._download_all(ds["links"]) for ds in datasets)
+        else:
+            search_url = self.build_search_url(year, month)
+            try:
+                html = await self._call(search_url, self.fetch_page, search_url)
+            except RuntimeError as e:
+                return MonthResult(year, month, 0, 0, 0, 0, f"search fetch failed ({e})")
+
+            datasets = self.find_dataset_links(html, self.build_target_text(year, month))
+            download_dir = self.build_download_dir(year, month)
+            crawls = (self._crawl_dataset(ds, download_dir) for ds in datasets)
+
+        outcomes = await asyncio.gather(*crawls, return_exceptions=True)
+
+        statuses, errors = [], []
+        for ds, outcome in zip(datasets, outcomes):
+            if isinstance(outcome, BaseException):
+                errors.append(f"{ds['url']}: {outcome}")
+            else:
+                statuses.extend(outcome)
+        return MonthResult(
+            year, month, len(datasets),
+            statuses.count("downloaded"), statuses.count("unchanged"), statuses.count("failed"),
+            "; ".join(errors) or None,
+        )
+
+    async def crawl(self, jobs, month_files=None):
+        """
+        Crawl every (year, month) in jobs; returns MonthResults in completion
+        order. month_files ({(year, month): [{"title", "url", "links"}]})
+        skips the search and dataset pages for months discovered up front.
+        """
+        self._month_files = month_files
+        self._loop = asyncio.get_running_loop()
+        self._limit = HostLimiter(self.per_host)
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_threads) as self._executor:
+            tasks = [asyncio.ensure_future(self._crawl_month(y, m)) for y, m in jobs]
+            for done in asyncio.as_completed(tasks):
+                result = await done
+                results.append(result)
+                print_month_result(result, len(results), len(tasks))
+        return results
+
+    def run(self, jobs, month_files=None):
+        return asyncio.run(self.crawl(jobs, month_files))
+
+
+def month_ok(result: MonthResult) -> bool:
+    """True when nothing in the month failed (a month with no dataset is fine)."""
+    return not result.error and not result.failed
+
+
+def months_from(jobs, watermark, lookback: int = 0):
+    """
+    The (year, month) jobs at or after watermark minus lookback months;
+    all jobs when there is no watermark yet.
+    """
+    if watermark is None:
+        return list(jobs)
+    index = watermark[0] * 12 + (watermark[1] - 1) - max(lookback, 0)
+    start = (index // 12, index % 12 + 1)
+    return [job for job in jobs if tuple(job) >= start]
+
+
+def advance_watermark(results, watermark=None):
+    """
+    New watermark after a crawl: the latest month with a dataset, among the
+    months crawled before the first one that had a failure. Never moves back.
+    """
+    for result in sorted(results, key=lambda r: (r.year, r.month)):
+        if not month_ok(result):
+            break
+        if result.datasets and (watermark is None or (result.year, result.month) > watermark):
+            watermark = (result.year, result.month)
+    return watermark
+
+
+def load_watermark(manifest, key: str = "watermark"):
+    """Saved (year, month) watermark from the manifest's crawl state, or None."""
+    value = manifest.get_state(key)
+    if not value:
+        return None
+    year, month = value.split("-")
+    return int(year), int(month)
+
+
+def save_watermark(manifest, watermark, key: str = "watermark"):
+    if watermark is not None:
+        manifest.set_state(key, f"{watermark[0]:04d}-{watermark[1]:02d}")
+
+
+def print_month_result(result: MonthResult, done: int, total: int):
+    label = f"[{done}/{total}] {result.year}-{result.month:02d}"
+    if result.error and not result.datasets:
+        print(f"{label}: skipped, {result.error}")
+        return
+    if not result.datasets:
+        print(f"{label}: no dataset found")
+        return
+    line = (f"{label}: {result.datasets} dataset(s), {result.downloaded} downloaded, "
+            f"{result.unchanged} unchanged, {result.failed} failed")
+    if result.error:
+        line += f" ({result.error})"
+    print(line)
@@ -0,0 +1,238 @@
+"""
+Streaming file downloads for the scrapers (1a / 1b).
+
+Files are streamed in fixed-size chunks to "<dest>.part" and only renamed
+onto dest once the byte count (and SHA-256, when the caller knows it) has
+been checked, so memory use does not depend on file size and an
+interrupted download never leaves a truncated file under the final name.
+
+If the connection drops mid-body, the partial file is kept together with
+the object's validators ("<dest>.part.json"). When the server advertises
+"Accept-Ranges: bytes", the next attempt (in this run or a later one) asks
+only for the missing bytes with a Range request guarded by If-Range, and
+checks the ETag / Last-Modified of the reply so that bytes from two
+different versions of the file are never stitched together.
+
+With a DownloadManifest (pipeline/manifest.py), a file already on disk is
+either skipped outright or revalidated with If-None-Match /
+If-Modified-Since, and only re-downloaded when the server says it changed.
+"""
+import hashlib
+import json
+import os
+from collections import namedtuple
+from time import sleep
+
+import requests
+
+from pipeline.ratelimit import backoff_delay
+from pipeline.session import get_session
+
+CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+# status: "downloaded", "not_modified" (HTTP 304) or "skipped" (manifest only)
+DownloadResult = namedtuple("DownloadResult", ["path", "size", "sha256", "status"])
+
+# Network failures after which the partial file is worth resuming
+_RESUMABLE_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.Timeout,
+)
+
+
+class DownloadError(Exception):
+    """The downloaded body failed verification (size or hash mismatch)."""
+
+
+def _expected_length(resp):
+    """Content-Length of the body as written to disk, when the server gives one."""
+    encoding = (resp.headers.get("Content-Encoding") or "identity").lower()
+    length = resp.headers.get("Content-Length")
+    if encoding != "identity" or not length or not length.isdigit():
+        return None
+    return int(length)
+
+
+def _content_range(resp):
+    """(start, total) from a 'Content-Range: bytes start-end/total' header, or (None, None)."""
+    value = resp.headers.get("Content-Range", "")
+    try:
+        _unit, spec = value.split(" ", 1)
+        span, total = spec.split("/", 1)
+        start = int(span.split("-", 1)[0])
+        return start, (int(total) if total != "*" else None)
+    except ValueError:
+        return None, None
+
+
+def _load_state(state_path: str, url: str):
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get("url") == url else None
+
+
+def _save_state(state_path: str, state: dict):
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+
+def _discard_partial(part_path: str, state_path: str):
+    for path in (part_path, state_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _hash_existing(part_path: str, sha, chunk_size: int) -> int:
+    size = 0
+    with open(part_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+            size += len(chunk)
+    return size
+
+
+def _attempt(session, url, part_path, state_path, headers, timeout, chunk_size, conditional=None):
+    """
+    One GET (ranged when a usable partial exists, otherwise conditional when
+    validators are given). Returns None on HTTP 304, else
+    (size, sha, total, etag, last_modified) where total is the full object
+    size reported by the server, if any.
+    """
+    state = _load_state(state_path, url)
+    have = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    validator = state and (state.get("etag") or state.get("last_modified"))
+    can_resume = bool(have and state and state.get("accept_ranges") and validator)
+
+    req_headers = dict(headers or {})
+    if can_resume:
+        req_headers["Range"] = f"bytes={have}-"
+        req_headers["If-Range"] = validator
+    elif conditional:
+        req_headers.update(conditional)
+
+    with session.get(url, headers=req_headers, timeout=timeout, stream=True) as resp:
+        if resp.status_code == 304 and conditional and not can_resume:
+            return None
+        if resp.status_code == 416 and can_resume:
+            # Nothing left to fetch (or the object shrank): start over next attempt.
+            _discard_partial(part_path, state_path)
+            raise requests.exceptions.ConnectionError(f"Range not satisfiable for {url}")
+        resp.raise_for_status()
+
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        sha = hashlib.sha256()
+
+        if resp.status_code == 206 and can_resume:
+            start, total = _content_range(resp)
+            same_object = (
+                start == have
+                and (not state.get("etag") or etag == state["etag"])
+                and (not state.get("last_modified") or last_modified == state["last_modified"])
+            )
+            if not same_object:
+                _discard_partial(part_path, state_path)
+                raise requests.exceptions.ConnectionError(f"Resumed object changed for {url}")
+            size = _hash_existing(part_path, sha, chunk_size)
+            etag, last_modified = state.get("etag"), state.get("last_modified")
+            mode = "ab"
+        else:
+            # Full body: either a fresh download or the server declined the range.
+            total = _expected_length(resp)
+            size = 0
+            mode = "wb"
+            _save_state(state_path, {
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "accept_ranges": resp.headers.get("Accept-Ranges", "").lower() == "bytes",
+                "total": total,
+            })
+
+        # Keep every byte that arrived before a drop: a short body is detected
+        # below (against the expected total) instead of inside urllib3, which
+        # would discard the last partial chunk.
+        resp.raw.enforce_content_length = False
+        with open(part_path, mode) as f:
+            for chunk in resp.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    f.write(chunk)
+                    sha.update(chunk)
+                    size += len(chunk)
+
+    if total is not None and size < total:
+        raise requests.exceptions.ChunkedEncodingError(
+            f"Connection dropped after {size} of {total} bytes for {url}"
+        )
+    return size, sha, total, etag, last_modified
+
+
+def download_file(url: str, dest_path: str, headers=None, timeout=(5, 120),
+                  expected_size=None, expected_sha256=None, chunk_size: int = CHUNK_SIZE,
+                  max_retries: int = 3, retry_wait: float = 2,
+                  manifest=None, skip_unchanged: bool = False, session=None):
+    """
+    Stream url into dest_path atomically and return a DownloadResult.
+
+    Dropped connections are retried up to max_retries times, resuming from
+    the partial file when the server supports ranges. With a manifest, a
+    file already recorded and present on disk is skipped (skip_unchanged)
+    or fetched with a conditional GET. Requests go through session
+    (default: the shared pipeline session). Raises
+    requests.exceptions.RequestException on HTTP/network errors and
+    DownloadError when the size or hash does not match.
+    """
+    session = session or get_session()
+    part_path = dest_path + ".part"
+    state_path = part_path + ".json"
+
+    conditional = None
+    entry = manifest.is_current(url, dest_path) if manifest is not None else None
+    if entry is not None:
+        if skip_unchanged:
+            return DownloadResult(dest_path, entry["size"], entry["sha256"], "skipped")
+        conditional = {}
+        if entry["etag"]:
+            conditional["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            conditional["If-Modified-Since"] = entry["last_modified"]
+
+    for attempt in range(1, max_retries + 1):
+        try:
+            result = _attempt(session, url, part_path, state_path, headers, timeout, chunk_size, conditional)
+            if result is None:
+                manifest.mark_checked(url)
+                return DownloadResult(dest_path, entry["size"], entry["sha256"], "not_modified")
+            size, sha, total, etag, last_modified = result
+            break
+        except _RESUMABLE_ERRORS as e:
+            if attempt == max_retries:
+                raise
+            print(f"      [Attempt {attempt}] Download interrupted for {url} ({e}), resuming...")
+            sleep(backoff_delay(attempt, base=retry_wait))
+        except requests.exceptions.RequestException:
+            # HTTP errors (404, 500, ...): the partial file is not worth keeping.
+            _discard_partial(part_path, state_path)
+            raise
+
+    try:
+        for label, expected in (("Content-Length", total), ("expected size", expected_size)):
+            if expected is not None and size != expected:
+                raise DownloadError(f"{label} mismatch for {url}: got {size} bytes, expected {expected}")
+        digest = sha.hexdigest()
+        if expected_sha256 and digest != expected_sha256.lower():
+            raise DownloadError(f"SHA-256 mismatch for {url}: got {digest}, expected {expected_sha256}")
+    except DownloadError:
+        _discard_partial(part_path, state_path)
+        raise
+
+    os.replace(part_path, dest_path)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    if manifest is not None:
+        manifest.record(url, dest_path, size, digest, etag=etag, last_modified=last_modified)
+    return DownloadResult(dest_path, size, digest, "downloaded")
@@ -0,0 +1,151 @@
+"""
+Link extraction from data.gov.uk search and dataset pages (1a / 1b).
+
+The scrapers only need two things from a page:
+  links(html)     -> [(text, href)] for every <a class="govuk-link">
+  file_rows(html) -> [(link_text, href, format_text)] for every
+                     <tr class="govuk-table__row"> in a
+                     <tbody class="govuk-table__body"> whose first cell holds
+                     a govuk-link and that has at least two cells.
+Text is whitespace-stripped per text node and joined, as BeautifulSoup's
+get_text(strip=True) does.
+
+Parsers:
+  "bs4"      full BeautifulSoup tree + CSS selectors (the original code path)
+  "strainer" BeautifulSoup with a SoupStrainer, so only the link / table
+             nodes are built
+  "lxml"     lxml.html tree + XPath, no Python objects for the rest of the page
+"""
+import re
+import threading
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+_GOVUK_LINK = "a.govuk-link"
+_FILE_ROWS = "tbody.govuk-table__body tr.govuk-table__row"
+
+
+def _class_token(name: str):
+    # SoupStrainer sees the raw class attribute ("govuk-link foo"), not the split list.
+    return re.compile(rf"(?:^|\s){re.escape(name)}(?:\s|$)")
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class SoupParser:
+    """Full BeautifulSoup parse (html.parser); the reference implementation."""
+
+    name = "bs4"
+
+    def _soup(self, html: str, only=None):
+        return BeautifulSoup(html, "html.parser")
+
+    def links(self, html: str):
+        soup = self._soup(html, SoupStrainer("a", class_=_class_token("govuk-link")))
+        return [(a.get_text(strip=True), (a.get("href") or "").strip()) for a in soup.select(_GOVUK_LINK)]
+
+    def file_rows(self, html: str):
+        soup = self._soup(html, SoupStrainer("tbody", class_=_class_token("govuk-table__body")))
+        rows = []
+        for tr in soup.select(_FILE_ROWS):
+            tds = tr.find_all("td")
+            if len(tds) < 2:
+                continue
+            link = tds[0].find("a", class_="govuk-link")
+            if not link:
+                continue
+            rows.append((link.get_text(strip=True), (link.get("href") or "").strip(),
+                         tds[1].get_text(strip=True)))
+        return rows
+
+
+class StrainerParser(SoupParser):
+    """BeautifulSoup restricted by a SoupStrainer to the nodes we read."""
+
+    name = "strainer"
+
+    def _soup(self, html: str, only=None):
+        return BeautifulSoup(html, "html.parser", parse_only=only)
+
+
+class LxmlParser:
+    """lxml.html + XPath: the C parser builds the tree, Python only sees the matches."""
+
+    name = "lxml"
+
+    def __init__(self):
+        from lxml import etree, html as lxml_html
+
+        self._fromstring = lxml_html.fromstring
+        # str pages are handed over as UTF-8 bytes; without this, a page with no
+        # <meta charset> would be decoded as latin-1.
+        self._utf8 = lxml_html.HTMLParser(encoding="utf-8")
+        self._links = etree.XPath(f"//a[{_has_class('govuk-link')}]")
+        self._rows = etree.XPath(
+            f"//tbody[{_has_class('govuk-table__body')}]//tr[{_has_class('govuk-table__row')}]"
+        )
+        self._cells = etree.XPath(".//td")
+        self._cell_link = etree.XPath(f"(.//a[{_has_class('govuk-link')}])[1]")
+        self._text = etree.XPath(".//text()")
+
+    def _parse(self, html: str):
+        # lxml rejects str input that carries an XML encoding declaration.
+        if isinstance(html, str):
+            return self._fromstring(html.encode("utf-8"), parser=self._utf8)
+        return self._fromstring(html)
+
+    def _get_text(self, el) -> str:
+        return "".join(t.strip() for t in self._text(el))
+
+    def links(self, html: str):
+        if not html.strip():
+            return []
+        tree = self._parse(html)
+        return [(self._get_text(a), (a.get("href") or "").strip()) for a in self._links(tree)]
+
+    def file_rows(self, html: str):
+        if not html.strip():
+            return []
+        tree = self._parse(html)
+        rows = []
+        for tr in self._rows(tree):
+            tds = self._cells(tr)
+            if len(tds) < 2:
+                continue
+            link = self._cell_link(tds[0])
+            if not link:
+                continue
+            rows.append((self._get_text(link[0]), (link[0].get("href") or "").strip(),
+                         self._get_text(tds[1])))
+        return rows
+
+
+_local = threading.local()
+
+PARSERS = {
+    SoupParser.name: SoupParser,
+    StrainerParser.name: StrainerParser,
+    LxmlParser.name: LxmlParser,
+}
+
+
+def get_parser(name: str):
+    """
+    The parser called name, one instance per thread (compiled lxml XPath
+    objects must not be shared between threads). "lxml" falls back to
+    "strainer" when lxml is not installed.
+    """
+    parsers = _local.__dict__.setdefault("parsers", {})
+    parser = parsers.get(name)
+    if parser is None:
+        try:
+            parser = PARSERS[name]()
+        except KeyError:
+            raise ValueError(f"Unknown HTML parser {name!r}; choose from {sorted(PARSERS)}")
+        except ImportError:
+            print(f"HTML parser {name!r} unavailable (lxml not installed); using 'strainer'")
+            parser = StrainerParser()
+        parsers[name] = parser
+    return parser
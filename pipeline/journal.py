@@ -0,0 +1,97 @@
+"""
+Append-only journal of one day's completed rows (2a).
+
+Every finished row is appended to a JSON-lines file as soon as it is
+built, so a run that dies halfway through a day loses at most the row it
+was working on. The next run reads the journal back (open(resume=True)),
+skips the rows it already holds and carries on; once the day is complete
+the output files are compacted from the journal and it is removed.
+
+The first line is {"header": {...}}: what the rows were built from (the
+CSV's hash and the code / mapping versions). A journal whose header does
+not match the current run is discarded on open, so rows of an older CSV
+or extractor are never merged with a new one. Every further line is
+{"uri": <CSV URI>, "hash": <content hash or null>, "record": {...}}.
+A torn last line (the process died mid-write) is dropped on resume.
+"""
+import json
+import os
+from collections import namedtuple
+
+# row_index values already journaled, their CSV URIs and {uri: content hash}
+JournalState = namedtuple("JournalState", ["rows", "uris", "hashes"])
+
+
+class DayJournal:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self.discarded = False  # set by open() when an existing journal did not match its header
+
+    def open(self, resume: bool = True, header: dict = None) -> JournalState:
+        """
+        Open for appending. With resume, keep what an earlier run journaled
+        under the same header and return it; otherwise (no journal, or one
+        written for another header) start empty.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        header = json.loads(json.dumps(header or {}))  # as it reads back (tuples -> lists)
+        state = JournalState(set(), set(), {})
+        self.discarded = False
+        if resume and os.path.exists(self.path):
+            good = 0
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    if good == 0:
+                        if entry.get("header") != header:
+                            self.discarded = True
+                            break
+                        good += len(line)
+                        continue
+                    good += len(line)
+                    state.rows.add(entry["record"]["row_index"])
+                    state.uris.add(entry["uri"])
+                    if entry.get("hash"):
+                        state.hashes[entry["uri"]] = entry["hash"]
+            if self.discarded:
+                state = JournalState(set(), set(), {})
+                good = 0
+            os.truncate(self.path, good)
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() == 0:
+            self._file.write(json.dumps({"header": header}) + "\n")
+            self._file.flush()
+        return state
+
+    def append(self, record: dict, uri: str, content_hash: str = None):
+        line = json.dumps({"uri": uri, "hash": content_hash, "record": record}, ensure_ascii=False)
+        self._file.write(line + "\n")
+        self._file.flush()  # survives the process dying; not an fsync
+
+    def records(self):
+        """Yield the journaled records in the order they were appended."""
+        if self._file is not None:
+            self._file.flush()
+        with open(self.path, encoding="utf-8") as f:
+            next(f, None)  # header
+            for line in f:
+                yield json.loads(line)["record"]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """Close and delete the journal (after its day was written)."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,88 @@
+"""
+Download manifest for the scrapers (1a / 1b).
+
+One SQLite row per file URL with where it was saved, its size, SHA-256 and
+the server's ETag / Last-Modified. Later runs use it to send conditional
+GETs (If-None-Match / If-Modified-Since) or to skip files outright.
+A small key/value table next to it holds crawl state such as the
+incremental-crawl watermark.
+"""
+import os
+import time
+
+from pipeline.sqlite_store import SqliteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    url           TEXT PRIMARY KEY,
+    path          TEXT NOT NULL,
+    size          INTEGER NOT NULL,
+    sha256        TEXT NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    downloaded_at REAL NOT NULL,
+    checked_at    REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS crawl_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_COLUMNS = ("url", "path", "size", "sha256", "etag", "last_modified", "downloaded_at", "checked_at")
+
+
+class DownloadManifest(SqliteStore):
+    """SQLite-backed manifest of downloaded files, safe to share between threads."""
+
+    def __init__(self, path: str):
+        super().__init__(path, _SCHEMA)
+
+    def get(self, url: str):
+        """Return the manifest entry for url as a dict, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM files WHERE url = ?", (url,)
+            ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def is_current(self, url: str, path: str):
+        """The entry for url if the file it describes is still on disk at path with the same size."""
+        entry = self.get(url)
+        if entry is None or os.path.abspath(entry["path"]) != os.path.abspath(path):
+            return None
+        try:
+            if os.path.getsize(path) != entry["size"]:
+                return None
+        except OSError:
+            return None
+        return entry
+
+    def record(self, url: str, path: str, size: int, sha256: str, etag=None, last_modified=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files "
+                "(url, path, size, sha256, etag, last_modified, downloaded_at, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, path, size, sha256, etag, last_modified, now, now),
+            )
+            self._conn.commit()
+
+    def mark_checked(self, url: str):
+        """Record that the server confirmed the file is unchanged (HTTP 304)."""
+        with self._lock:
+            self._conn.execute("UPDATE files SET checked_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def get_state(self, key: str, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM crawl_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO crawl_state (key, value) VALUES (?, ?)", (key, value)
+            )
+            self._conn.commit()
@@ -0,0 +1,168 @@
+"""
+Persistent on-disk cache for HTTP response bodies (Contracts Finder OCDS JSON).
+
+Entries are keyed by URI and point at zlib-compressed bodies stored once per
+SHA-256 of their content, so identical documents served under several URIs
+share one blob. Each entry keeps the fetch time and the HTTP validators
+(ETag / Last-Modified) so a later run can revalidate instead of refetching.
+Total compressed size is capped; the least recently used entries are evicted
+first.
+"""
+import hashlib
+import time
+import zlib
+from collections import namedtuple
+
+from pipeline.sqlite_store import SqliteStore
+
+# Cache hits only note their access time in memory; the LRU order is written
+# to the database with the next put / touch / close, or once this many
+# hits are pending.
+TOUCH_BATCH = 256
+
+CachedResponse = namedtuple(
+    "CachedResponse", ["uri", "body", "fetched_at", "etag", "last_modified"]
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    data   BLOB NOT NULL,
+    size   INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    uri           TEXT PRIMARY KEY,
+    sha256        TEXT NOT NULL,
+    fetched_at    REAL NOT NULL,
+    last_access   REAL NOT NULL,
+    etag          TEXT,
+    last_modified TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS entries_sha256 ON entries (sha256);
+"""
+
+
+class ResponseCache(SqliteStore):
+    """
+    SQLite-backed response cache, safe to share between threads.
+
+    max_bytes: budget for the compressed bodies (None = unbounded).
+    offline:   callers should only serve from the cache and never hit the network.
+    """
+
+    def __init__(self, path: str, max_bytes=None, offline: bool = False):
+        super().__init__(path, _SCHEMA)
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._touched = {}  # uri -> last access not yet written
+        self._total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM blobs"
+        ).fetchone()[0]
+
+    def get(self, uri: str):
+        """Return a CachedResponse for uri (and mark it recently used), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT e.sha256, e.fetched_at, e.etag, e.last_modified, b.data "
+                "FROM entries e JOIN blobs b ON b.sha256 = e.sha256 WHERE e.uri = ?",
+                (uri,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._touched[uri] = time.time()
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touches()
+                self._conn.commit()
+        sha, fetched_at, etag, last_modified, data = row
+        return CachedResponse(uri, zlib.decompress(data), fetched_at, etag, last_modified)
+
+    def put(self, uri: str, body: bytes, etag=None, last_modified=None):
+        """Store body for uri, replacing any previous entry, then enforce the size budget."""
+        sha = hashlib.sha256(body).hexdigest()
+        now = time.time()
+        with self._lock:
+            self._flush_touches()
+            exists = self._conn.execute(
+                "SELECT 1 FROM blobs WHERE sha256 = ?", (sha,)
+            ).fetchone()
+            if not exists:
+                data = zlib.compress(body, 6)
+                self._conn.execute(
+                    "INSERT INTO blobs (sha256, data, size) VALUES (?, ?, ?)",
+                    (sha, data, len(data)),
+                )
+                self._total += len(data)
+            old = self._conn.execute(
+                "SELECT sha256 FROM entries WHERE uri = ?", (uri,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(uri, sha256, fetched_at, last_access, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (uri, sha, now, now, etag, last_modified),
+            )
+            if old and old[0] != sha:
+                self._drop_orphan(old[0])
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, uri: str):
+        """Record a successful revalidation (e.g. HTTP 304) for uri."""
+        now = time.time()
+        with self._lock:
+            self._flush_touches()
+            self._conn.execute(
+                "UPDATE entries SET fetched_at = ?, last_access = ? WHERE uri = ?",
+                (now, now, uri),
+            )
+            self._conn.commit()
+
+    def total_bytes(self) -> int:
+        return self._total
+
+    def flush(self):
+        """Write the access times of recent hits (done by put / touch / close anyway)."""
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+
+    def close(self):
+        self.flush()
+        super().close()
+
+    # ---- internals (caller holds the lock) ----
+
+    def _flush_touches(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE entries SET last_access = ? WHERE uri = ?",
+                [(at, uri) for uri, at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _drop_orphan(self, sha: str):
+        still_used = self._conn.execute(
+            "SELECT 1 FROM entries WHERE sha256 = ? LIMIT 1", (sha,)
+        ).fetchone()
+        if still_used:
+            return
+        row = self._conn.execute("SELECT size FROM blobs WHERE sha256 = ?", (sha,)).fetchone()
+        if row:
+            self._conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha,))
+            self._total -= row[0]
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        while self._total > self.max_bytes:
+            victims = self._conn.execute(
+                "SELECT uri, sha256 FROM entries ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not victims:
+                break
+            for uri, sha in victims:
+                self._conn.execute("DELETE FROM entries WHERE uri = ?", (uri,))
+                self._drop_orphan(sha)
+                if self._total <= self.max_bytes:
+                    break
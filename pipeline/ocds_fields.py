@@ -0,0 +1,480 @@
+"""
+Table-driven extraction of flat output columns from OCDS release packages.
+
+A mapping is declared as data:
+
+    CONTEXTS  named sub-objects resolved once per package, e.g. "release"
+              (first release), "tender", "buyer_party" (the party whose id
+              is buyer.id) or "suppliers" (parties with the supplier role)
+    FIELDS    (column, context, path, aggregation)
+
+Paths are dotted keys relative to their context. "name[]" fans out over a
+list, and a path ending in "[]" yields the list elements themselves:
+
+    "classification.id"                        one value
+    "documents[].url"                          one value per document
+    "items[].deliveryAddresses[].postalCode"   nested fan-out
+    "[].identifier.id"                         over a list context itself
+    "tag[]"                                    the tags themselves
+
+Aggregations:
+    value          the single value (intermediate objects missing -> None)
+    first          first element of the fan-out, or None
+    first_present  first truthy value of the fan-out, or None
+    join           pipe-joined non-empty values, or None
+    unique         like join, but each value only once (first occurrence)
+
+FieldExtractor turns a mapping into closures once (see its docstring).
+Non-dict values where an object is expected, and non-list values where a
+list is expected, are treated as missing.
+"""
+from itertools import repeat
+
+_EMPTY = {}
+
+MAPPING_VERSION = "1"  # bump whenever CONTRACTS_FINDER_FIELDS changes the output
+
+
+def pipe_join(values):
+    """Join values with '|' or return None if none are non-empty."""
+    # JSON values only stringify to "" when they are "", so str() runs once per value.
+    cleaned = [str(v) for v in values if v is not None and v != ""]
+    return "|".join(cleaned) if cleaned else None
+
+
+def _unique_join(values):
+    seen = []
+    for v in values:
+        if v is not None and v != "" and v not in seen:
+            seen.append(v)
+    return pipe_join(seen)
+
+
+def _first(values):
+    return next(iter(values), None)
+
+
+def _first_present(values):
+    for v in values:
+        if v:
+            return v
+    return None
+
+
+def _join_one(value):
+    return None if value is None or value == "" else str(value)
+
+
+def _first_present_one(value):
+    return value if value else None
+
+
+# name -> (over a list of values, over the value of a one-element list)
+AGGREGATIONS = {
+    "first": (_first, lambda value: value),
+    "first_present": (_first_present, _first_present_one),
+    "join": (pipe_join, _join_one),
+    "unique": (_unique_join, _join_one),
+}
+
+
+def _parse_path(path: str):
+    """"a.b[].c" -> [("a", False), ("b", True), ("c", False)]; "[]" -> [("", True)]."""
+    segments = []
+    for part in path.split("."):
+        fan = part.endswith("[]")
+        segments.append((part[:-2] if fan else part, fan))
+    return segments
+
+
+def _as_dict(value):
+    return value if value.__class__ is dict else _EMPTY
+
+
+def _as_list(value):
+    return value if value.__class__ is list else ()
+
+
+def _as_leaves(value):
+    """A list of values; strings and objects iterate as they did in the hand-written code."""
+    return value if value.__class__ in (list, str, dict) else ()
+
+
+def _context_resolver(name, kind, parent, key, *args):
+    """Closure contexts -> the object (or list) for one CONTEXTS entry."""
+    if kind == "get":
+        def resolve(ctx):
+            return _as_dict(ctx[parent].get(key))
+    elif kind == "first":
+        def resolve(ctx):
+            seq = ctx[parent].get(key)
+            return _as_dict(seq[0]) if seq.__class__ is list and seq else _EMPTY
+    elif kind == "match":
+        field, value = args
+
+        def resolve(ctx):
+            for el in _as_list(ctx[parent].get(key)):
+                if el.__class__ is dict and el.get(field) == value:
+                    return el
+            return _EMPTY
+    elif kind == "match_ref":
+        field, ref_context, ref_key = args
+
+        def resolve(ctx):
+            wanted = ctx[ref_context].get(ref_key)
+            if wanted:
+                for el in _as_list(ctx[parent].get(key)):
+                    if el.__class__ is dict and el.get(field) == wanted:
+                        return el
+            return _EMPTY
+    elif kind == "filter_contains":
+        field, value = args
+
+        def resolve(ctx):
+            try:
+                return [el for el in ctx[parent].get(key) or ()
+                        if el.__class__ is dict and value in (el.get(field) or ())]
+            except TypeError:  # a number where a list should be
+                return [el for el in _as_leaves(ctx[parent].get(key))
+                        if el.__class__ is dict and value in _as_leaves(el.get(field))]
+    else:
+        raise ValueError(f"context {name!r}: unknown kind {kind!r}")
+    return resolve
+
+
+def _walker(prefix):
+    """Closure obj -> list of the objects reached through prefix, fan-outs flattened."""
+    if len(prefix) == 1:  # "documents[].url", "[].name": one list, no nesting
+        (key, _fan), = prefix
+        if not key:  # a list context, which only ever holds dicts
+            return lambda obj: obj
+        return lambda obj: [el for el in _as_list(obj.get(key)) if el.__class__ is dict]
+
+    def walk(obj):
+        nodes = [obj]
+        for key, fan in prefix:
+            if fan:
+                nodes = [el for node in nodes for el in _as_list(node.get(key) if key else node)
+                         if el.__class__ is dict]
+            else:
+                nodes = [_as_dict(node.get(key)) for node in nodes]
+        return nodes
+    return walk
+
+
+def _fan_filler(context, prefix, groups):
+    """
+    Closure (ctx, record) for the columns reading plain leaves under one
+    fan-out. groups are (keys below the element, [(column, leaf,
+    aggregate)]): each nested object is resolved once per element, then
+    every column is read straight off the list with dict.get. Columns stay
+    None when the list is empty.
+
+    The elements are assumed to be dicts; if one is not, the pass is redone
+    with every non-dict treated as missing.
+    """
+    # "documents[]": the list is read as it is; anything deeper is walked
+    list_key = prefix[0][0] if len(prefix) == 1 else None
+    walk = _walker(prefix)
+    groups = [(keys,
+               [(column, leaf, one) for column, leaf, (_many, one) in columns],
+               [(column, repeat(leaf)) for column, leaf, (many, _one) in columns if many is pipe_join],
+               [(column, repeat(leaf), many) for column, leaf, (many, _one) in columns if many is not pipe_join])
+              for keys, columns in groups]
+
+    def fill_groups(nodes, record, checked):
+        single = len(nodes) == 1
+        for keys, ones, joins, manys in groups:
+            objs = nodes
+            for key in keys:
+                if checked:
+                    objs = [v if v.__class__ is dict else _EMPTY for v in map(dict.get, objs, repeat(key))]
+                else:
+                    objs = [obj.get(key) or _EMPTY for obj in objs]
+            if single:  # the common case: no list to aggregate
+                obj = objs[0]
+                for column, leaf, one in ones:
+                    record[column] = one(obj.get(leaf))
+            else:
+                for column, leaves in joins:  # pipe_join inlined: most columns are joins
+                    cleaned = [str(v) for v in map(dict.get, objs, leaves) if v is not None and v != ""]
+                    record[column] = "|".join(cleaned) if cleaned else None
+                for column, leaves, many in manys:
+                    record[column] = many(map(dict.get, objs, leaves))
+
+    def fill(ctx, record):
+        nodes = ctx[context].get(list_key) if list_key else walk(ctx[context])
+        if nodes:
+            try:
+                fill_groups(nodes, record, False)
+            except (AttributeError, TypeError, KeyError):  # something that should be an object is not
+                nodes = [n for n in nodes if n.__class__ is dict] if nodes.__class__ is list else []
+                fill_groups(nodes, record, True)
+    return fill
+
+
+def _fan_leaf_filler(context, prefix, leaf, column, aggregate):
+    """Closure (ctx, record) for a column whose leaf is itself a list ("tag[]")."""
+    if not prefix:
+        def fill(ctx, record):
+            values = _as_leaves(ctx[context].get(leaf))
+            if values:
+                record[column] = aggregate(values)
+        return fill
+    walk = _walker(prefix)
+
+    def fill(ctx, record):
+        nodes = walk(ctx[context])
+        try:
+            values = [v for node in nodes for v in node.get(leaf) or ()]
+        except TypeError:  # a number where a list should be
+            values = [v for node in nodes for v in _as_leaves(node.get(leaf))]
+        record[column] = aggregate(values)
+    return fill
+
+
+class FieldExtractor:
+    """
+    (fields, contexts) mapping built into closures; extract(package) ->
+    {column: value} in field order.
+
+    Per package, every context is resolved once, together with the objects
+    below a context that value columns read (tender.value, ...). All value
+    columns are then filled in one statement, and one closure per fan-out
+    (documents[], [].address, ...) fills the columns under it in a single
+    pass over the list, with a shortcut for one-element lists.
+
+    leading columns come first in every record and are left None for the
+    caller to set (2a's csv_file, row_index, status).
+    """
+
+    def __init__(self, fields, contexts, leading=()):
+        self.columns = [f[0] for f in fields]
+        known, list_contexts = {"package"}, set()
+        self._contexts = []
+        for name, kind, parent, key, *args in contexts:
+            if parent not in known or parent in list_contexts:
+                raise ValueError(f"context {name!r}: unknown parent {parent!r}")
+            self._contexts.append((name, _context_resolver(name, kind, parent, key, *args)))
+            known.add(name)
+            if kind == "filter_contains":
+                list_contexts.add(name)
+
+        self._empty = dict.fromkeys([*leading, *self.columns])
+        values, fans, self._fillers = {}, {}, []
+        for column, context, path, agg in fields:
+            if context not in known:
+                raise ValueError(f"{column}: unknown context {context!r}")
+            segments = _parse_path(path)
+            prefix, (leaf, leaf_fan) = tuple(segments[:-1]), segments[-1]
+            prefix_fans = any(fan for _key, fan in prefix)
+            if (context in list_contexts) != (segments[0] == ("", True)):
+                raise ValueError(f"{column}: a path starts with '[]' exactly when its context is a list")
+            if agg == "value":
+                if leaf_fan or prefix_fans:
+                    raise ValueError(f"{column}: 'value' needs a path without []")
+                values.setdefault((context, prefix), []).append((column, leaf))
+                continue
+            aggregate = AGGREGATIONS.get(agg)
+            if aggregate is None:
+                raise ValueError(f"{column}: unknown aggregation {agg!r}")
+            if not (leaf_fan or prefix_fans):
+                raise ValueError(f"{column}: {agg!r} needs a path with []")
+            if leaf_fan:
+                self._fillers.append(_fan_leaf_filler(context, prefix, leaf, column, aggregate[0]))
+            else:
+                # Group by the list fanned out over: "[].identifier.id" and "[].name" share "[]".
+                last = max(i for i, (_key, fan) in enumerate(prefix) if fan)
+                keys = tuple(key for key, _fan in prefix[last + 1:])
+                fans.setdefault((context, prefix[:last + 1]), []).append((column, aggregate, keys, leaf))
+
+        # Objects below a context that value columns read ("tender.value") become
+        # contexts of their own, so every value column is one dict.get in extract().
+        self._value_columns, self._value_sources, self._value_leaves = [], [], []
+        derived = {}  # depth -> {name: (parent, key)}
+        for (context, prefix), entries in values.items():
+            for depth, (key, _fan) in enumerate(prefix):
+                name = f"{context}.{key}"
+                derived.setdefault(depth, {})[name] = (context, key)
+                context = name
+            for column, leaf in entries:
+                self._value_columns.append(column)
+                self._value_sources.append(context)
+                self._value_leaves.append(leaf)
+        self._derived = [(list(level), [p for p, _ in level.values()], [k for _, k in level.values()])
+                         for _depth, level in sorted(derived.items())]
+        for (context, prefix), entries in fans.items():
+            groups = {}
+            for column, aggregate, keys, leaf in entries:
+                groups.setdefault(keys, []).append((column, leaf, aggregate))
+            self._fillers.append(_fan_filler(context, prefix, list(groups.items())))
+
+    def extract(self, package) -> dict:
+        ctx = {"package": _as_dict(package)}
+        for name, resolve in self._contexts:
+            ctx[name] = resolve(ctx)
+        for names, parents, keys in self._derived:
+            objs = map(dict.get, map(ctx.__getitem__, parents), keys)
+            ctx.update(zip(names, [obj if obj.__class__ is dict else _EMPTY for obj in objs]))
+        record = self._empty.copy()
+        objs = map(ctx.__getitem__, self._value_sources)
+        record.update(zip(self._value_columns, map(dict.get, objs, self._value_leaves)))
+        for fill in self._fillers:
+            fill(ctx, record)
+        return record
+
+
+# ---------------------------------------------------------------------------
+# Contracts Finder mapping
+# ---------------------------------------------------------------------------
+
+CONTRACTS_FINDER_CONTEXTS = [
+    # name, kind, parent, key, ...
+    ("release", "first", "package", "releases"),
+    ("publisher", "get", "package", "publisher"),
+    ("planning", "get", "release", "planning"),
+    ("tender", "get", "release", "tender"),
+    ("buyer", "get", "release", "buyer"),
+    ("buyer_party", "match_ref", "release", "parties", "id", "buyer", "id"),
+    ("suppliers", "filter_contains", "release", "parties", "roles", "supplier"),
+    ("first_item", "first", "tender", "items"),
+    ("tender_notice", "match", "tender", "documents", "documentType", "tenderNotice"),
+    ("award", "first", "release", "awards"),
+    ("award_notice", "match", "award", "documents", "documentType", "awardNotice"),
+]
+
+
+def _documents(prefix: str, context: str, path: str, modified: bool = True):
+    keys = [("ids", "id"), ("types", "documentType"), ("descriptions", "description"),
+            ("urls", "url"), ("datePublished", "datePublished")]
+    if modified:
+        keys.append(("dateModified", "dateModified"))
+    keys += [("formats", "format"), ("languages", "language")]
+    return [(f"{prefix}_{suffix}", context, f"{path}[].{key}", "join") for suffix, key in keys]
+
+
+CONTRACTS_FINDER_FIELDS = [
+    # identification
+    ("uri", "package", "uri", "value"),
+    ("publishedDate", "package", "publishedDate", "value"),
+    ("ocid", "release", "ocid", "value"),
+    ("release_id", "release", "id", "value"),
+    ("release_title", "release", "title", "value"),
+    ("release_date", "release", "date", "value"),
+    ("release_language", "release", "language", "value"),
+    ("release_tag", "release", "tag[]", "first"),
+    ("release_tags_all", "release", "tag[]", "join"),
+    ("initiationType", "release", "initiationType", "value"),
+
+    # planning
+    ("planning_milestone_ids", "planning", "milestones[].id", "join"),
+    ("planning_milestone_titles", "planning", "milestones[].title", "join"),
+    ("planning_milestone_types", "planning", "milestones[].type", "join"),
+    ("planning_milestone_dueDates", "planning", "milestones[].dueDate", "join"),
+    *_documents("planning_document", "planning", "documents", modified=False),
+
+    # publisher / meta
+    ("publisher_name", "publisher", "name", "value"),
+    ("publisher_scheme", "publisher", "scheme", "value"),
+    ("publisher_uid", "publisher", "uid", "value"),
+    ("publisher_uri", "publisher", "uri", "value"),
+    ("version", "package", "version", "value"),
+    ("extensions", "package", "extensions[]", "join"),
+    ("license", "package", "license", "value"),
+    ("publicationPolicy", "package", "publicationPolicy", "value"),
+
+    # tender basics
+    ("tender_id", "tender", "id", "value"),
+    ("tender_title", "tender", "title", "value"),
+    ("tender_description", "tender", "description", "value"),
+    ("tender_status", "tender", "status", "value"),
+    ("mainProcurementCategory", "tender", "mainProcurementCategory", "value"),
+
+    # value
+    ("value_amount", "tender", "value.amount", "value"),
+    ("value_currency", "tender", "value.currency", "value"),
+    ("minValue_amount", "tender", "minValue.amount", "value"),
+    ("minValue_currency", "tender", "minValue.currency", "value"),
+
+    # CPV
+    ("cpv_scheme", "tender", "classification.scheme", "value"),
+    ("cpv_id", "tender", "classification.id", "value"),
+    ("cpv_description", "tender", "classification.description", "value"),
+    ("additional_cpv_ids", "tender", "additionalClassifications[].id", "join"),
+    ("additional_cpv_descriptions", "tender", "additionalClassifications[].description", "join"),
+    *_documents("tender_document", "tender", "documents"),
+
+    # geography
+    ("tender_item_ids", "tender", "items[].id", "join"),
+    ("tender_delivery_postalCodes_all", "tender", "items[].deliveryAddresses[].postalCode", "unique"),
+    ("tender_delivery_regions_all", "tender", "items[].deliveryAddresses[].region", "unique"),
+    ("tender_delivery_countryNames_all", "tender", "items[].deliveryAddresses[].countryName", "unique"),
+    ("delivery_postalCode", "first_item", "deliveryAddresses[].postalCode", "first_present"),
+    ("delivery_region", "first_item", "deliveryAddresses[].region", "first_present"),
+    ("delivery_country", "first_item", "deliveryAddresses[].countryName", "first_present"),
+
+    # timing
+    ("tender_datePublished", "tender", "datePublished", "value"),
+    ("tender_endDate", "tender", "tenderPeriod.endDate", "value"),
+    ("contract_startDate", "tender", "contractPeriod.startDate", "value"),
+    ("contract_endDate", "tender", "contractPeriod.endDate", "value"),
+
+    # method / SME flags
+    ("procurementMethod", "tender", "procurementMethod", "value"),
+    ("procurementMethodDetails", "tender", "procurementMethodDetails", "value"),
+    ("suitability_sme", "tender", "suitability.sme", "value"),
+    ("suitability_vcse", "tender", "suitability.vcse", "value"),
+
+    # buyer
+    ("buyer_id", "buyer", "id", "value"),
+    ("buyer_name", "buyer", "name", "value"),
+    ("buyer_legalName", "buyer_party", "identifier.legalName", "value"),
+    ("buyer_identifier_scheme", "buyer_party", "identifier.scheme", "value"),
+    ("buyer_identifier_id", "buyer_party", "identifier.id", "value"),
+    ("buyer_streetAddress", "buyer_party", "address.streetAddress", "value"),
+    ("buyer_locality", "buyer_party", "address.locality", "value"),
+    ("buyer_postalCode", "buyer_party", "address.postalCode", "value"),
+    ("buyer_countryName", "buyer_party", "address.countryName", "value"),
+    ("buyer_contact_name", "buyer_party", "contactPoint.name", "value"),
+    ("buyer_contact_email", "buyer_party", "contactPoint.email", "value"),
+    ("buyer_contact_telephone", "buyer_party", "contactPoint.telephone", "value"),
+    ("buyer_details_url", "buyer_party", "details.url", "value"),
+    ("buyer_roles", "buyer_party", "roles[]", "join"),
+
+    # supplier parties (from parties.roles == 'supplier')
+    ("supplier_party_ids", "suppliers", "[].id", "join"),
+    ("supplier_party_names", "suppliers", "[].name", "join"),
+    ("supplier_legalNames", "suppliers", "[].identifier.legalName", "join"),
+    ("supplier_identifier_schemes", "suppliers", "[].identifier.scheme", "join"),
+    ("supplier_identifier_ids", "suppliers", "[].identifier.id", "join"),
+    ("supplier_streetAddresses", "suppliers", "[].address.streetAddress", "join"),
+    ("supplier_localities", "suppliers", "[].address.locality", "join"),
+    ("supplier_postalCodes", "suppliers", "[].address.postalCode", "join"),
+    ("supplier_countryNames", "suppliers", "[].address.countryName", "join"),
+    ("supplier_scales", "suppliers", "[].details.scale", "join"),
+    ("supplier_vcse_flags", "suppliers", "[].details.vcse", "join"),
+    ("supplier_details_urls", "suppliers", "[].details.url", "join"),
+    ("supplier_roles", "suppliers", "[].roles[]", "unique"),
+
+    # links
+    ("tender_notice_url", "tender_notice", "url", "value"),
+    ("tender_notice_description", "tender_notice", "description", "value"),
+
+    # award-level fields (first award only)
+    ("award_id", "award", "id", "value"),
+    ("award_status", "award", "status", "value"),
+    ("award_date", "award", "date", "value"),
+    ("award_datePublished", "award", "datePublished", "value"),
+    ("award_value_amount", "award", "value.amount", "value"),
+    ("award_value_currency", "award", "value.currency", "value"),
+    ("award_contract_startDate", "award", "contractPeriod.startDate", "value"),
+    ("award_contract_endDate", "award", "contractPeriod.endDate", "value"),
+    ("award_suppliers_ids", "award", "suppliers[].id", "join"),
+    ("award_suppliers_names", "award", "suppliers[].name", "join"),
+    ("award_notice_url", "award_notice", "url", "value"),
+    ("award_notice_description", "award_notice", "description", "value"),
+    ("award_notice_datePublished", "award_notice", "datePublished", "value"),
+    ("award_notice_format", "award_notice", "format", "value"),
+    ("award_notice_language", "award_notice", "language", "value"),
+    *_documents("award_document", "award", "documents"),
+]
@@ -0,0 +1,77 @@
+"""
+Persistent cache of parsed FATS ZIP members (2b).
+
+Each parsed record is stored under the member's name, CRC-32 and
+uncompressed size, all three read from the ZIP's central directory, so
+a hit needs no decompression at all. A re-published ZIP, or a rerun of a
+whole range, therefore only parses the members whose content changed.
+The name is part of the key so that a CRC-32 collision would also need
+the same notice file name to do any harm.
+
+Each entry also carries the parser version it was built with. An entry
+from another version counts as a miss and is overwritten when the member
+is parsed again. Records are stored as zlib-compressed JSON.
+"""
+import json
+import zlib
+
+from pipeline.sqlite_store import SqliteStore, batches
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    member  TEXT NOT NULL,
+    crc32   INTEGER NOT NULL,
+    size    INTEGER NOT NULL,
+    version TEXT NOT NULL,
+    data    BLOB NOT NULL,
+    PRIMARY KEY (member, crc32, size)
+);
+"""
+
+
+def member_key(info) -> tuple:
+    """(name, CRC-32, size) cache key for a zipfile.ZipInfo."""
+    return info.filename, info.CRC, info.file_size
+
+
+class ParseCache(SqliteStore):
+    """SQLite-backed (member, CRC-32, size) -> record store; safe to share between threads."""
+
+    def __init__(self, path: str, version: str):
+        super().__init__(path, _SCHEMA)
+        self.version = version
+
+    def get_many(self, keys) -> dict:
+        """{key: record} for the keys cached under the current parser version."""
+        keys = set(keys)
+        names = sorted({k[0] for k in keys})
+        found = {}
+        with self._lock:
+            for batch in batches(names):
+                rows = self._conn.execute(
+                    "SELECT member, crc32, size, data FROM records "
+                    f"WHERE version = ? AND member IN ({', '.join('?' * len(batch))})",
+                    [self.version, *batch],
+                ).fetchall()
+                for member, crc, size, data in rows:
+                    if (member, crc, size) in keys:
+                        found[(member, crc, size)] = json.loads(zlib.decompress(data))
+        return found
+
+    def put_many(self, records: dict):
+        """Store {key: record}, replacing what was cached for those keys."""
+        rows = [
+            (*key, self.version,
+             zlib.compress(json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8"), 6))
+            for key, record in records.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO records (member, crc32, size, version, data) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
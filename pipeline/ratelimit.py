@@ -0,0 +1,116 @@
+"""
+Adaptive per-host rate limiting and retry backoff for the shared session.
+
+Each host gets a token bucket whose rate adapts to how the server is
+coping (AIMD): every successful response nudges the rate up towards
+max_rate, and a 429 / 5xx / connection reset halves it (at most once per
+cooldown, down to min_rate). A Retry-After header pauses the whole host,
+so every worker hitting that host waits, not just the one that got the 429.
+
+Retries are spaced with exponential backoff and full jitter, so parallel
+workers that failed together do not retry together.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+DEFAULT_RATE = 20.0       # requests/second per host at start-up
+DEFAULT_MIN_RATE = 0.5
+DEFAULT_MAX_RATE = 100.0
+DEFAULT_BURST = 5
+MAX_RETRY_AFTER = 300.0   # ignore absurd Retry-After values beyond this (seconds)
+
+# Responses worth retrying: throttling and transient server errors.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**(attempt - 1))]."""
+    return random.uniform(0, min(cap, base * 2 ** max(attempt - 1, 0)))
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = float(value)
+    else:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class AdaptiveRateLimiter:
+    """Thread-safe token bucket for one host, with AIMD rate adjustment."""
+
+    def __init__(self, rate: float = DEFAULT_RATE, min_rate: float = DEFAULT_MIN_RATE,
+                 max_rate: float = DEFAULT_MAX_RATE, burst: int = DEFAULT_BURST,
+                 increase: float = 0.5, decrease: float = 0.5, cooldown: float = 1.0):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = max(burst, 1)
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self._last_decrease = 0.0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a request may be sent to this host."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after=None):
+        """Back off after a 429 / 5xx / reset; retry_after (seconds) pauses the host."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Workers that were throttled together count as one signal.
+            if now - self._last_decrease >= self.cooldown:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+
+class HostRateLimiters:
+    """One AdaptiveRateLimiter per host, created on first use."""
+
+    def __init__(self, **limiter_kwargs):
+        self.limiter_kwargs = limiter_kwargs
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, host: str) -> AdaptiveRateLimiter:
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = self._limiters[host] = AdaptiveRateLimiter(**self.limiter_kwargs)
+            return limiter
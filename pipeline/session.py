@@ -0,0 +1,113 @@
+"""
+Shared HTTP session for the network stages (1a, 1b, 2a).
+
+All requests go through one requests.Session per process, so TCP/TLS
+connections are kept alive and reused instead of being set up for every
+page, file or JSON document. The connection pool is sized to the number of
+concurrent workers, every request gets a default timeout, and the
+User-Agent is set once on the session.
+
+GET/HEAD requests are also paced per host by an adaptive rate limiter
+(pipeline/ratelimit.py) and retried on 429, 5xx and connection resets
+with jittered exponential backoff, honouring Retry-After.
+"""
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pipeline.ratelimit import RETRY_STATUSES, HostRateLimiters, backoff_delay, parse_retry_after
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (compatible; DataEDA-Scraper/0.1; +https://example.com)"
+DEFAULT_TIMEOUT = (5, 60)  # (connect, read) seconds
+DEFAULT_MAX_RETRIES = 5    # attempts per request on 429 / 5xx / connection resets
+DEFAULT_RATE_LIMIT = {}    # AdaptiveRateLimiter kwargs; None disables pacing and retries
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class PipelineSession(requests.Session):
+    """
+    requests.Session that applies a default timeout when none is given and,
+    when rate_limit is not None, paces and retries GET/HEAD requests per host.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, rate_limit=DEFAULT_RATE_LIMIT,
+                 max_retries: int = DEFAULT_MAX_RETRIES):
+        super().__init__()
+        self.default_timeout = timeout
+        self.limiters = HostRateLimiters(**rate_limit) if rate_limit is not None else None
+        self.max_retries = max(max_retries, 1)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.default_timeout)
+        if self.limiters is None or method.upper() not in ("GET", "HEAD"):
+            return super().request(method, url, **kwargs)
+
+        limiter = self.limiters(urlsplit(url).netloc.lower())
+        for attempt in range(1, self.max_retries + 1):
+            limiter.acquire()
+            try:
+                resp = super().request(method, url, **kwargs)
+            except requests.exceptions.ConnectionError:
+                limiter.on_throttle()
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            if resp.status_code not in RETRY_STATUSES:
+                limiter.on_success()
+                return resp
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            limiter.on_throttle(retry_after)
+            if attempt == self.max_retries:
+                return resp
+            resp.close()
+            print(f"      HTTP {resp.status_code} from {urlsplit(url).netloc}, "
+                  f"retry {attempt}/{self.max_retries - 1}"
+                  + (f" after {retry_after:.0f}s" if retry_after else ""))
+            # With Retry-After the limiter already holds the host back.
+            if not retry_after:
+                time.sleep(backoff_delay(attempt))
+
+
+def make_session(pool_size: int = 10, user_agent: str = DEFAULT_USER_AGENT,
+                 timeout=DEFAULT_TIMEOUT, rate_limit=DEFAULT_RATE_LIMIT,
+                 max_retries: int = DEFAULT_MAX_RETRIES) -> PipelineSession:
+    """
+    Build a session whose per-host connection pool holds pool_size
+    connections (use the worker count, so no worker waits for a socket).
+    rate_limit holds AdaptiveRateLimiter settings (rate, min_rate, max_rate,
+    burst, ...); None turns pacing and retries off.
+    """
+    session = PipelineSession(timeout=timeout, rate_limit=rate_limit, max_retries=max_retries)
+    adapter = HTTPAdapter(pool_connections=max(pool_size, 1), pool_maxsize=max(pool_size, 1))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = user_agent
+    return session
+
+
+def configure_session(pool_size: int = 10, user_agent: str = DEFAULT_USER_AGENT,
+                      timeout=DEFAULT_TIMEOUT, rate_limit=DEFAULT_RATE_LIMIT,
+                      max_retries: int = DEFAULT_MAX_RETRIES) -> PipelineSession:
+    """(Re)create the process-wide session; call once at start-up with the worker count."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = make_session(pool_size, user_agent, timeout, rate_limit, max_retries)
+        return _session
+
+
+def get_session() -> PipelineSession:
+    """Return the process-wide session, creating a default one on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = make_session()
+        return _session
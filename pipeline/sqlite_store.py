@@ -0,0 +1,44 @@
+"""
+Shared SQLite setup for the pipeline's on-disk stores (download manifest,
+response cache, URI index, build state, parse cache).
+
+Each store holds one connection per process behind a threading.Lock, so
+worker threads can share it (check_same_thread=False). The database is in
+WAL mode so readers are not blocked by a writer, and the busy timeout makes
+a writer wait for a lock held by another worker process instead of failing
+with "database is locked".
+"""
+import os
+import sqlite3
+import threading
+
+BUSY_TIMEOUT = 30  # seconds to wait for another process's write lock
+BATCH = 500        # values per "IN (...)" query; well below SQLite's bound-parameter limit
+
+
+def connect(path: str, schema: str) -> sqlite3.Connection:
+    """Open (creating the directory and tables if needed) a WAL-mode database at path."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(schema)
+    return conn
+
+
+def batches(values: list, size: int = BATCH):
+    """Consecutive slices of values of at most size items."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class SqliteStore:
+    """Base for the SQLite-backed stores: one shared connection, guarded by self._lock."""
+
+    def __init__(self, path: str, schema: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = connect(path, schema)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
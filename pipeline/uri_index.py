@@ -0,0 +1,79 @@
+"""
+Persistent cross-day index of Contracts Finder notice URIs (2a).
+
+The daily CSVs republish the same notice URIs again and again. The index
+remembers, for every URI, the first day it appeared, the last day it was
+extracted and the SHA-256 of its OCDS document, so later days can skip
+(or only re-emit on change) documents that were already extracted.
+
+Lookups are batched per day (one query per 500 URIs) against the SQLite
+primary key, which is fast enough for the whole 2014-2025 backfill without
+a separate in-memory filter.
+"""
+import hashlib
+import json
+from collections import namedtuple
+
+from pipeline.sqlite_store import SqliteStore, batches
+
+# first_day / last_day are "YYYY-MM-DD"
+IndexEntry = namedtuple("IndexEntry", ["uri", "first_day", "last_day", "content_hash"])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uris (
+    uri          TEXT PRIMARY KEY,
+    first_day    TEXT NOT NULL,
+    last_day     TEXT NOT NULL,
+    content_hash TEXT
+);
+"""
+
+
+def content_hash(data) -> str:
+    """SHA-256 of a parsed JSON document, independent of key order and whitespace."""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class UriIndex(SqliteStore):
+    """SQLite-backed URI -> (first day, last day, content hash) store, safe to share between threads."""
+
+    def __init__(self, path: str):
+        super().__init__(path, _SCHEMA)
+
+    def lookup(self, uris):
+        """{uri: IndexEntry} for the given URIs that are already in the index."""
+        uris = list(uris)
+        found = {}
+        with self._lock:
+            for batch in batches(uris):
+                rows = self._conn.execute(
+                    "SELECT uri, first_day, last_day, content_hash FROM uris "
+                    f"WHERE uri IN ({', '.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for row in rows:
+                    found[row[0]] = IndexEntry(*row)
+        return found
+
+    def record(self, day: str, hashes: dict):
+        """
+        Record that the URIs in hashes ({uri: content_hash}) were extracted on
+        day. first_day only ever moves earlier and the hash is that of the
+        latest day, so re-running an old day does not disturb either.
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO uris (uri, first_day, last_day, content_hash) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(uri) DO UPDATE SET "
+                "first_day = MIN(uris.first_day, excluded.first_day), "
+                "content_hash = CASE WHEN excluded.last_day >= uris.last_day "
+                "THEN excluded.content_hash ELSE uris.content_hash END, "
+                "last_day = MAX(uris.last_day, excluded.last_day)",
+                [(uri, day, day, h) for uri, h in hashes.items()],
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM uris").fetchone()[0]
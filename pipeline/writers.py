@@ -0,0 +1,336 @@
+"""
+Output writers for the extraction stages (2a / 2b).
+
+Each day's records are written through a writer chosen by name:
+
+    parquet  extracted_data/<dataset>/year=YYYY/month=MM/<dataset>_YYYY_MM_DD.parquet
+    xlsx     extracted_data/<dataset>/<dataset>_YYYY_MM_DD.xlsx   (legacy layout)
+
+Parquet is the default. Columns are forced onto an explicit schema so that
+every daily file has the same columns and types, whatever that day contained.
+
+write_day writes a whole DataFrame at once. DayWriter instead takes one
+record dict at a time, keeps them column-wise and flushes every
+batch_rows records, so a day never has to be held in memory as a list of
+dicts plus a DataFrame. Parquet is streamed a row group per batch; Excel
+cannot be appended to, so its batches are kept and written on close.
+"""
+import glob
+import os
+
+import pandas as pd
+
+# Logical column types -> pandas nullable dtypes (map cleanly onto Arrow types)
+_DTYPES = {
+    "string": "string",
+    "int64": "Int64",
+    "float64": "Float64",
+    "bool": "boolean",
+}
+
+
+def build_schema(columns, dtypes=None) -> dict:
+    """Ordered {column: logical type}; columns not in dtypes are strings."""
+    dtypes = dtypes or {}
+    unknown = set(dtypes) - set(columns)
+    if unknown:
+        raise ValueError(f"dtypes given for unknown columns: {sorted(unknown)}")
+    return {col: dtypes.get(col, "string") for col in columns}
+
+
+def _is_missing(v) -> bool:
+    return v is None or v is pd.NA or (isinstance(v, float) and v != v)
+
+
+def _to_str(v):
+    if _is_missing(v):
+        return None
+    return v if isinstance(v, str) else str(v)
+
+
+def _to_bool(v):
+    if _is_missing(v):
+        return None
+    if isinstance(v, str):
+        low = v.strip().lower()
+        if low in {"true", "1", "yes"}:
+            return True
+        if low in {"false", "0", "no"}:
+            return False
+        return None
+    return bool(v)
+
+
+def apply_schema(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    """Return df restricted/reordered to the schema columns, cast to their types."""
+    out = df.reindex(columns=list(schema))
+    for col, kind in schema.items():
+        s = out[col]
+        if kind == "string":
+            out[col] = s.astype(object).map(_to_str).astype("string")
+        elif kind in {"int64", "float64"}:
+            out[col] = pd.to_numeric(s, errors="coerce").astype(_DTYPES[kind])
+        elif kind == "bool":
+            out[col] = s.astype(object).map(_to_bool).astype("boolean")
+        else:
+            raise ValueError(f"Unknown column type {kind!r} for {col}")
+    return out
+
+
+class ParquetWriter:
+    name = "parquet"
+    extension = ".parquet"
+
+    def __init__(self, base_dir: str, compression: str = "zstd"):
+        self.base_dir = base_dir
+        self.compression = compression
+
+    def output_path(self, dataset: str, year, month, day) -> str:
+        y, m, d = int(year), int(month), int(day)
+        return os.path.join(
+            self.base_dir, dataset, f"year={y:04d}", f"month={m:02d}",
+            f"{dataset}_{y:04d}_{m:02d}_{d:02d}{self.extension}",
+        )
+
+    def write(self, df: pd.DataFrame, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        df.to_parquet(tmp_path, index=False, engine="pyarrow", compression=self.compression)
+        os.replace(tmp_path, path)
+
+    def open_stream(self, path: str):
+        return _ParquetStream(path, self.compression)
+
+
+class ExcelWriter:
+    name = "xlsx"
+    extension = ".xlsx"
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+
+    def output_path(self, dataset: str, year, month, day) -> str:
+        y, m, d = int(year), int(month), int(day)
+        return os.path.join(
+            self.base_dir, dataset, f"{dataset}_{y:04d}_{m:02d}_{d:02d}{self.extension}"
+        )
+
+    def write(self, df: pd.DataFrame, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_excel(path, index=False)
+
+    def open_stream(self, path: str):
+        return _BufferedStream(self, path)
+
+
+class _ParquetStream:
+    """Appends DataFrame batches to <path>.tmp as row groups; renamed into place on close."""
+
+    def __init__(self, path: str, compression: str):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.compression = compression
+        self._writer = None
+        self._schema = None
+
+    def write(self, df: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._schema = table.schema
+            self._writer = pq.ParquetWriter(self.tmp_path, self._schema, compression=self.compression)
+        else:
+            # Same columns and dtypes every batch (apply_schema), so the first schema fits.
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class _BufferedStream:
+    """For writers that cannot append: keep the batches and write them in one go on close."""
+
+    def __init__(self, writer, path: str):
+        self.writer = writer
+        self.path = path
+        self._batches = []
+
+    def write(self, df: pd.DataFrame):
+        self._batches.append(df)
+
+    def close(self):
+        if self._batches:
+            self.writer.write(pd.concat(self._batches, ignore_index=True), self.path)
+
+    def abort(self):
+        self._batches = []
+
+
+WRITERS = {
+    ParquetWriter.name: ParquetWriter,
+    ExcelWriter.name: ExcelWriter,
+}
+
+
+def get_writers(formats, base_dir: str):
+    """Instantiate one writer per requested format name (e.g. ["parquet", "xlsx"])."""
+    writers = []
+    for fmt in formats:
+        try:
+            writers.append(WRITERS[fmt](base_dir))
+        except KeyError:
+            raise ValueError(f"Unknown output format {fmt!r}; choose from {sorted(WRITERS)}")
+    return writers
+
+
+def write_day(df: pd.DataFrame, writers, dataset: str, year, month, day, schema=None):
+    """
+    Write one day's DataFrame with every writer.
+    Returns a list of (path, error) tuples; error is None on success.
+    """
+    if schema is not None:
+        df = apply_schema(df, schema)
+    results = []
+    for writer in writers:
+        path = writer.output_path(dataset, year, month, day)
+        try:
+            writer.write(df, path)
+            results.append((path, None))
+        except Exception as e:
+            results.append((path, e))
+    return results
+
+
+class ColumnBuffer:
+    """Records kept as one list per column (missing keys -> None)."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.clear()
+
+    def append(self, record: dict):
+        get = record.get
+        for col, values in self._values:
+            values.append(get(col))
+        self.rows += 1
+
+    def clear(self):
+        self._data = {col: [] for col in self.columns}
+        self._values = list(self._data.items())
+        self.rows = 0
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self._data, columns=self.columns)
+
+
+class DayWriter:
+    """
+    Stream one day's records to every writer in batches of batch_rows.
+
+        with DayWriter(writers, dataset, year, month, day, schema) as out:
+            for record in records:
+                out.append(record)
+            results = out.close()   # [(path, error)], as write_day returns
+
+    Nothing is written for a day without records. Files only appear under
+    their final name on close(); leaving the block without closing (e.g.
+    on an exception) removes the partial output.
+    """
+
+    def __init__(self, writers, dataset: str, year, month, day, schema: dict, batch_rows: int = 5000):
+        self.schema = schema
+        self.batch_rows = max(batch_rows, 1)
+        self.rows = 0
+        self._buffer = ColumnBuffer(schema)
+        self._streams = [w.open_stream(w.output_path(dataset, year, month, day)) for w in writers]
+        self._errors = [None] * len(self._streams)
+        self._closed = False
+
+    def append(self, record: dict):
+        self._buffer.append(record)
+        self.rows += 1
+        if self._buffer.rows >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer.rows:
+            return
+        df = apply_schema(self._buffer.to_frame(), self.schema)
+        self._buffer.clear()
+        for i, stream in enumerate(self._streams):
+            if self._errors[i] is not None:
+                continue
+            try:
+                stream.write(df)
+            except Exception as e:
+                self._errors[i] = e
+                stream.abort()
+
+    def close(self):
+        """Flush, finish every file and return [(path, error)] (empty when there were no records)."""
+        self.flush()
+        self._closed = True
+        if not self.rows:
+            return []
+        results = []
+        for stream, err in zip(self._streams, self._errors):
+            if err is None:
+                try:
+                    stream.close()
+                except Exception as e:
+                    err = e
+                    stream.abort()
+            results.append((stream.path, err))
+        return results
+
+    def abort(self):
+        self._closed = True
+        for stream in self._streams:
+            stream.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self._closed:
+            self.abort()
+        return False
+
+
+def find_day_files(base_dir: str, dataset: str):
+    """
+    List extracted daily files for a dataset, one per day, sorted by date.
+    Parquet partitions take precedence over a legacy .xlsx for the same day.
+    """
+    by_day = {}
+    xlsx_pattern = os.path.join(base_dir, dataset, f"{dataset}_????_??_??.xlsx")
+    parquet_pattern = os.path.join(
+        base_dir, dataset, "year=*", "month=*", f"{dataset}_????_??_??.parquet"
+    )
+    for pattern in (xlsx_pattern, parquet_pattern):
+        for path in glob.glob(pattern):
+            stem = os.path.splitext(os.path.basename(path))[0]
+            by_day[stem] = path
+    return [by_day[k] for k in sorted(by_day)]
+
+
+def read_day_file(path: str) -> pd.DataFrame:
+    """Read one daily file into a plain (NumPy-backed) DataFrame."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path).to_pandas(ignore_metadata=True)
+    return pd.read_excel(path)
@@ -0,0 +1,67 @@
+"""
+Shared test helpers: loading the numbered scripts (not importable by name)
+and local HTTP stand-ins for the services the pipeline talks to.
+"""
+import http.server
+import importlib.util
+import os
+import sys
+import threading
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+
+def load_script(filename: str, module_name: str):
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(REPO_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class StandIn(http.server.ThreadingHTTPServer):
+    """
+    Threaded server on 127.0.0.1 (free port) around a handler class; use as
+    a context manager. Every request path is appended to self.requests.
+    """
+    daemon_threads = True
+
+    def __init__(self, handler):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+    def url(self, path: str = "/") -> str:
+        return f"http://127.0.0.1:{self.server_port}{path}"
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """Quiet handler that logs request paths on the server."""
+
+    def log_message(self, *args):
+        pass
+
+    def log_request_path(self):
+        with self.server.lock:
+            self.server.requests.append(self.path)
+
+    def send_body(self, body: bytes, status: int = 200, content_type: str = "application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
@@ -0,0 +1,103 @@
+"""
+2a cross-day de-duplication against a local stand-in for the OCDS notice API.
+
+    python -m unittest discover tests
+
+Day 1 and day 2 list the same four notice URIs; two of the documents change
+upstream in between. The stand-in sends an ETag and answers If-None-Match
+with 304 when the document is unchanged.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from _support import Handler, StandIn, load_script
+
+URIS = [f"/Published/Notice/OCDS/notice-{n}" for n in range(4)]
+CHANGED = URIS[:2]
+
+
+def notice(path: str, title: str) -> dict:
+    return {
+        "uri": path, "publishedDate": "2021-01-04T12:00:00Z", "version": "1.1",
+        "releases": [{"ocid": f"ocds-b5fd17-{path[-1]}", "id": path[-1], "tender": {"title": title}}],
+    }
+
+
+class _NoticeHandler(Handler):
+    def do_GET(self):
+        self.log_request_path()
+        body = json.dumps(self.server.documents[self.path]).encode("utf-8")
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_body(body, headers={"ETag": etag})
+
+
+class DedupPolicyTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StandIn(_NoticeHandler).__enter__()
+        self.server.documents = {path: notice(path, "original") for path in URIS}
+        self.tmp = tempfile.TemporaryDirectory()
+
+        m = self.m = load_script("2a_extract_contracts_finder.py", "extract_contracts_finder")
+        root = self.tmp.name
+        m.SCRIPT_DIR = root
+        m.OUTPUT_BASE_DIR = os.path.join(root, "extracted_data")
+        m.CACHE_PATH = os.path.join(root, "cache", "ocds.sqlite")
+        m.URI_INDEX_PATH = os.path.join(root, "cache", "uris.sqlite")
+        m.BUILD_STATE_PATH = os.path.join(root, "cache", "build_state.sqlite")
+        m.JOURNAL_DIR = os.path.join(root, "cache", "journal")
+
+    def tearDown(self):
+        self.server.__exit__()
+        for store in (self.m._cache, self.m._uri_index, self.m._build_state):
+            if store is not None:
+                store.close()
+        self.tmp.cleanup()
+
+    def run_day(self, dd: str) -> pd.DataFrame:
+        csv_dir = os.path.join(self.tmp.name, "raw_data", "contracts_finder", "2021", "01")
+        os.makedirs(csv_dir, exist_ok=True)
+        pd.DataFrame({"uri": [self.server.url(path) for path in URIS]}).to_csv(
+            os.path.join(csv_dir, f"Contracts Finder OCDS 2021-01-{dd}.csv"), index=False)
+        self.m.process_month(2021, 1, fetch_workers=2)
+        return pd.read_parquet(self.m.get_writers(["parquet"], self.m.OUTPUT_BASE_DIR)[0]
+                               .output_path(self.m.DATASET, "2021", "01", dd))
+
+    def two_days(self, policy: str) -> pd.DataFrame:
+        self.m.DEDUP_POLICY = policy
+        self.run_day("04")
+        for path in CHANGED:
+            self.server.documents[path] = notice(path, "amended")
+        del self.server.requests[:]
+        return self.run_day("05").set_index(pd.Series(URIS))
+
+    def test_refresh_picks_up_changed_documents(self):
+        day2 = self.two_days("refresh")
+        self.assertEqual(sorted(self.server.requests), sorted(URIS))
+        self.assertEqual(list(day2.loc[CHANGED, "status"]), ["ok", "ok"])
+        self.assertEqual(list(day2.loc[CHANGED, "tender_title"]), ["amended", "amended"])
+        self.assertEqual(list(day2.loc[URIS[2:], "status"]), ["duplicate_uri_unchanged"] * 2)
+
+    def test_refetch_picks_up_changed_documents(self):
+        day2 = self.two_days("refetch")
+        self.assertEqual(sorted(self.server.requests), sorted(URIS))
+        self.assertEqual(list(day2["status"]), ["ok"] * 4)
+        self.assertEqual(list(day2["tender_title"]), ["amended", "amended", "original", "original"])
+
+    def test_skip_sends_no_requests(self):
+        day2 = self.two_days("skip")
+        self.assertEqual(self.server.requests, [])
+        self.assertEqual(list(day2["status"]), ["duplicate_uri_seen_before"] * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
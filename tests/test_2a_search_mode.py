@@ -0,0 +1,159 @@
+"""
+2a search mode against a local stand-in for the OCDS search API.
+
+    python -m unittest discover tests
+
+The stand-in serves canned release packages per published-date day, two
+releases per page, linked through links.next. It also serves the single
+notices (/Published/Notice/OCDS/<id>) that CSV mode fetches, so both modes
+can be run against one URI index.
+"""
+import json
+import os
+import tempfile
+import unittest
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import pandas as pd
+
+from _support import Handler, StandIn, load_script
+
+PAGE_SIZE = 2
+NOTICE_PATH = "/Published/Notice/OCDS/"
+
+
+def canned_release(n: int, day: str = "2021-01-04", title: str = None) -> dict:
+    return {
+        "ocid": f"ocds-b5fd17-{n:04d}", "id": f"release-{n}", "date": f"{day}T10:00:00Z",
+        "tag": ["award"], "tender": {"title": title or f"Notice {n}"},
+        "buyer": {"id": "GB-BUYER", "name": "Council"},
+        "parties": [{"id": "GB-BUYER", "name": "Council", "roles": ["buyer"]}],
+    }
+
+
+class _Handler(Handler):
+    def do_GET(self):
+        self.log_request_path()
+        server = self.server
+        parts = urlsplit(self.path)
+        if parts.path.startswith(NOTICE_PATH):
+            n = int(parts.path[len(NOTICE_PATH):])
+            package = {"uri": server.url(parts.path), "publishedDate": "2021-01-03T12:00:00Z",
+                       "version": "1.1", "releases": [canned_release(n, "2021-01-03")]}
+            self.send_body(json.dumps(package).encode("utf-8"))
+            return
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        day = query["publishedFrom"][:10]
+        releases = server.days.get(day, [])
+        cursor, limit = int(query.get("cursor", 0)), int(query["limit"])
+        package = {
+            "uri": server.url(f"/Search?{parts.query}"),
+            "publishedDate": f"{day}T12:00:00Z", "version": "1.1",
+            "publisher": {"name": "Crown Commercial Service"},
+            "releases": releases[cursor:cursor + limit],
+        }
+        if cursor + limit < len(releases):
+            package["links"] = {"next": server.url("/Search?" + urlencode(dict(query, cursor=cursor + limit)))}
+        self.send_body(json.dumps(package).encode("utf-8"))
+
+
+class SearchModeTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StandIn(_Handler).__enter__()
+        self.server.days = {"2021-01-04": [canned_release(n) for n in range(3)]}
+        self.tmp = tempfile.TemporaryDirectory()
+
+        m = self.m = load_script("2a_extract_contracts_finder.py", "extract_contracts_finder")
+        root = self.tmp.name
+        m.SCRIPT_DIR = root
+        m.OUTPUT_BASE_DIR = os.path.join(root, "extracted_data")
+        m.CACHE_PATH = os.path.join(root, "cache", "ocds.sqlite")
+        m.URI_INDEX_PATH = os.path.join(root, "cache", "uris.sqlite")
+        m.BUILD_STATE_PATH = os.path.join(root, "cache", "build_state.sqlite")
+        m.JOURNAL_DIR = os.path.join(root, "cache", "journal")
+        m.OCDS_SEARCH_URL = self.server.url("/Search")
+        m.OCDS_NOTICE_URL = self.server.url(NOTICE_PATH + "{notice_id}")
+        m.BULK_PAGE_SIZE = PAGE_SIZE
+
+    def tearDown(self):
+        self.server.__exit__()
+        for store in (self.m._cache, self.m._uri_index, self.m._build_state):
+            if store is not None:
+                store.close()
+        self.tmp.cleanup()
+
+    def notice_url(self, n: int) -> str:
+        return self.server.url(f"{NOTICE_PATH}{n:04d}")
+
+    def output(self, dd: str) -> pd.DataFrame:
+        return pd.read_parquet(self.m.get_writers(["parquet"], self.m.OUTPUT_BASE_DIR)[0]
+                               .output_path(self.m.DATASET, "2021", "01", dd))
+
+    def run_month(self, dd: str = "04") -> pd.DataFrame:
+        self.m.process_month_search(2021, 1)
+        return self.output(dd)
+
+    def run_csv_day(self, dd: str, notices) -> pd.DataFrame:
+        csv_dir = os.path.join(self.tmp.name, "raw_data", "contracts_finder", "2021", "01")
+        os.makedirs(csv_dir, exist_ok=True)
+        pd.DataFrame({"uri": [self.notice_url(n) for n in notices]}).to_csv(
+            os.path.join(csv_dir, f"Contracts Finder OCDS 2021-01-{dd}.csv"), index=False)
+        self.m.process_month(2021, 1, fetch_workers=2)
+        return self.output(dd)
+
+    def test_every_release_gets_its_notice_url(self):
+        df = self.run_month()
+        self.assertEqual(len(df), 3)
+        self.assertEqual(list(df["uri"]), [self.notice_url(n) for n in range(3)])
+        self.assertEqual(list(df["row_index"]), [0, 1, 2])
+        self.assertEqual(set(df["csv_file"]), {"ocds_search"})
+        self.assertEqual(len(self.m.get_uri_index().lookup(df["uri"])), 3)
+
+    def test_release_without_ocid_falls_back_to_page_position(self):
+        del self.server.days["2021-01-04"][1]["ocid"]
+        df = self.run_month()
+        self.assertEqual(df["uri"][1], self.m.OCDS_SEARCH_URL + "?" + urlencode(
+            {"publishedFrom": "2021-01-04T00:00:00", "publishedTo": "2021-01-05T00:00:00",
+             "limit": PAGE_SIZE}) + "#1")
+
+    def test_rerun_sees_new_releases(self):
+        self.run_month()
+        self.server.days["2021-01-04"].append(canned_release(3))
+        df = self.run_month()
+        self.assertEqual(len(df), 4)
+        self.assertIn(self.notice_url(3), set(df["uri"]))
+
+    def test_search_day_is_not_current_for_csv_mode(self):
+        self.run_month()
+        output = self.m.get_writers(["parquet"], self.m.OUTPUT_BASE_DIR)[0].output_path(
+            self.m.DATASET, "2021", "01", "04")
+        self.assertTrue(self.m.get_build_state().is_current(
+            [output], "ocds_search", *self.m.build_versions()))
+        self.assertFalse(self.m.get_build_state().is_current(
+            [output], "some-csv-sha256", *self.m.build_versions()))
+
+    def test_skip_dedups_against_csv_mode(self):
+        self.m.DEDUP_POLICY = "skip"
+        self.run_csv_day("03", [0, 1])
+        df = self.run_month()
+        self.assertEqual(list(df["status"]), ["duplicate_uri_seen_before"] * 2 + ["ok"])
+        self.assertEqual(df["tender_title"][2], "Notice 2")
+
+    def test_refresh_only_rewrites_changed_releases(self):
+        self.m.DEDUP_POLICY = "refresh"
+        self.server.days["2021-01-05"] = [canned_release(n) for n in range(3)]
+        self.server.days["2021-01-05"][1] = canned_release(1, title="Amended")
+        self.run_month()
+        day2 = self.output("05")
+        self.assertEqual(list(day2["status"]), ["duplicate_uri_unchanged", "ok", "duplicate_uri_unchanged"])
+        self.assertEqual(day2["tender_title"][1], "Amended")
+
+    def test_refetch_writes_every_release(self):
+        self.m.DEDUP_POLICY = "refetch"
+        self.server.days["2021-01-05"] = [canned_release(n) for n in range(3)]
+        self.run_month()
+        self.assertEqual(list(self.output("05")["status"]), ["ok"] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+"""
+1a's CKAN API discovery against its HTML discovery, on the package_search /
+package_show responses in tests/fixtures/ckan.
+
+    python -m unittest discover tests
+
+The fixtures follow data.gov.uk's action API format: the series comes back
+in two package_search pages (keyed by "start"), one hit is truncated so its
+resources need package_show, and titles include near misses. The stand-in
+serves the same packages as data.gov.uk-style search and dataset pages.
+"""
+import contextlib
+import html
+import io
+import json
+import os
+import tempfile
+import types
+import unittest
+from urllib.parse import parse_qs, urlsplit
+
+from _support import FIXTURES_DIR, Handler, StandIn, load_script
+
+from pipeline.session import configure_session
+
+CKAN_DIR = os.path.join(FIXTURES_DIR, "ckan")
+JOBS = [(2021, month) for month in range(1, 5)]
+
+
+def fixture(name: str) -> dict:
+    with open(os.path.join(CKAN_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def full_packages() -> list:
+    """Every package in the search pages, with package_show's resources where truncated."""
+    packages = []
+    for name in ("package_search_start_0.json", "package_search_start_3.json"):
+        for package in fixture(name)["result"]["results"]:
+            show = os.path.join(CKAN_DIR, f"package_show_{package['name']}.json")
+            packages.append(fixture(os.path.basename(show))["result"] if os.path.exists(show) else package)
+    return packages
+
+
+def search_page(packages) -> str:
+    items = "".join(
+        f'<li><h2><a class="govuk-link" href="/dataset/{p["name"]}">{html.escape(p["title"])}</a></h2></li>'
+        for p in packages
+    )
+    return f"<html><body><ul>{items}</ul></body></html>"
+
+
+def dataset_page(package) -> str:
+    rows = "".join(
+        f'<tr class="govuk-table__row"><td><a class="govuk-link" href="{html.escape(r["url"])}">'
+        f'{html.escape(r["name"])}</a></td><td>{r["format"]}</td></tr>'
+        for r in package["resources"]
+    )
+    return f'<html><body><table><tbody class="govuk-table__body">{rows}</tbody></table></body></html>'
+
+
+class _Handler(Handler):
+    def do_GET(self):
+        self.log_request_path()
+        server = self.server
+        parts = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        if parts.path == "/api/action/package_search":
+            name = server.search_fixture or f"package_search_start_{query['start']}.json"
+            self.send_body(json.dumps(fixture(name)).encode("utf-8"), status=server.search_status)
+        elif parts.path == "/api/action/package_show":
+            shown = [fixture(name) for name in sorted(os.listdir(CKAN_DIR)) if name.startswith("package_show_")]
+            body = next(b for b in shown if query["id"] in (b["result"]["id"], b["result"]["name"]))
+            self.send_body(json.dumps(body).encode("utf-8"))
+        elif parts.path == "/search":
+            self.send_body(search_page(server.packages).encode("utf-8"), content_type="text/html")
+        else:
+            name = parts.path.rsplit("/", 1)[-1]
+            package = next(p for p in server.packages if p["name"] == name)
+            self.send_body(dataset_page(package).encode("utf-8"), content_type="text/html")
+
+
+class CkanDiscoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StandIn(_Handler).__enter__()
+        self.server.packages = full_packages()
+        self.server.search_fixture = None
+        self.server.search_status = 200
+        self.tmp = tempfile.TemporaryDirectory()
+        m = self.m = load_script("1a_gov_uk_scrape_contracts_finder.py", "scrape_contracts_finder")
+        m.SCRIPT_DIR = self.tmp.name
+        m.BASE_URL = self.server.url("").rstrip("/")
+        m.CKAN_API_URL = self.server.url("/api/action")
+        configure_session(rate_limit=None)
+
+    def tearDown(self):
+        configure_session()
+        self.server.__exit__()
+        self.tmp.cleanup()
+
+    def discover_html(self, jobs) -> dict:
+        """{(year, month): [{"title", "url", "links"}]} the way crawl_sequential finds them."""
+        month_files = {}
+        for year, month in jobs:
+            datasets = self.m.find_dataset_links(self.m.fetch_page(self.m.build_search_url(year, month)),
+                                                 self.m.build_target_text(year, month))
+            for ds in datasets:
+                links = self.m.find_file_links(self.m.fetch_page(ds["url"]), self.m.build_download_dir(year, month))
+                ds["links"] = links
+            if datasets:
+                month_files[(year, month)] = datasets
+        return month_files
+
+    def discover(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.m.discover_month_files(JOBS)
+
+    def test_api_matches_html(self):
+        api = self.m.discover_months_api(JOBS)
+        # The catalogue's sizes are extra information the HTML pages do not give.
+        for datasets in api.values():
+            for ds in datasets:
+                ds["links"] = [link._replace(size=None) for link in ds["links"]]
+        self.assertEqual(api, self.discover_html(JOBS))
+        self.assertEqual(sorted(api), [(2021, 1), (2021, 2), (2021, 3)])
+
+    def test_api_pages_and_truncated_hits(self):
+        api = self.m.discover_months_api(JOBS)
+        searches = [parse_qs(urlsplit(p).query) for p in self.server.requests if "package_search" in p]
+        self.assertEqual([q["start"] for q in searches], [["0"], ["3"]])
+        self.assertEqual(searches[0]["fq"], [self.m.CKAN_FILTER])
+        self.assertEqual([p for p in self.server.requests if "package_show" in p],
+                         ["/api/action/package_show?id=6a1e2c44-0d3e-4a51-9c0e-2f0d7f1a0102"])
+        feb = api[(2021, 2)][0]["links"]
+        self.assertEqual([link.name for link in feb],
+                         ["Contracts Finder OCDS 2021-02-01", "Contracts Finder OCDS 2021-02-02"])
+        self.assertEqual(feb[1].url, self.m.BASE_URL + "/dataset/contracts-finder-notices-02-2021/resource/2021-02-02.csv")
+        self.assertEqual([link.size for link in api[(2021, 1)][0]["links"]], [1843712, 2011530])
+
+    def test_api_result_is_used(self):
+        self.assertEqual(sorted(self.discover()), [(2021, 1), (2021, 2), (2021, 3)])
+        self.assertFalse(any(p.startswith("/search") for p in self.server.requests))
+
+    def test_falls_back_to_html_on_ckan_error(self):
+        self.server.search_fixture = "package_search_error.json"
+        self.assertIsNone(self.discover())
+
+    def test_falls_back_to_html_on_http_error(self):
+        self.server.search_fixture = "package_search_error.json"
+        self.server.search_status = 500
+        self.assertIsNone(self.discover())
+
+    def test_falls_back_to_html_when_nothing_found(self):
+        self.server.search_fixture = "package_search_empty.json"
+        self.assertIsNone(self.discover())
+
+    def test_fallback_crawl_finds_the_same_files(self):
+        self.server.search_fixture = "package_search_empty.json"
+        downloads = []
+
+        def download_link(link, manifest=None):
+            downloads.append(link)
+            return types.SimpleNamespace(status="downloaded")
+
+        self.m.download_link = download_link
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.m.crawl_sequential(JOBS, month_files=self.discover())
+
+        self.server.search_fixture = None
+        api = self.m.discover_months_api(JOBS)
+        self.assertEqual(downloads, [link._replace(size=None) for job in JOBS
+                                     for ds in api.get(job, []) for link in ds["links"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
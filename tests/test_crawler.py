@@ -0,0 +1,167 @@
+"""
+pipeline.crawler: 1a's MonthCrawler against a local stand-in for data.gov.uk
+that answers slowly and throttles some requests with 429 + Retry-After.
+
+    python -m unittest discover tests
+
+The stand-in serves a search page per month, a dataset page per published
+month and two CSV files per dataset. It records when each request arrived
+and how many were in flight, so the per-host concurrency cap and the
+shared session's rate limit can be checked from the server side.
+"""
+import contextlib
+import io
+import os
+import tempfile
+import time
+import unittest
+from urllib.parse import parse_qs, urlsplit
+
+from _support import Handler, StandIn, load_script
+
+from pipeline.session import configure_session
+
+JOBS = [(2021, month) for month in range(1, 7)]
+PUBLISHED = {1, 2, 3, 5}  # 4 has no dataset, 6's search page is missing
+MISSING = {"/search?month=06"}
+RESPONSE_DELAY = 0.05
+RETRY_AFTER = 1
+PER_HOST = 3
+RATE = 20.0
+BURST = 2
+
+
+def search_page(year: int, month: int) -> str:
+    links = f'<a class="govuk-link" href="/dataset/cf-{year}-{month:02d}">Contracts Finder Notices {month:02d} {year}</a>'
+    if month not in PUBLISHED:
+        links = f'<a class="govuk-link" href="/dataset/other">Contracts Finder Notices {month:02d} {year - 1}</a>'
+    return f"<html><body>{links}</body></html>"
+
+
+def dataset_page(name: str) -> str:
+    rows = "".join(
+        f'<tr class="govuk-table__row"><td><a class="govuk-link" href="/files/{name}-{part}.csv">'
+        f"Contracts Finder OCDS {name} {part}, CSV</a></td><td>CSV</td></tr>"
+        for part in ("a", "b")
+    )
+    return f'<html><body><table><tbody class="govuk-table__body">{rows}</tbody></table></body></html>'
+
+
+class _Handler(Handler):
+    def do_GET(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        key = parts.path
+        if parts.path == "/search":
+            query = parse_qs(parts.query)["q"][0].split()
+            key = f"/search?month={query[-2]}"
+        with server.lock:
+            server.requests.append((time.monotonic(), key))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            throttle = key in server.throttled
+            server.throttled.discard(key)
+        try:
+            time.sleep(RESPONSE_DELAY)
+            if throttle:
+                self.send_body(b"slow down", status=429, content_type="text/plain",
+                               headers={"Retry-After": str(RETRY_AFTER)})
+            elif key in MISSING:
+                self.send_body(b"not found", status=404, content_type="text/plain")
+            elif parts.path == "/search":
+                query = parse_qs(parts.query)["q"][0].split()
+                html = search_page(int(query[-1]), int(query[-2]))
+                self.send_body(html.encode("utf-8"), content_type="text/html")
+            elif parts.path.startswith("/dataset/"):
+                html = dataset_page(parts.path.rsplit("/cf-", 1)[-1])
+                self.send_body(html.encode("utf-8"), content_type="text/html")
+            else:
+                self.send_body(f"uri\n{parts.path}\n".encode("utf-8"), content_type="text/csv")
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+class MonthCrawlerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StandIn(_Handler).__enter__()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.m = load_script("1a_gov_uk_scrape_contracts_finder.py", "scrape_contracts_finder")
+        self.m.BASE_URL = self.server.url("").rstrip("/")
+        configure_session(pool_size=PER_HOST, max_retries=3,
+                          rate_limit={"rate": RATE, "max_rate": RATE, "burst": BURST})
+
+    def tearDown(self):
+        configure_session()
+        self.server.__exit__()
+        self.tmp.cleanup()
+
+    def reset_server(self, throttled=()):
+        with self.server.lock:
+            self.server.requests = []
+            self.server.in_flight = self.server.max_in_flight = 0
+            self.server.throttled = set(throttled)
+
+    def crawl(self, concurrent: bool, throttled=()):
+        """Results sorted by month, and {relative path: bytes} of the files written."""
+        self.reset_server(throttled)
+        self.m.SCRIPT_DIR = os.path.join(self.tmp.name, "concurrent" if concurrent else "sequential")
+        with contextlib.redirect_stdout(io.StringIO()):
+            if concurrent:
+                results = self.m.MonthCrawler(
+                    fetch_page=self.m.fetch_page, download=self.m.download_link,
+                    build_search_url=self.m.build_search_url, build_target_text=self.m.build_target_text,
+                    build_download_dir=self.m.build_download_dir, find_dataset_links=self.m.find_dataset_links,
+                    find_file_links=self.m.find_file_links, per_host=PER_HOST,
+                ).run(JOBS)
+            else:
+                results = self.m.crawl_sequential(JOBS)
+
+        files = {}
+        for dirpath, _, filenames in os.walk(self.m.SCRIPT_DIR):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, self.m.SCRIPT_DIR)] = f.read()
+        return sorted(results, key=lambda r: (r.year, r.month)), files
+
+    def test_matches_sequential_crawl(self):
+        throttled = {"/search?month=02", "/files/2021-03-a.csv"}
+        expected = self.crawl(concurrent=False, throttled=throttled)
+        self.assertEqual(self.crawl(concurrent=True, throttled=throttled), expected)
+
+        results, files = expected
+        self.assertEqual([(r.month, r.datasets, r.downloaded, r.failed) for r in results],
+                         [(1, 1, 2, 0), (2, 1, 2, 0), (3, 1, 2, 0), (4, 0, 0, 0), (5, 1, 2, 0), (6, 0, 0, 0)])
+        self.assertIn("search fetch failed", results[-1].error)
+        self.assertEqual(len(files), 8)
+
+    def test_per_host_limit(self):
+        # Without pacing, only the crawler's semaphore holds requests back.
+        configure_session(pool_size=PER_HOST, rate_limit=None)
+        self.crawl(concurrent=True)
+        self.assertEqual(self.server.max_in_flight, PER_HOST)
+
+    def test_rate_limit(self):
+        self.crawl(concurrent=True)
+        times = [t for t, _ in self.server.requests]
+        # Token bucket: at most BURST + RATE * elapsed requests in any window
+        # (one extra for scheduling jitter between the client and the server).
+        for i in range(len(times)):
+            for j in range(i + 1, len(times)):
+                self.assertLessEqual(j - i + 1, BURST + RATE * (times[j] - times[i]) + 1)
+
+    def test_retry_after_pauses_the_host(self):
+        self.crawl(concurrent=True, throttled={"/search?month=01"})
+        requests = self.server.requests
+        throttled_at = next(t for t, key in requests if key == "/search?month=01")
+        retried_at = [t for t, key in requests if key == "/search?month=01"][1]
+        self.assertGreaterEqual(retried_at - throttled_at, RETRY_AFTER - 0.05)
+        # Requests already let through may still land; nothing new starts
+        # until the pause is over.
+        paused = [t for t, _ in requests if throttled_at + 0.3 < t < throttled_at + RETRY_AFTER - 0.05]
+        self.assertEqual(paused, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
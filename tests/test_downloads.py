@@ -0,0 +1,166 @@
+"""
+pipeline.downloads: resuming interrupted downloads against a local stand-in
+that drops the connection part-way through the body.
+
+    python -m unittest discover tests
+
+The stand-in serves one object with an ETag and Last-Modified, honours
+"Range" + "If-Range" like S3 does, and can be told to cut the body short,
+to replace the object, to ignore Range, or to answer a stale If-Range with
+206 anyway.
+"""
+import hashlib
+import os
+import socket
+import tempfile
+import unittest
+
+import requests
+
+from _support import Handler, StandIn
+
+from pipeline.downloads import download_file
+
+BODY_V1 = bytes(range(256)) * 1200  # 300 KiB
+BODY_V2 = bytes(reversed(range(256))) * 1100
+
+
+class _FileHandler(Handler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append({name.lower(): value for name, value in self.headers.items()})
+            drop_after = server.drops.pop(0) if server.drops else None
+            body, etag, last_modified = server.body, server.etag, server.last_modified
+
+        start = 0
+        wanted = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if wanted and server.honour_range and (if_range in (None, etag, last_modified) or server.stale_206):
+            start = int(wanted.split("=", 1)[1].split("-", 1)[0])
+        payload = body[start:]
+
+        self.send_response(206 if start else 200)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        if server.honour_range:
+            self.send_header("Accept-Ranges", "bytes")
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        self.end_headers()
+
+        if drop_after is None:
+            self.wfile.write(payload)
+            return
+        self.wfile.write(payload[:drop_after])
+        self.wfile.flush()
+        self.connection.shutdown(socket.SHUT_RDWR)
+        self.close_connection = True
+
+
+class DownloadResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StandIn(_FileHandler).__enter__()
+        self.set_object(BODY_V1, '"v1"', "Mon, 04 Jan 2021 10:00:00 GMT")
+        self.server.drops = []  # bytes to send before dropping, one entry per request
+        self.server.honour_range = True
+        self.server.stale_206 = False
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "notices.zip")
+        self.session = requests.Session()
+
+    def tearDown(self):
+        self.session.close()
+        self.server.__exit__()
+        self.tmp.cleanup()
+
+    def set_object(self, body: bytes, etag: str, last_modified: str):
+        with self.server.lock:
+            self.server.body, self.server.etag, self.server.last_modified = body, etag, last_modified
+
+    def download(self, **kwargs):
+        kwargs.setdefault("retry_wait", 0)
+        return download_file(self.server.url("/notices.zip"), self.dest, session=self.session, **kwargs)
+
+    def assert_downloaded(self, result, body: bytes):
+        self.assertEqual(result.status, "downloaded")
+        self.assertEqual(result.sha256, hashlib.sha256(body).hexdigest())
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), body)
+        self.assertFalse(os.path.exists(self.dest + ".part"))
+        self.assertFalse(os.path.exists(self.dest + ".part.json"))
+
+    def test_resumes_after_drop(self):
+        self.server.drops = [100_000]
+        result = self.download(expected_sha256=hashlib.sha256(BODY_V1).hexdigest())
+        self.assert_downloaded(result, BODY_V1)
+        first, second = self.server.requests
+        self.assertNotIn("range", first)
+        self.assertEqual(second["range"], "bytes=100000-")
+        self.assertEqual(second["if-range"], '"v1"')
+
+    def test_resumes_in_a_later_run(self):
+        self.server.drops = [50_000]
+        with self.assertRaises(requests.exceptions.RequestException):
+            self.download(max_retries=1)
+        self.assertEqual(os.path.getsize(self.dest + ".part"), 50_000)
+        self.assertTrue(os.path.exists(self.dest + ".part.json"))
+
+        self.assert_downloaded(self.download(), BODY_V1)
+        self.assertEqual(self.server.requests[-1]["range"], "bytes=50000-")
+
+    def test_changed_object_is_downloaded_in_full(self):
+        self.server.drops = [100_000]
+        with self.assertRaises(requests.exceptions.RequestException):
+            self.download(max_retries=1)
+        self.set_object(BODY_V2, '"v2"', "Tue, 05 Jan 2021 10:00:00 GMT")
+
+        self.assert_downloaded(self.download(), BODY_V2)
+        self.assertEqual(self.server.requests[-1]["if-range"], '"v1"')
+
+    def test_changed_object_with_206_restarts(self):
+        # A server that ignores If-Range would splice v2 onto v1; the changed
+        # ETag / Last-Modified in the 206 reply must force a fresh download.
+        self.server.stale_206 = True
+        self.server.drops = [100_000]
+        with self.assertRaises(requests.exceptions.RequestException):
+            self.download(max_retries=1)
+        self.set_object(BODY_V2, '"v2"', "Tue, 05 Jan 2021 10:00:00 GMT")
+
+        self.assert_downloaded(self.download(), BODY_V2)
+        resumed, restarted = self.server.requests[-2:]
+        self.assertEqual(resumed["range"], "bytes=100000-")
+        self.assertNotIn("range", restarted)
+
+    def test_changed_last_modified_alone_restarts(self):
+        self.server.stale_206 = True
+        self.server.drops = [100_000]
+        with self.assertRaises(requests.exceptions.RequestException):
+            self.download(max_retries=1)
+        self.set_object(BODY_V2, '"v1"', "Tue, 05 Jan 2021 10:00:00 GMT")
+
+        self.assert_downloaded(self.download(), BODY_V2)
+
+    def test_server_ignoring_range(self):
+        self.server.honour_range = False
+        self.server.drops = [100_000, 200_000]
+        result = self.download()
+        self.assert_downloaded(result, BODY_V1)
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertTrue(all("range" not in r for r in self.server.requests))
+
+    def test_range_sent_but_full_body_returned(self):
+        # Accept-Ranges advertised on the first reply, then the range is declined:
+        # the 200 body replaces the partial file instead of being appended to it.
+        self.server.drops = [100_000]
+        with self.assertRaises(requests.exceptions.RequestException):
+            self.download(max_retries=1)
+        self.server.honour_range = False
+
+        self.assert_downloaded(self.download(), BODY_V1)
+        self.assertEqual(self.server.requests[-1]["range"], "bytes=100000-")
+
+
+if __name__ == "__main__":
+    unittest.main()
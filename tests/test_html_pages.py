@@ -0,0 +1,50 @@
+"""
+pipeline.html_pages: every parser backend gives the same links and file rows.
+
+    python -m unittest discover tests
+"""
+import unittest
+
+import _support  # noqa: F401  (puts the repo root on sys.path)
+
+from pipeline.html_pages import PARSERS, get_parser
+
+LINK = '<a class="govuk-link" href="/dataset/café">Café – Contracts £10k+</a>'
+FILE_ROWS = f"""<table><tbody class="govuk-table__body">
+<tr class="govuk-table__row"><td>{LINK}</td><td>CSV – 1,2 Mo</td></tr>
+<tr class="govuk-table__row"><td>{LINK}</td></tr>
+</tbody></table>"""
+
+
+def page(body: str, head: str = "") -> str:
+    return f"<!DOCTYPE html><html><head>{head}<title>data.gov.uk</title></head><body>{body}</body></html>"
+
+
+class ParserParityTest(unittest.TestCase):
+    def assert_parity(self, html: str, expected_links, expected_rows):
+        for name in PARSERS:
+            with self.subTest(parser=name):
+                parser = get_parser(name)
+                self.assertEqual(parser.links(html), expected_links)
+                self.assertEqual(parser.file_rows(html), expected_rows)
+
+    def test_non_ascii_without_meta_charset(self):
+        self.assert_parity(
+            page(FILE_ROWS),
+            [("Café – Contracts £10k+", "/dataset/café")] * 2,
+            [("Café – Contracts £10k+", "/dataset/café", "CSV – 1,2 Mo")],
+        )
+
+    def test_non_ascii_with_meta_charset(self):
+        self.assert_parity(
+            page(f"<h2>{LINK}</h2>", head='<meta charset="utf-8">'),
+            [("Café – Contracts £10k+", "/dataset/café")],
+            [],
+        )
+
+    def test_empty_page(self):
+        self.assert_parity("", [], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+pipeline.journal: resuming a day only from a journal written for the same input.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+from pipeline.journal import DayJournal
+
+HEADER = {"input_hash": "csv-v1", "versions": ("code-1", "mapping-1")}
+
+
+class DayJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "journal", "day.jsonl")
+        journal = DayJournal(self.path)
+        journal.open(resume=True, header=HEADER)
+        journal.append({"row_index": 0}, "uri-0", "hash-0")
+        journal.append({"row_index": 1}, "uri-1")
+        journal.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_resume_with_same_header(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"uri": "uri-2", "rec')  # torn last line
+        journal = DayJournal(self.path)
+        done = journal.open(resume=True, header=HEADER)
+        self.assertFalse(journal.discarded)
+        self.assertEqual(done.rows, {0, 1})
+        self.assertEqual(done.hashes, {"uri-0": "hash-0"})
+        self.assertEqual(list(journal.records()), [{"row_index": 0}, {"row_index": 1}])
+        journal.close()
+
+    def test_changed_csv_discards_journal(self):
+        journal = DayJournal(self.path)
+        done = journal.open(resume=True, header=dict(HEADER, input_hash="csv-v2"))
+        self.assertTrue(journal.discarded)
+        self.assertEqual(done.rows, set())
+        self.assertEqual(list(journal.records()), [])
+        journal.close()
+
+    def test_changed_versions_discards_journal(self):
+        journal = DayJournal(self.path)
+        done = journal.open(resume=True, header=dict(HEADER, versions=("code-2", "mapping-1")))
+        self.assertTrue(journal.discarded)
+        self.assertEqual(done.rows, set())
+        journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
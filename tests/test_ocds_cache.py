@@ -0,0 +1,77 @@
+"""
+pipeline.ocds_cache: cache hits keep their LRU access times in memory and
+write them in batches, without losing them for eviction or across runs.
+
+    python -m unittest discover tests
+"""
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+import _support  # noqa: F401  (puts the repo root on sys.path)
+
+from pipeline import ocds_cache
+from pipeline.ocds_cache import ResponseCache
+
+
+def body(n: int) -> bytes:
+    return os.urandom(1000) + bytes([n])  # incompressible: ~1 KB per blob
+
+
+class ResponseCacheTouchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "ocds.sqlite")
+        self.cache = ResponseCache(self.path, max_bytes=3500)
+        for uri in ("a", "b", "c"):
+            self.cache.put(uri, body(ord(uri)))
+            time.sleep(0.01)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def last_access(self, uri: str):
+        """last_access as another process would see it."""
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute("SELECT last_access FROM entries WHERE uri = ?", (uri,)).fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_hit_is_not_written_at_once(self):
+        before = self.last_access("a")
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertEqual(self.last_access("a"), before)
+        self.cache.flush()
+        self.assertGreater(self.last_access("a"), before)
+
+    def test_eviction_sees_pending_hits(self):
+        self.cache.get("a")
+        self.cache.put("d", body(ord("d")))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+
+    def test_close_writes_pending_hits(self):
+        before = self.last_access("b")
+        self.cache.get("b")
+        self.cache.close()
+        self.assertGreater(self.last_access("b"), before)
+        self.cache = ResponseCache(self.path, max_bytes=3500)
+
+    def test_written_once_enough_hits_are_pending(self):
+        before = self.last_access("a")
+        batch, ocds_cache.TOUCH_BATCH = ocds_cache.TOUCH_BATCH, 2
+        try:
+            self.cache.get("a")
+            self.assertEqual(self.last_access("a"), before)
+            self.cache.get("c")
+            self.assertGreater(self.last_access("a"), before)
+        finally:
+            ocds_cache.TOUCH_BATCH = batch
+
+
+if __name__ == "__main__":
+    unittest.main()
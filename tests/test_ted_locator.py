@@ -0,0 +1,67 @@
+"""
+2b's single-pass TED locator against the old one-`.//`-scan-per-field
+locator (benchmarks/_ted_findall.py), on the notices in tests/fixtures/ted.
+
+    python -m unittest discover tests
+"""
+import os
+import unittest
+import xml.etree.ElementTree as ET
+
+from _support import FIXTURES_DIR, load_script
+
+TED_DIR = os.path.join(FIXTURES_DIR, "ted")
+
+
+class TedLocatorTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.m = load_script("2b_extract_find_a_tender_XMLs.py", "extract_find_a_tender")
+        cls.findall = load_script(os.path.join("benchmarks", "_ted_findall.py"), "ted_findall")
+        cls.roots = {
+            name: ET.parse(os.path.join(TED_DIR, name)).getroot()
+            for name in sorted(os.listdir(TED_DIR)) if name.endswith(".xml")
+        }
+
+    def namespaces(self, root) -> dict:
+        return dict(self.m._NS_NUTS, ted=root.tag[1:root.tag.index("}")])
+
+    def test_same_elements(self):
+        for name, root in self.roots.items():
+            with self.subTest(fixture=name):
+                ns = self.namespaces(root)
+                self.assertEqual(self.m._locate_ted_elements(root, ns),
+                                 self.findall.locate_ted_elements_findall(root, ns))
+
+    def test_same_records(self):
+        own = self.m._locate_ted_elements
+        for name, root in self.roots.items():
+            with self.subTest(fixture=name):
+                expected = self.m.parse_ted_style_xml(root)
+                self.m._locate_ted_elements = self.findall.locate_ted_elements_findall
+                try:
+                    self.assertEqual(self.m.parse_ted_style_xml(root), expected)
+                finally:
+                    self.m._locate_ted_elements = own
+
+    def test_fixtures_cover_every_field(self):
+        covered = set()
+        for root in self.roots.values():
+            found = self.m._locate_ted_elements(root, self.namespaces(root))
+            covered.update(field for field, el in found.items() if el is not None and el != [])
+        root = self.roots["f02_contract_notice.xml"]
+        self.assertEqual(covered, set(self.findall.locate_ted_elements_findall(root, self.namespaces(root))))
+
+    def test_multi_valued_paths_keep_findall_order(self):
+        # every n2021 code (both NOTICE_DATA sections), then every n2016 code
+        root = self.roots["repeated_notice_data.xml"]
+        found = self.m._locate_ted_elements(root, self.namespaces(root))
+        self.assertEqual([el.get("CODE") for el in found["perf_nuts"]], ["UKD33", "UKD34", "UKD3", "UKD4"])
+
+    def test_notice_without_namespace(self):
+        with self.assertRaisesRegex(SyntaxError, "prefix 'ted' not found"):
+            self.m.parse_ted_style_xml(ET.fromstring("<TED_EXPORT><NOTICE_DATA/></TED_EXPORT>"))
+
+
+if __name__ == "__main__":
+    unittest.main()